@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .metrics import PREFIX, REGISTRY, Counter, Gauge, Histogram, LATENCY_BUCKETS
+
+
+T = TypeVar("T")
+
+# 优先级数值越小越先获得槽位：手写 CQL / 展开等廉价交互查询排在 /nlq 之前，统计等后台查询最后
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NLQ = 1
+PRIORITY_BACKGROUND = 2
+
+
+class Overloaded(HTTPException):
+    """排队已满（429）或等待超过期限（503），附带 Retry-After。"""
+
+    def __init__(self, resource: str, status_code: int, retry_after: int) -> None:
+        reason = "排队已满" if status_code == 429 else "等待超时"
+        super().__init__(
+            status_code=status_code,
+            detail={"error": f"{resource} 繁忙：{reason}", "resource": resource, "retryAfter": retry_after},
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class Limiter:
+    """单个资源的并发上限 + 有界优先级等待队列（运行在事件循环内，无需加锁）。
+
+    槽位释放时直接移交给优先级最高、最早排队的等待者；排队数达到 max_queue 时立即拒绝（429），
+    等待超过 timeout 仍未获得槽位时返回 503。
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, timeout: float) -> None:
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # 槽位平均占用时长（EWMA），用于估算 Retry-After
+        self._hold = 0.1
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._hold * (self.waiting + 1) / self.limit))
+
+    async def acquire(self, priority: int) -> float:
+        """获得槽位，返回排队等待秒数。"""
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            return 0.0
+        if self.waiting >= self.max_queue:
+            rejected_total.inc(self.name, "queue_full")
+            raise Overloaded(self.name, 429, self.retry_after())
+
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, next(self._seq), fut))
+        self.waiting += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), self.timeout)
+        except asyncio.TimeoutError:
+            if not (fut.done() and not fut.cancelled()):
+                fut.cancel()
+                self.waiting -= 1
+                rejected_total.inc(self.name, "timeout")
+                raise Overloaded(self.name, 503, self.retry_after())
+        except asyncio.CancelledError:
+            # 客户端断开：已移交的槽位要归还，未移交的从队列作废
+            if fut.done() and not fut.cancelled():
+                self.release()
+            else:
+                fut.cancel()
+                self.waiting -= 1
+            raise
+        return time.monotonic() - started
+
+    def release(self, held: Optional[float] = None) -> None:
+        if held is not None:
+            self._hold = 0.8 * self._hold + 0.2 * held
+        while self._heap:
+            _, _, fut = heapq.heappop(self._heap)
+            if not fut.done():
+                # 槽位直接移交，active 不变
+                self.waiting -= 1
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+
+_limiters: Dict[str, Limiter] = {}
+
+
+def limiter(resource: str) -> Limiter:
+    if resource not in _limiters:
+        limits = {
+            "neo4j": (settings.NEO4J_MAX_CONCURRENCY, settings.NEO4J_MAX_QUEUE),
+            "llm": (settings.LLM_MAX_CONCURRENCY, settings.LLM_MAX_QUEUE),
+        }
+        limit, max_queue = limits[resource]
+        _limiters[resource] = Limiter(resource, limit, max_queue, settings.ADMISSION_TIMEOUT_MS / 1000.0)
+    return _limiters[resource]
+
+
+@asynccontextmanager
+async def admit(resource: str, priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[None]:
+    """在资源的并发上限内执行一段代码；超出时按优先级排队，队满 / 超时抛出 Overloaded。"""
+    if not settings.ADMISSION_ENABLED:
+        yield
+        return
+    lim = limiter(resource)
+    waited = await lim.acquire(priority)
+    wait_seconds.observe(waited, resource)
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        lim.release(time.monotonic() - started)
+
+
+async def run_admitted(resource: str, priority: int, func: Callable[..., T], *args: Any) -> T:
+    """在资源槽位内于线程池执行阻塞调用（Neo4j 读取等）。
+
+    线程中的调用无法中途取消：等待方被取消（客户端断开）时调用仍在运行，槽位保留到它结束才释放，
+    实际并发不会因断开重试而超过上限。
+    """
+    if not settings.ADMISSION_ENABLED:
+        return await run_in_threadpool(func, *args)
+    lim = limiter(resource)
+    waited = await lim.acquire(priority)
+    wait_seconds.observe(waited, resource)
+    started = time.monotonic()
+    work = asyncio.ensure_future(run_in_threadpool(func, *args))
+
+    def done(task: asyncio.Future) -> None:
+        lim.release(time.monotonic() - started)
+        if not task.cancelled():
+            task.exception()  # 等待方已离开时也取走异常，避免 "exception was never retrieved"
+
+    work.add_done_callback(done)
+    return await asyncio.shield(work)
+
+
+@contextmanager
+def admit_from_thread(loop: Optional[asyncio.AbstractEventLoop], resource: str,
+                      priority: int = PRIORITY_BACKGROUND) -> Iterator[None]:
+    """在工作线程（后台任务）中占用同一组槽位：Limiter 只在事件循环内访问，获取与释放都提交给 loop 执行。
+
+    阻塞到获得槽位为止，队满 / 超时同样抛出 Overloaded；loop 已停止（进程正在退出）时不再排队。
+    """
+    if not settings.ADMISSION_ENABLED or loop is None or not loop.is_running():
+        yield
+        return
+    lim = limiter(resource)
+    # 排队期限由 acquire 自己控制；外层超时只防止 loop 恰好在提交后停止时永远阻塞
+    waited = asyncio.run_coroutine_threadsafe(lim.acquire(priority), loop).result(lim.timeout + 5.0)
+    wait_seconds.observe(waited, resource)
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        try:
+            loop.call_soon_threadsafe(lim.release, time.monotonic() - started)
+        except RuntimeError:
+            # loop 已关闭：槽位随之作废
+            pass
+
+
+def _gauge(attr: str):
+    return lambda: {(name,): float(getattr(lim, attr)) for name, lim in _limiters.items()}
+
+
+wait_seconds = Histogram(f"{PREFIX}_admission_wait_seconds", "Time spent queued for a resource slot.",
+                         ("resource",), LATENCY_BUCKETS)
+rejected_total = Counter(f"{PREFIX}_admission_rejected_total", "Requests rejected by admission control.",
+                         ("resource", "reason"))
+REGISTRY.extend([
+    wait_seconds,
+    rejected_total,
+    Gauge(f"{PREFIX}_admission_queue_depth", "Requests waiting for a resource slot.", ("resource",), _gauge("waiting")),
+    Gauge(f"{PREFIX}_admission_active", "Resource slots in use.", ("resource",), _gauge("active")),
+])
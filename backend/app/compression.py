@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import zlib
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+try:
+    import brotli
+except ImportError:  # 未安装 brotli 时只协商 gzip
+    brotli = None  # type: ignore[assignment]
+
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+_COMPRESSIBLE = ("application/json", "application/msgpack", "application/x-ndjson", "text/")
+
+# 当前请求希望的响应编码（json / msgpack），由中间件设置、FastJSONResponse 读取
+_response_format: ContextVar[str] = ContextVar("response_format", default="json")
+
+# 压缩统计，供 metrics 汇报节省的字节数
+stats: Dict[str, int] = {"responses": 0, "bytesIn": 0, "bytesOut": 0}
+
+
+def response_format() -> str:
+    return _response_format.get()
+
+
+def _parse_q(header: str) -> List[Tuple[str, float]]:
+    items = []
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        for p in params.split(";"):
+            k, _, v = p.strip().partition("=")
+            if k == "q":
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        items.append((token.strip().lower(), q))
+    return items
+
+
+def wants_msgpack(accept: str) -> bool:
+    prefs = dict(_parse_q(accept))
+    best = max((prefs.get(t, 0.0) for t in MSGPACK_TYPES), default=0.0)
+    return best > 0.0 and best >= prefs.get("application/json", 0.0)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    prefs = dict(_parse_q(accept_encoding))
+    allowed = [e.strip() for e in settings.COMPRESSION_ENCODINGS.split(",") if e.strip()]
+    for enc in allowed:
+        if enc == "br" and brotli is None:
+            continue
+        q = prefs.get(enc, prefs.get("*", 0.0))
+        if q > 0.0:
+            return enc
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """按 Accept / Accept-Encoding 协商响应编码与压缩。
+
+    - Accept 包含 application/msgpack 时 FastJSONResponse 改为输出 MessagePack；
+    - 响应体超过 COMPRESSION_MIN_BYTES 时按 br / gzip 压缩，流式响应逐块压缩并 flush。
+    协商路径上的响应（包括未压缩的小响应）总是带 Vary: Accept, Accept-Encoding，共享缓存不会把一种变体交给另一种请求。
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str] = ()) -> None:
+        self.app = app
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        token = _response_format.set("msgpack" if wants_msgpack(headers.get("accept", "")) else "json")
+
+        async def send_vary(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                vary = MutableHeaders(scope=message)
+                vary.add_vary_header("Accept")
+                vary.add_vary_header("Accept-Encoding")
+            await send(message)
+
+        try:
+            encoding = choose_encoding(headers.get("accept-encoding", ""))
+            if encoding is None:
+                await self.app(scope, receive, send_vary)
+            else:
+                await self.app(scope, receive, _CompressingSend(send_vary, encoding).send)
+        finally:
+            _response_format.reset(token)
+
+
+class _CompressingSend:
+    def __init__(self, send: Send, encoding: str) -> None:
+        self._send = send
+        self.encoding = encoding
+        self._start: Optional[Message] = None
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        ctype = headers.get("content-type", "")
+        return ctype.startswith(_COMPRESSIBLE)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self._start is not None:
+            start, self._start = self._start, None
+            headers = MutableHeaders(raw=start["headers"])
+            if not self._compressible(headers) or (not more and len(body) < settings.COMPRESSION_MIN_BYTES):
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+            headers["content-encoding"] = self.encoding
+            self._compressor = _Compressor(self.encoding)
+            out = self._compressor.compress(body, final=not more)
+            if more:
+                del headers["content-length"]
+            else:
+                headers["content-length"] = str(len(out))
+            await self._send(start)
+            self._record(len(body), len(out))
+            await self._send({"type": "http.response.body", "body": out, "more_body": more})
+            return
+
+        out = self._compressor.compress(body, final=not more)
+        self._record(len(body), len(out), new_response=False)
+        await self._send({"type": "http.response.body", "body": out, "more_body": more})
+
+    @staticmethod
+    def _record(raw: int, compressed: int, new_response: bool = True) -> None:
+        if new_response:
+            stats["responses"] += 1
+        stats["bytesIn"] += raw
+        stats["bytesOut"] += compressed
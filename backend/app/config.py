@@ -14,10 +14,106 @@ class Settings:
     LLM_API_BASE: str = os.getenv("LLM_API_BASE", "https://ark.cn-beijing.volces.com/api/v3")
     LLM_API_KEY: str = os.getenv("LLM_API_KEY", "")
     LLM_MODEL: str = os.getenv("LLM_MODEL", "Doubao-1.5-pro-32k")
+    # 共享连接池中空闲连接的保活时间（秒），避免每次 /nlq 重新握手
+    LLM_KEEPALIVE_S: float = float(os.getenv("LLM_KEEPALIVE_S", "60"))
 
     ENABLE_EXPLAIN_VALIDATE: bool = os.getenv("ENABLE_EXPLAIN_VALIDATE", "false").lower() == "true"
     QUERY_TIMEOUT_MS: int = int(os.getenv("QUERY_TIMEOUT_MS", "5000"))
     QUERY_HARD_LIMIT: int = int(os.getenv("QUERY_HARD_LIMIT", "200"))
 
+    # 服务端布局（需要 numpy）：节点数不超过 LAYOUT_EXACT_MAX_NODES 时精确计算斥力，否则网格近似
+    LAYOUT_ITERATIONS: int = int(os.getenv("LAYOUT_ITERATIONS", "80"))
+    LAYOUT_EXACT_MAX_NODES: int = int(os.getenv("LAYOUT_EXACT_MAX_NODES", "500"))
+    LAYOUT_CACHE_SIZE: int = int(os.getenv("LAYOUT_CACHE_SIZE", "128"))
+
+    # 大结果摘要：节点或边数超过预算时把高度数邻域折叠为聚合节点
+    SUMMARY_MAX_NODES: int = int(os.getenv("SUMMARY_MAX_NODES", "300"))
+    SUMMARY_MAX_LINKS: int = int(os.getenv("SUMMARY_MAX_LINKS", "600"))
+    SUMMARY_GROUP_MIN: int = int(os.getenv("SUMMARY_GROUP_MIN", "8"))
+    SUMMARY_MAX_ANCHORS: int = int(os.getenv("SUMMARY_MAX_ANCHORS", "10"))
+
+    # 响应压缩：按 Accept-Encoding 协商，COMPRESSION_ENCODINGS 为服务端优先顺序（br 需要 brotli）
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_BYTES: int = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+    COMPRESSION_ENCODINGS: str = os.getenv("COMPRESSION_ENCODINGS", "br,gzip")
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "5"))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", "4"))
+
+    # 节点重要度打分（需要 numpy）：degree / pagerank / none，映射为 symbolSize 与 importance；默认关闭，按需开启
+    NODE_SCORING: str = os.getenv("NODE_SCORING", "none")
+
+    # 数据导入（import_minigradb.py）：批大小按实测事务耗时在 [MIN, MAX] 内自适应，目标为 IMPORT_TARGET_TX_MS
+    MINIGRADB_EXPORT_DIR: str = os.getenv("MINIGRADB_EXPORT_DIR", "neo4j_export")
+    # 导入状态目录：增量导入清单（manifest.json）与数据版本戳（data_version，后端缓存据此失效）
+    IMPORT_STATE_DIR: str = os.getenv("IMPORT_STATE_DIR", ".import_state")
+    IMPORT_DELETE_BATCH: int = int(os.getenv("IMPORT_DELETE_BATCH", "10000"))
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+    IMPORT_TARGET_TX_MS: int = int(os.getenv("IMPORT_TARGET_TX_MS", "500"))
+    IMPORT_MIN_BATCH: int = int(os.getenv("IMPORT_MIN_BATCH", "100"))
+    IMPORT_MAX_BATCH: int = int(os.getenv("IMPORT_MAX_BATCH", "20000"))
+    IMPORT_REL_WORKERS: int = int(os.getenv("IMPORT_REL_WORKERS", "4"))
+
+    # /stats 统计快照与共享缓存中的查询结果：按数据版本戳失效；无导入戳时（外部写入数据）另按 TTL 过期，0 表示只看版本
+    STATS_CACHE_TTL_S: int = int(os.getenv("STATS_CACHE_TTL_S", "3600"))
+    # scripts/neo4j_paper_stats.py 的并发查询数；/stats 只占一个 Neo4j 准入槽位，在槽位内顺序执行
+    STATS_WORKERS: int = int(os.getenv("STATS_WORKERS", "4"))
+
+    # 指标：各阶段计时（Server-Timing 头）与 /metrics；关闭后计时点为空操作
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # 准入控制：每种资源的并发上限与有界等待队列；队满返回 429，排队超过 ADMISSION_TIMEOUT_MS 返回 503
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_TIMEOUT_MS: int = int(os.getenv("ADMISSION_TIMEOUT_MS", "3000"))
+    NEO4J_MAX_CONCURRENCY: int = int(os.getenv("NEO4J_MAX_CONCURRENCY", "8"))
+    NEO4J_MAX_QUEUE: int = int(os.getenv("NEO4J_MAX_QUEUE", "32"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_MAX_QUEUE: int = int(os.getenv("LLM_MAX_QUEUE", "16"))
+
+    # 后台任务（POST /jobs）：独立的超时与行数预算；完成的结果保留 JOBS_TTL_S 秒，并按数量 / 总大小淘汰
+    JOBS_WORKERS: int = int(os.getenv("JOBS_WORKERS", "2"))
+    JOBS_TIMEOUT_MS: int = int(os.getenv("JOBS_TIMEOUT_MS", "120000"))
+    JOBS_MAX_ROWS: int = int(os.getenv("JOBS_MAX_ROWS", "100000"))
+    JOBS_TTL_S: int = int(os.getenv("JOBS_TTL_S", "900"))
+    JOBS_MAX_KEPT: int = int(os.getenv("JOBS_MAX_KEPT", "50"))
+    JOBS_MAX_RESULT_MB: int = int(os.getenv("JOBS_MAX_RESULT_MB", "256"))
+
+    # /ws 探索会话：服务端记住的最近 CQL 条数，单条消息的最大字节数
+    WS_HISTORY: int = int(os.getenv("WS_HISTORY", "20"))
+    WS_MAX_MESSAGE_BYTES: int = int(os.getenv("WS_MAX_MESSAGE_BYTES", "65536"))
+
+    # 导出（/export）：独立的行数上限与事务超时，结果逐行流式写出
+    EXPORT_MAX_ROWS: int = int(os.getenv("EXPORT_MAX_ROWS", "1000000"))
+    EXPORT_TIMEOUT_MS: int = int(os.getenv("EXPORT_TIMEOUT_MS", "300000"))
+
+    # 启动（lifespan）：校验 Bolt 连接池、预取 schema、执行预热查询并建立 LLM 连接；
+    # STARTUP_STRICT=true 时 Neo4j 不可用则启动失败，否则在首个请求时再连接
+    STARTUP_STRICT: bool = os.getenv("STARTUP_STRICT", "false").lower() == "true"
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_QUERIES_FILE: str = os.getenv("WARMUP_QUERIES_FILE", "")
+    WARMUP_BUDGET_MS: int = int(os.getenv("WARMUP_BUDGET_MS", "30000"))
+    LLM_WARMUP: bool = os.getenv("LLM_WARMUP", "true").lower() == "true"
+
+    # 跨 worker 共享缓存（SQLite）：/run-cql、/nlq 的序列化响应与 NLQ→CQL 翻译；默认放在 IMPORT_STATE_DIR 下
+    SHARED_CACHE_ENABLED: bool = os.getenv("SHARED_CACHE_ENABLED", "true").lower() == "true"
+    SHARED_CACHE_PATH: str = os.getenv("SHARED_CACHE_PATH", "")
+    SHARED_CACHE_MAX_MB: int = int(os.getenv("SHARED_CACHE_MAX_MB", "256"))
+
+    # 单请求剖析：设置 PROFILE_TOKEN 后，带 X-Profile-Token 头（或 ?profile=<token>）的请求在采样剖析与 tracemalloc 下执行，
+    # 产物写入 PROFILE_DIR（默认 IMPORT_STATE_DIR/profiles），保留最近 PROFILE_KEEP 份；未设置时不挂载剖析中间件
+    PROFILE_TOKEN: str = os.getenv("PROFILE_TOKEN", "")
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "")
+    PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+    PROFILE_TOP_ALLOCATIONS: int = int(os.getenv("PROFILE_TOP_ALLOCATIONS", "25"))
+    PROFILE_KEEP: int = int(os.getenv("PROFILE_KEEP", "50"))
+
+    # 实体索引：启动时对所有 Name 建立字符 n-gram 倒排索引（导入后后台重建），用于识别问句中的实体、
+    # 把 `Name CONTAINS $p` 锚定到 ID（匹配的实体数不超过 ENTITY_ANCHOR_MAX_IDS 时），以及未知名称的“你是不是要找”
+    ENTITY_INDEX_ENABLED: bool = os.getenv("ENTITY_INDEX_ENABLED", "true").lower() == "true"
+    ENTITY_ANCHOR_MAX_IDS: int = int(os.getenv("ENTITY_ANCHOR_MAX_IDS", "500"))
+    ENTITY_SUGGESTIONS: int = int(os.getenv("ENTITY_SUGGESTIONS", "5"))
+
+    # GET /suggest 输入联想默认返回的条数（同样基于实体索引，不访问数据库）
+    SUGGEST_LIMIT: int = int(os.getenv("SUGGEST_LIMIT", "10"))
+
 
 settings = Settings()
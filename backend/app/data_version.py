@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Tuple
+
+from .config import settings
+
+
+_cached: Tuple[int, str] = (-1, "")
+
+
+def version_file() -> Path:
+    return Path(settings.IMPORT_STATE_DIR) / "data_version"
+
+
+def current_data_version() -> str:
+    """当前数据版本戳（由导入脚本在数据实际变化时写入）。只 stat 文件，内容按 mtime 缓存。"""
+    global _cached
+    path = version_file()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return ""
+    if mtime != _cached[0]:
+        _cached = (mtime, path.read_text(encoding="utf-8").strip())
+    return _cached[1]
+
+
+def result_version() -> str:
+    """缓存查询结果用的版本：数据版本戳；没有导入戳时（外部写入数据）与 /stats 一样按 STATS_CACHE_TTL_S 过期，
+    以时间段作为版本，0 表示只看版本戳。"""
+    version = current_data_version()
+    ttl = settings.STATS_CACHE_TTL_S
+    if version or ttl <= 0:
+        return version
+    return f"ttl-{int(time.time() // ttl)}"
+
+
+def bump_data_version() -> str:
+    """写入新的数据版本戳；依赖数据内容的缓存据此失效。"""
+    path = version_file()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    version = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, path)
+    return version
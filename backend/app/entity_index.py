@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import settings
+from .data_version import result_version
+from .metrics import PREFIX, REGISTRY, Gauge
+from .neo4j_client import neo4j_client
+
+
+logger = logging.getLogger("uvicorn.error")
+
+# 所有带 Name 的节点；ID 为各标签内的业务 id（graph_expand 的 (label, ID) 锚点同样依赖它），度数作为联想排序的热度
+LOAD_QUERY = ("MATCH (n) WHERE n.Name IS NOT NULL "
+              "RETURN n.ID AS id, n.Name AS name, labels(n) AS labels, COUNT { (n)--() } AS degree")
+
+# 输入联想只提示这些标签的名称；权重乘以热度（1 + 度数）得到排序分。合成表（recipe）没有 Name，不在索引中
+SUGGEST_LABEL_WEIGHTS = {"item": 1.0, "block": 1.0, "monster": 0.8}
+# 前缀匹配不超过这个数量时直接排序全部前缀候选，否则按排序分顺序扫描倒排表取前几个
+_PREFIX_SORT_MAX = 256
+
+_CONTAINS = re.compile(r"\b([A-Za-z_]\w*)\.Name\s+CONTAINS\s+\$([A-Za-z_]\w*)")
+# 出现这些结构时，某个名称匹配不到任何实体并不意味着整个查询结果为空（NOT 只在可能包住名称条件时算）
+_NOT_DEFINITIVE = re.compile(r"\b(?:OPTIONAL|OR|XOR|UNION|CASE|EXISTS|CALL)\b|\bNOT\s*(?:\(|\w+\.Name\b)", re.IGNORECASE)
+# 聚合在没有匹配行时仍返回一行（count(x) = 0、collect(x) = []），匹配为空不等于结果为空
+_AGGREGATE = re.compile(r"\b(?:count|collect|sum|avg|min|max|stDev|stDevP|percentileCont|percentileDisc)\s*\(",
+                        re.IGNORECASE)
+
+
+def _grams(text: str) -> Set[str]:
+    # 字符二元组；中文名称多为 2~6 个字，二元组即可区分，单字名称退回一元组
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _features(text: str) -> Set[str]:
+    # 相似度特征：单字 + 二元组。只用二元组时，两字名称错一个字就没有任何共同特征
+    return set(text) | _grams(text)
+
+
+class EntityIndex:
+    """实体 Name 的字符 n-gram 倒排索引（进程内，只读）。
+
+    同名实体合并为一个名称条目；倒排表从二元组指向名称条目，另有单字表用于单字查询。
+    contains() 与 Neo4j 的 CONTAINS 语义一致，resolve() 在问句中找出实体名称，did_you_mean() 给出相近名称，
+    suggest() 做输入联想：倒排表按排序分（标签权重 × 热度）预先排好，另有按名称排序的数组做前缀二分查找。
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]], version: str = "") -> None:
+        self.version = version
+        self.names: List[str] = []
+        self.entities: List[List[Tuple[Any, Tuple[str, ...]]]] = []
+        self._by_name: Dict[str, int] = {}
+        self._gram_counts: List[int] = []
+        self._feature_counts: List[int] = []
+        self._degrees: List[int] = []
+        postings: Dict[str, List[int]] = defaultdict(list)
+        chars: Dict[str, List[int]] = defaultdict(list)
+        for row in rows:
+            name = row.get("name")
+            if not isinstance(name, str) or not name:
+                continue
+            idx = self._by_name.get(name)
+            if idx is None:
+                idx = self._by_name[name] = len(self.names)
+                self.names.append(name)
+                self.entities.append([])
+                self._degrees.append(0)
+                grams = _grams(name)
+                self._gram_counts.append(len(grams))
+                self._feature_counts.append(len(_features(name)))
+                for gram in grams:
+                    postings[gram].append(idx)
+                for ch in set(name):
+                    chars[ch].append(idx)
+            self.entities[idx].append((row.get("id"), tuple(row.get("labels") or ())))
+            self._degrees[idx] += int(row.get("degree") or 0)
+        self._labels = [frozenset(label for _, labels in e for label in labels) for e in self.entities]
+        # 排序分为 0 的名称（没有可联想的标签）不出现在联想结果中
+        self._scores = [max((SUGGEST_LABEL_WEIGHTS.get(label, 0.0) for label in labels), default=0.0) * (1 + degree)
+                        for labels, degree in zip(self._labels, self._degrees)]
+        order = sorted(range(len(self.names)), key=lambda i: (-self._scores[i], len(self.names[i]), self.names[i]))
+        self._rank = [0] * len(order)
+        for rank, idx in enumerate(order):
+            self._rank[idx] = rank
+        by_rank = self._rank.__getitem__
+        self._postings = {g: tuple(sorted(v, key=by_rank)) for g, v in postings.items()}
+        self._chars = {c: tuple(sorted(v, key=by_rank)) for c, v in chars.items()}
+        prefix = sorted((name, idx) for idx, name in enumerate(self.names) if self._scores[idx] > 0)
+        self._prefix_names = [name for name, _ in prefix]
+        self._prefix_idx = [idx for _, idx in prefix]
+        self.entity_count = sum(len(e) for e in self.entities)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def describe(self, idx: int) -> Dict[str, Any]:
+        return {
+            "name": self.names[idx],
+            "entities": [{"id": id_, "labels": list(labels)} for id_, labels in self.entities[idx]],
+        }
+
+    def lookup(self, name: str) -> List[Tuple[Any, Tuple[str, ...]]]:
+        idx = self._by_name.get(name)
+        return list(self.entities[idx]) if idx is not None else []
+
+    def contains(self, term: str) -> List[int]:
+        """Name 包含 term 的名称条目（即 `n.Name CONTAINS $term` 会匹配的名称）。"""
+        if not term:
+            return list(range(len(self.names)))
+        if len(term) == 1:
+            return sorted(self._chars.get(term, ()))
+        lists = [self._postings.get(g, ()) for g in _grams(term)]
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for other in lists[1:]:
+            candidates.intersection_update(other)
+            if not candidates:
+                return []
+        return sorted(i for i in candidates if term in self.names[i])
+
+    def resolve(self, text: str, min_length: int = 2) -> List[Dict[str, Any]]:
+        """找出问句中出现的实体名称：优先较长的名称，互不重叠，按出现位置排序。"""
+        hits: Dict[int, int] = defaultdict(int)
+        for gram in _grams(text):
+            for idx in self._postings.get(gram, ()):
+                hits[idx] += 1
+        # 名称的全部二元组都出现在问句中才可能是子串，再做一次确认
+        found = [idx for idx, n in hits.items()
+                 if n == self._gram_counts[idx] and len(self.names[idx]) >= min_length and self.names[idx] in text]
+        found.sort(key=lambda i: -len(self.names[i]))
+        taken = [False] * len(text)
+        mentions = []
+        for idx in found:
+            name = self.names[idx]
+            start = text.find(name)
+            while start != -1:
+                end = start + len(name)
+                if not any(taken[start:end]):
+                    taken[start:end] = [True] * len(name)
+                    mentions.append({**self.describe(idx), "start": start, "end": end})
+                start = text.find(name, start + 1)
+        mentions.sort(key=lambda m: m["start"])
+        return mentions
+
+    def did_you_mean(self, term: str, limit: int = 5, threshold: float = 0.3) -> List[str]:
+        """按单字与二元组的 Dice 系数排序的相近名称；相同得分时长度更接近的在前。"""
+        features = _features(term)
+        if not features:
+            return []
+        shared: Dict[int, int] = defaultdict(int)
+        for ch in set(term):
+            for idx in self._chars.get(ch, ()):
+                shared[idx] += 1
+        if len(term) >= 2:
+            for gram in _grams(term):
+                for idx in self._postings.get(gram, ()):
+                    shared[idx] += 1
+        scored = []
+        for idx, n in shared.items():
+            name = self.names[idx]
+            score = 2 * n / (len(features) + self._feature_counts[idx])
+            if score >= threshold:
+                scored.append((-score, abs(len(name) - len(term)), name))
+        scored.sort()
+        return [name for _, _, name in scored[:limit]]
+
+    def suggest(self, prefix: str, limit: int = 10, labels: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """输入联想：完全匹配在前，其次是以 prefix 开头的名称，再次是包含 prefix 的名称，各组内按排序分降序。
+
+        labels 给出时只返回带其中任一标签的名称。前缀候选较少时由二分查找得到后直接排序；
+        否则与包含匹配一起按排序分顺序扫描最短的倒排表，凑够 limit 个即停止。
+        """
+        prefix = prefix.strip()
+        if not prefix or limit <= 0:
+            return []
+        wanted = frozenset(labels) if labels else None
+
+        def eligible(idx: int) -> bool:
+            return self._scores[idx] > 0 and (wanted is None or not wanted.isdisjoint(self._labels[idx]))
+
+        by_rank = self._rank.__getitem__
+        lo = bisect_left(self._prefix_names, prefix)
+        hi = bisect_left(self._prefix_names, prefix + "\U0010ffff", lo)
+        if len(prefix) == 1:
+            source: Iterable[int] = self._chars.get(prefix, ())
+        else:
+            source = min((self._postings.get(g, ()) for g in _grams(prefix)), key=len)
+
+        starts: List[int] = []
+        others: List[int] = []
+        if hi - lo <= _PREFIX_SORT_MAX:
+            starts = sorted(filter(eligible, self._prefix_idx[lo:hi]), key=by_rank)[:limit]
+            if len(starts) < limit:
+                for idx in source:
+                    name = self.names[idx]
+                    if prefix in name and not name.startswith(prefix) and eligible(idx):
+                        others.append(idx)
+                        if len(starts) + len(others) >= limit:
+                            break
+        else:
+            # 前缀候选足够多，通常凑够 limit 个前缀匹配就停止；按标签过滤后不够时由包含匹配补足
+            for idx in source:
+                name = self.names[idx]
+                if prefix not in name or not eligible(idx):
+                    continue
+                if name.startswith(prefix):
+                    starts.append(idx)
+                    if len(starts) >= limit:
+                        break
+                elif len(others) < limit:
+                    others.append(idx)
+            others = others[:limit - len(starts)]
+
+        exact = self._by_name.get(prefix)
+        if exact is not None and eligible(exact) and exact not in starts[:1]:
+            if exact in starts:
+                starts.remove(exact)
+            starts = [exact] + starts[:limit - 1]
+
+        def entry(idx: int, match: str) -> Dict[str, Any]:
+            return {"name": self.names[idx], "labels": sorted(self._labels[idx]),
+                    "popularity": self._degrees[idx], "match": match}
+
+        return ([entry(idx, "exact" if idx == exact else "prefix") for idx in starts]
+                + [entry(idx, "substring") for idx in others])
+
+
+def mention_hint(mentions: List[Dict[str, Any]], max_ids: int = 5) -> str:
+    """给 LLM 的实体提示：名称 → 标签与 ID，便于生成按 ID 锚定的查询。"""
+    parts = []
+    for m in mentions:
+        entities = m["entities"][:max_ids]
+        described = "，".join(f"{':'.join(e['labels'])} ID={e['id']}" for e in entities)
+        parts.append(f"{m['name']}（{described}）")
+    return "已识别的实体：" + "；".join(parts) if parts else ""
+
+
+def anchor_on_ids(cql: str, params: Dict[str, Any], index: EntityIndex,
+                  max_ids: int) -> Tuple[str, Dict[str, Any], List[str]]:
+    """把 `x.Name CONTAINS $p` 改写为 `(x.ID IN $p_ids AND x.Name CONTAINS $p)`，查询可走 (label, ID) 索引而非全标签扫描。
+
+    $p_ids 取自索引中所有名称包含该值的实体，保留原条件后结果与改写前一致。
+    返回 (cql, params, unknown)：unknown 为索引中没有任何实体包含的名称，
+    只在查询没有 OPTIONAL / OR / UNION / 包住名称条件的 NOT 等结构、因而匹配必然为空时才给出；
+    查询含聚合时结果仍有一行，是否可以不查询数据库由 result_must_be_empty() 判断。
+    """
+    params = dict(params or {})
+    unknown: List[str] = []
+
+    def rewrite(m: re.Match) -> str:
+        var, name = m.group(1), m.group(2)
+        value = params.get(name)
+        if not isinstance(value, str):
+            return m.group(0)
+        matched = index.contains(value)
+        if not matched:
+            unknown.append(value)
+            return m.group(0)
+        ids = sorted({id_ for idx in matched for id_, _ in index.entities[idx]}, key=str)
+        ids_param = f"{name}_ids"
+        if len(ids) > max_ids or any(i is None for i in ids) or ids_param in params:
+            return m.group(0)
+        params[ids_param] = ids
+        return f"({var}.ID IN ${ids_param} AND {var}.Name CONTAINS ${name})"
+
+    cql = _CONTAINS.sub(rewrite, cql)
+    if unknown and _NOT_DEFINITIVE.search(cql):
+        unknown = []
+    return cql, params, unknown
+
+
+def result_must_be_empty(cql: str) -> bool:
+    """anchor_on_ids 给出未知名称时，查询结果是否必然为空表（RETURN / WITH 中没有聚合）。"""
+    return not _AGGREGATE.search(cql)
+
+
+class EntityIndexHolder:
+    """持有当前索引：启动时同步构建，数据版本戳变化（导入完成）或无导入戳时 TTL 到期后在后台线程重建，
+    重建期间继续使用旧索引。"""
+
+    def __init__(self, load: Callable[[], List[Dict[str, Any]]], retry_s: float = 30.0) -> None:
+        self.load = load
+        self.retry_s = retry_s
+        self.index: Optional[EntityIndex] = None
+        self.build_ms: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._failed_at = float("-inf")
+
+    def refresh(self) -> EntityIndex:
+        # 版本戳在读取前取得：读取期间导入完成时，下一次 current() 会再次重建。
+        # 没有导入戳（外部写入、neo4j-admin import）时版本是 STATS_CACHE_TTL_S 时间段，到期同样重建
+        version = result_version()
+        started = time.perf_counter()
+        index = EntityIndex(self.load(), version)
+        self.build_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.index = index
+        return index
+
+    def _refresh_background(self) -> None:
+        try:
+            index = self.refresh()
+            logger.info("实体索引已重建：%d 个名称，%d 个实体，%.1f ms", len(index), index.entity_count, self.build_ms)
+        except Exception as e:  # noqa: BLE001
+            self._failed_at = time.monotonic()
+            logger.warning("实体索引构建失败：%s", e)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def current(self) -> Optional[EntityIndex]:
+        """当前索引（可能是旧版本，尚未构建时为 None）；发现过期时触发后台重建后立即返回。"""
+        if not settings.ENTITY_INDEX_ENABLED:
+            return None
+        index = self.index
+        if index is not None and index.version == result_version():
+            return index
+        with self._lock:
+            if self._refreshing or time.monotonic() - self._failed_at < self.retry_s:
+                return index
+            self._refreshing = True
+        threading.Thread(target=self._refresh_background, name="entity-index", daemon=True).start()
+        return index
+
+
+entity_index = EntityIndexHolder(lambda: neo4j_client.run_read(LOAD_QUERY)[0])
+
+
+def _index_size() -> Dict[Tuple[str, ...], float]:
+    index = entity_index.index
+    if index is None:
+        return {}
+    return {("names",): len(index), ("entities",): index.entity_count}
+
+
+REGISTRY.append(Gauge(f"{PREFIX}_entity_index_size", "Names and entities in the in-process entity index.",
+                      ("kind",), _index_size))
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+
+def link_key(link: Dict[str, Any]) -> str:
+    # 与 records_to_graph 的去重键一致，前端按同样规则删除边
+    return f"{link['source']}->{link['target']}:{link.get('label', '')}"
+
+
+class ExplorationState:
+    """WebSocket 会话中客户端当前持有的图（节点 / 边 id）与最近执行的 CQL。
+
+    每次查询、展开或过滤都与该状态比较，只把增量（新增节点与边、需要删除的 id）发回客户端。
+    """
+
+    def __init__(self, history: int = 20) -> None:
+        self.nodes: Dict[str, str] = {}  # id -> category
+        self.links: Dict[str, Tuple[str, str]] = {}  # key -> (source, target)
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history)
+        # 最近一次查询的打分方式，展开的节点沿用，同一视图中的 symbolSize 一致
+        self.score: Optional[str] = None
+
+    def remember(self, cql: str, params: Optional[Dict[str, Any]]) -> None:
+        self.history.append({"cql": cql, "params": params or {}})
+
+    def known_ids(self) -> List[str]:
+        return list(self.nodes)
+
+    def merge(self, nodes: List[Dict[str, Any]], links: List[Dict[str, Any]], replace: bool = False,
+              drop: Iterable[str] = (), update: bool = False) -> Dict[str, Any]:
+        """合并一次结果。
+
+        replace=True 时结果之外的节点与边从状态中移除（新查询替换当前图）；
+        drop 中的节点及其关联边先行移除（展开聚合节点后去掉聚合本身）；
+        update=True 时客户端已持有的节点也以 update.nodes 发回（服务端重新布局后的坐标等），由客户端覆盖属性。
+        """
+        incoming_nodes = {str(n["id"]): n for n in nodes}
+        incoming_links = {link_key(l): l for l in links}
+        if replace:
+            drop = [nid for nid in self.nodes if nid not in incoming_nodes]
+        dropped = self.remove_nodes(drop)["remove"]
+        removed_nodes: List[str] = dropped["nodes"]
+        removed_links: List[str] = dropped["links"]
+        if replace:
+            stale = [key for key in self.links if key not in incoming_links]
+            for key in stale:
+                del self.links[key]
+            removed_links.extend(stale)
+
+        added_nodes = [n for nid, n in incoming_nodes.items() if nid not in self.nodes]
+        updated_nodes = [n for nid, n in incoming_nodes.items() if nid in self.nodes] if update else []
+        for n in added_nodes:
+            self.nodes[str(n["id"])] = n.get("category", "Node")
+        added_links = []
+        for key, l in incoming_links.items():
+            if key in self.links:
+                continue
+            # 端点必须在状态中（或本次新增），否则前端无法绘制
+            if str(l["source"]) in self.nodes and str(l["target"]) in self.nodes:
+                self.links[key] = (str(l["source"]), str(l["target"]))
+                added_links.append({**l, "id": key})
+        delta = self._delta(added_nodes, added_links, removed_nodes, removed_links)
+        if update:
+            delta["update"] = {"nodes": updated_nodes}
+        return delta
+
+    def remove_nodes(self, ids: Iterable[str]) -> Dict[str, Any]:
+        """移除节点及其关联边（过滤、折叠等）。"""
+        drop = {i for i in ids if i in self.nodes}
+        removed_links = [key for key, (s, t) in self.links.items() if s in drop or t in drop]
+        for key in removed_links:
+            del self.links[key]
+        for nid in drop:
+            del self.nodes[nid]
+        return self._delta([], [], sorted(drop), removed_links)
+
+    def filter(self, keep: Optional[List[str]] = None, exclude: Optional[List[str]] = None) -> Dict[str, Any]:
+        """按类别过滤：只保留 keep 中的类别，或去掉 exclude 中的类别。"""
+        keep_set = set(keep) if keep else None
+        exclude_set = set(exclude or [])
+        drop = [nid for nid, cat in self.nodes.items()
+                if (keep_set is not None and cat not in keep_set) or cat in exclude_set]
+        return self.remove_nodes(drop)
+
+    def reset(self) -> Dict[str, Any]:
+        return self.remove_nodes(list(self.nodes))
+
+    def _delta(self, added_nodes: List[Dict[str, Any]], added_links: List[Dict[str, Any]],
+               removed_nodes: List[str], removed_links: List[str]) -> Dict[str, Any]:
+        categories = sorted(set(self.nodes.values()))
+        return {
+            "type": "delta",
+            "add": {"nodes": added_nodes, "links": added_links},
+            "remove": {"nodes": removed_nodes, "links": removed_links},
+            "categories": [{"name": c} for c in categories],
+            "meta": {"nodeCount": len(self.nodes), "linkCount": len(self.links)},
+        }
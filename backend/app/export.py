@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import csv
+import io
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .echarts_converter import table_row
+from .serialization import dumps
+
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "jsonl": "application/x-ndjson"}
+
+
+def _cell(value: Any) -> Any:
+    # CSV 单元格只能是标量；列表 / 字典（r.data() 展开后的节点属性等）写成 JSON 文本
+    if isinstance(value, (dict, list, tuple)):
+        return dumps(value).decode("utf-8")
+    return value
+
+
+def export_chunks(fmt: str, keys: List[str], rows: Iterable[Dict[str, Any]], max_rows: int,
+                  chunk_bytes: int = 64 * 1024, on_done: Optional[Callable[[int], None]] = None) -> Iterator[bytes]:
+    """把记录流按 build_table 的列展开方式逐行写成 CSV / JSON Lines，攒够 chunk_bytes 再产出一块。
+
+    只持有当前缓冲块，内存占用与结果总行数无关；写满 max_rows 行后停止读取。on_done 收到实际写出的行数。
+    """
+    columns = list(keys)
+    count = 0
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n") if fmt == "csv" else None
+    if writer is not None:
+        # BOM 便于 Excel 正确识别 UTF-8 中文
+        buf.write("\ufeff")
+        writer.writerow(columns)
+    try:
+        for rec in rows:
+            if count >= max_rows:
+                break
+            values = table_row(rec, columns)
+            if writer is not None:
+                writer.writerow([_cell(v) for v in values])
+            else:
+                buf.write(dumps(dict(zip(columns, values))).decode("utf-8"))
+                buf.write("\n")
+            count += 1
+            if buf.tell() >= chunk_bytes:
+                yield buf.getvalue().encode("utf-8")
+                buf.seek(0)
+                buf.truncate()
+        if buf.tell():
+            yield buf.getvalue().encode("utf-8")
+    finally:
+        if on_done is not None:
+            on_done(count)
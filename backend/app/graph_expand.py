@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .config import settings
+from .echarts_converter import records_to_graph
+from .summarize import parse_aggregate_id
+
+
+# records_to_graph 对字典节点生成的 id 形如 "i:101"，首字母对应 infer_category 的标签
+_DICT_KEY = re.compile(r"([ibr]):(-?\d+)")
+_DICT_LABELS = {"i": "item", "b": "block", "r": "recipe"}
+# 在 Cypher 中按 infer_category 的同一规则拼出 m 的字典 id，用于排除客户端以 "i:101" 形式持有的节点
+_DICT_KEY_EXPR = (
+    "CASE WHEN m.IsFollowMe IS NOT NULL THEN 'r' "
+    "WHEN m.MineTool IS NOT NULL OR m.ToolLevel IS NOT NULL THEN 'b' ELSE 'i' END + ':' + toString(m.ID)"
+)
+# 没有标签的节点在 records_to_graph 中归入 "Node" 类别
+_GENERIC_CATEGORY = "Node"
+
+_PATTERNS = {
+    "out": "(n)-[r]->(m)",
+    "in": "(n)<-[r]-(m)",
+    "both": "(n)-[r]-(m)",
+}
+
+
+def build_expand_query(
+    node_id: str,
+    rel_types: Optional[List[str]] = None,
+    direction: str = "both",
+    known_ids: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """生成锚定单个节点的邻居查询。
+
+    node_id 可以是 elementId、字典节点 id（如 "i:101"）或摘要阶段产生的聚合 id；
+    聚合 id 会展开为其锚点 + 关系类型 + 方向 + 邻居标签。锚点查找走 elementId 或 (label, ID) 索引。
+    known_ids 中两种 id 形式都可出现：elementId 按 elementId(m) 排除，字典 id 按 m 的类别前缀与 ID 排除。
+    """
+    category: Optional[str] = None
+    agg = parse_aggregate_id(node_id)
+    if agg is not None:
+        if not agg["anchor"]:
+            raise ValueError("无锚点的聚合节点无法展开")
+        node_id = agg["anchor"]
+        rel_types = [agg["relType"]] if agg["relType"] else rel_types
+        direction = agg["direction"] or direction
+        category = agg["category"] or None
+    if direction not in _PATTERNS:
+        raise ValueError(f"不支持的方向：{direction}")
+
+    known = [str(k) for k in known_ids or []]
+    known_keys = [k for k in known if _DICT_KEY.fullmatch(k)]
+    params: Dict[str, Any] = {
+        "known": [k for k in known if not _DICT_KEY.fullmatch(k)],
+        "limit": min(limit or settings.QUERY_HARD_LIMIT, settings.QUERY_HARD_LIMIT),
+    }
+    m = _DICT_KEY.fullmatch(node_id)
+    if m:
+        anchor = f"MATCH (n:{_DICT_LABELS[m.group(1)]} {{ID: $key}})"
+        params["key"] = int(m.group(2))
+    else:
+        anchor = "MATCH (n) WHERE elementId(n) = $id"
+        params["id"] = node_id
+
+    conditions = ["NOT elementId(m) IN $known"]
+    if known_keys:
+        conditions.append(f"NOT {_DICT_KEY_EXPR} IN $known_keys")
+        params["known_keys"] = known_keys
+    if rel_types:
+        conditions.append("type(r) IN $types")
+        params["types"] = list(rel_types)
+    if category == _GENERIC_CATEGORY:
+        conditions.append("($category IN labels(m) OR size(labels(m)) = 0)")
+        params["category"] = category
+    elif category:
+        conditions.append("$category IN labels(m)")
+        params["category"] = category
+    cql = (
+        f"{anchor}\n"
+        f"MATCH {_PATTERNS[direction]}\n"
+        f"WHERE {' AND '.join(conditions)}\n"
+        "RETURN n, r, m\n"
+        "LIMIT $limit"
+    )
+    return cql, params
+
+
+def graph_delta(records: List[Dict[str, Any]], known_ids: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """只返回客户端尚未持有的节点，以及至少一端为新节点的边。"""
+    known: Set[str] = set(known_ids or [])
+    nodes, links = records_to_graph(records)
+    new_nodes = [n for n in nodes if str(n["id"]) not in known]
+    new_links = [l for l in links if str(l["source"]) not in known or str(l["target"]) not in known]
+    return new_nodes, new_links
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .config import settings
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobTimeout(Exception):
+    pass
+
+
+class Job:
+    """一次后台查询。runner 在读取结果时调用 check() 响应取消与超时，并更新 rows / stage 作为进度、
+    size 作为结果的序列化大小（用于按总大小淘汰）。"""
+
+    def __init__(self, kind: str, request: Dict[str, Any], loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.request = request
+        # 提交任务的事件循环：runner 借此占用准入槽位（admission.admit_from_thread）
+        self.loop = loop
+        self.status = "queued"
+        self.stage = "queued"
+        self.rows = 0
+        self.truncated = False
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.size = 0
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.deadline: Optional[float] = None
+        self._cancel = threading.Event()
+        self.future = None
+
+    def check(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise JobTimeout()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def summary(self) -> Dict[str, Any]:
+        end = self.finished or time.time()
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": {"stage": self.stage, "rows": self.rows, "truncated": self.truncated},
+            "error": self.error,
+            "createdAt": self.created,
+            "elapsedMs": round((end - self.started) * 1000, 1) if self.started else None,
+            "resultBytes": self.size,
+        }
+
+
+class JobManager:
+    """后台查询执行器与结果存储。
+
+    结果在完成后保留 JOBS_TTL_S 秒；已完成任务数超过 JOBS_MAX_KEPT 或结果总大小超过 JOBS_MAX_RESULT_MB 时
+    从最早完成的开始淘汰。任务只存在于本进程内存中，不进共享缓存：多 worker 部署时查询与取消必须路由到
+    提交任务的同一 worker（单 worker 或粘性路由）。
+    """
+
+    def __init__(self, runner: Callable[[Job], Dict[str, Any]], workers: Optional[int] = None) -> None:
+        self.runner = runner
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = workers or settings.JOBS_WORKERS
+        # 线程池在第一次提交时创建，未使用后台任务的进程不常驻工作线程；shutdown() 之后可再次创建
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, kind: str, request: Dict[str, Any], loop: Optional[asyncio.AbstractEventLoop] = None) -> Job:
+        job = Job(kind, request, loop)
+        with self._lock:
+            self._evict()
+            self._jobs[job.id] = job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="job")
+            executor = self._executor
+        job.future = executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._evict()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        job._cancel.set()
+        if job.future is not None and job.future.cancel():
+            # 尚未开始执行，直接标记
+            self._finish(job, "cancelled")
+        return job
+
+    def _run(self, job: Job) -> None:
+        if job._cancel.is_set():
+            self._finish(job, "cancelled")
+            return
+        job.status = "running"
+        job.started = time.time()
+        job.deadline = time.monotonic() + settings.JOBS_TIMEOUT_MS / 1000.0
+        try:
+            result = self.runner(job)
+            job.result = result
+            self._finish(job, "done")
+        except JobCancelled:
+            self._finish(job, "cancelled")
+        except JobTimeout:
+            self._finish(job, "failed", f"超过任务时限 {settings.JOBS_TIMEOUT_MS} ms")
+        except Exception as e:  # noqa: BLE001
+            self._finish(job, "failed", str(e))
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.stage = status
+        job.error = error
+        job.finished = time.time()
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        now = time.time()
+        finished = [j for j in self._jobs.values() if j.done]
+        for job in finished:
+            if now - job.finished > settings.JOBS_TTL_S:
+                del self._jobs[job.id]
+        finished = sorted((j for j in self._jobs.values() if j.done), key=lambda j: j.finished)
+        budget = settings.JOBS_MAX_RESULT_MB * 1024 * 1024
+        total = sum(j.size for j in finished)
+        while finished and (len(finished) > settings.JOBS_MAX_KEPT or total > budget):
+            job = finished.pop(0)
+            total -= job.size
+            del self._jobs[job.id]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            jobs = list(self._jobs.values())
+            executor, self._executor = self._executor, None
+        for job in jobs:
+            job._cancel.set()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def page(result: Dict[str, Any], offset: int, limit: int, include_graph: bool = False) -> Dict[str, Any]:
+    """按表格行分页返回结果；图默认只在请求时附带（可能很大）。"""
+    table = result.get("table") or {"columns": [], "rows": []}
+    rows = table["rows"]
+    out: Dict[str, Any] = {
+        "cql": result.get("cql"),
+        "params": result.get("params"),
+        "table": {"columns": table["columns"], "rows": rows[offset:offset + limit]},
+        "page": {"offset": offset, "limit": limit, "total": len(rows),
+                 "next": offset + limit if offset + limit < len(rows) else None},
+    }
+    if include_graph:
+        out["graph"] = result.get("graph")
+    return out
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from .config import settings
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 numpy 时不做服务端布局，前端继续使用 force 布局
+    np = None  # type: ignore[assignment]
+
+
+_cache: "OrderedDict[str, Dict[str, Tuple[float, float]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def layout_key(nodes: List[Dict[str, Any]]) -> str:
+    ids = sorted(str(n["id"]) for n in nodes)
+    return hashlib.sha1("\x1f".join(ids).encode("utf-8")).hexdigest()
+
+
+def _initial_positions(ids: List[str], scale: float) -> "np.ndarray":
+    # 由节点 id 决定初始位置，保证同一节点集合的布局结果可复现
+    seeds = np.array([zlib.crc32(i.encode("utf-8")) for i in ids], dtype=np.float64)
+    angle = (seeds % 3600.0) / 3600.0 * 2.0 * np.pi
+    radius = scale * np.sqrt(((seeds // 3600.0) % 1000.0 + 1.0) / 1000.0)
+    return np.stack([radius * np.cos(angle), radius * np.sin(angle)], axis=1)
+
+
+def _repulsion_exact(pos: "np.ndarray", k2: float) -> "np.ndarray":
+    dx = pos[:, 0:1] - pos[:, 0]
+    dy = pos[:, 1:2] - pos[:, 1]
+    dist2 = dx * dx + dy * dy
+    np.fill_diagonal(dist2, np.inf)
+    np.maximum(dist2, 1e-4, out=dist2)
+    w = k2 / dist2
+    return np.stack([(dx * w).sum(axis=1), (dy * w).sum(axis=1)], axis=1)
+
+
+def _repulsion_grid(pos: "np.ndarray", k2: float) -> "np.ndarray":
+    # 网格近似：每个节点只与各网格单元的质心（带质量）计算斥力，复杂度 O(N * cells)
+    n = pos.shape[0]
+    cells_per_side = max(2, int(np.sqrt(4.0 * np.sqrt(n))))
+    lo = pos.min(axis=0)
+    span = np.maximum(pos.max(axis=0) - lo, 1e-6)
+    cell_xy = np.minimum((pos - lo) / span * cells_per_side, cells_per_side - 1).astype(np.int64)
+    cell = cell_xy[:, 0] * cells_per_side + cell_xy[:, 1]
+    n_cells = cells_per_side * cells_per_side
+    mass = np.bincount(cell, minlength=n_cells).astype(np.float64)
+    sx = np.bincount(cell, weights=pos[:, 0], minlength=n_cells)
+    sy = np.bincount(cell, weights=pos[:, 1], minlength=n_cells)
+    occupied = np.nonzero(mass)[0]
+
+    # 扣除节点自身对所在单元质心的贡献
+    own = (cell[:, None] == occupied[None, :])
+    m = mass[occupied][None, :] - own
+    cx = (sx[occupied][None, :] - own * pos[:, 0:1]) / np.maximum(m, 1.0)
+    cy = (sy[occupied][None, :] - own * pos[:, 1:2]) / np.maximum(m, 1.0)
+    dx = pos[:, 0:1] - cx
+    dy = pos[:, 1:2] - cy
+    dist2 = np.maximum(dx * dx + dy * dy, 1e-4)
+    w = np.where(m > 0, k2 * m / dist2, 0.0)
+    return np.stack([(dx * w).sum(axis=1), (dy * w).sum(axis=1)], axis=1)
+
+
+def compute_layout(ids: List[str], edges: "np.ndarray", iterations: int) -> "np.ndarray":
+    """Fruchterman-Reingold 力导向布局，节点数超过阈值时改用网格近似斥力。"""
+    n = len(ids)
+    k = 60.0
+    k2 = k * k
+    pos = _initial_positions(ids, scale=k * np.sqrt(n))
+    if n == 1:
+        return np.zeros((1, 2))
+    exact = n <= settings.LAYOUT_EXACT_MAX_NODES
+    temperature = k * np.sqrt(n) / 10.0
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        disp = _repulsion_exact(pos, k2) if exact else _repulsion_grid(pos, k2)
+        if edges.size:
+            src, tgt = edges[:, 0], edges[:, 1]
+            delta = pos[src] - pos[tgt]
+            dist = np.maximum(np.sqrt((delta * delta).sum(axis=1)), 1e-3)
+            f = delta * (dist / k)[:, None]
+            np.add.at(disp, src, -f)
+            np.add.at(disp, tgt, f)
+        # 轻微向心力，避免孤立分量飘散
+        disp -= pos * 0.01
+        length = np.maximum(np.sqrt((disp * disp).sum(axis=1)), 1e-9)
+        pos += disp / length[:, None] * np.minimum(length, temperature)[:, None]
+        temperature -= cooling
+    return pos - pos.mean(axis=0)
+
+
+def apply_layout(nodes: List[Dict[str, Any]], links: List[Dict[str, Any]]) -> bool:
+    """为节点写入 x/y 坐标；同一节点集合命中缓存时直接复用。未安装 numpy 时返回 False。"""
+    if np is None or not nodes:
+        return False
+    key = layout_key(nodes)
+    with _cache_lock:
+        coords = _cache.get(key)
+        if coords is not None:
+            _cache.move_to_end(key)
+    if coords is None:
+        ids = [str(n["id"]) for n in nodes]
+        index = {nid: i for i, nid in enumerate(ids)}
+        pairs = [(index[str(l["source"])], index[str(l["target"])]) for l in links
+                 if str(l["source"]) in index and str(l["target"]) in index and l["source"] != l["target"]]
+        edges = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        pos = compute_layout(ids, edges, settings.LAYOUT_ITERATIONS)
+        coords = {nid: (round(float(x), 2), round(float(y), 2)) for nid, (x, y) in zip(ids, pos)}
+        with _cache_lock:
+            _cache[key] = coords
+            while len(_cache) > settings.LAYOUT_CACHE_SIZE:
+                _cache.popitem(last=False)
+    for n in nodes:
+        n["x"], n["y"] = coords[str(n["id"])]
+    return True
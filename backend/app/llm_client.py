@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Tuple
-import httpx
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 from .config import settings
 from pathlib import Path
 
@@ -26,16 +28,59 @@ class LLMClient:
         self.api_base = settings.LLM_API_BASE.rstrip("/")
         self.api_key = settings.LLM_API_KEY
         self.model = settings.LLM_MODEL
+        # 服务事件循环上共享的连接池（保持 TLS 连接），由 start() / aclose() 管理
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
-    async def generate_cypher(self, nlq: str, schema_hint: Dict[str, Any], limit: int | None) -> Tuple[str, Dict[str, Any]]:
+    def translation_version(self) -> str:
+        """翻译结果的版本戳：模型或系统提示词变化后，缓存的 NLQ→CQL 翻译失效。"""
+        digest = hashlib.sha1(load_system_prompt().encode("utf-8")).hexdigest()[:12]
+        return f"{self.model}:{digest}"
+
+    def _new_client(self):
+        # httpx 在首次调用时才导入，未使用 LLM 的进程不付出这部分导入开销
+        import httpx
+
+        return httpx.AsyncClient(timeout=20.0, limits=httpx.Limits(keepalive_expiry=settings.LLM_KEEPALIVE_S))
+
+    async def start(self, warm: bool = True) -> None:
+        """创建共享连接池；warm=True 时预先完成到 LLM 服务的 TCP / TLS 握手。"""
+        self._client = self._new_client()
+        self._loop = asyncio.get_running_loop()
+        if warm and self.api_key:
+            try:
+                # 只为建立连接，响应内容与状态码无关
+                await self._client.get(f"{self.api_base}/models", headers={"Authorization": f"Bearer {self.api_key}"}, timeout=5.0)
+            except Exception:  # noqa: BLE001
+                pass
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[Any]:
+        # 共享连接池绑定在服务事件循环上；后台任务等在其他事件循环中调用时使用临时客户端
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            yield self._client
+            return
+        async with self._new_client() as client:
+            yield client
+
+    async def generate_cypher(self, nlq: str, schema_hint: Dict[str, Any], limit: int | None,
+                              hint: str = "") -> Tuple[str, Dict[str, Any]]:
+        # hint：实体索引从问句中识别出的名称与 ID（见 entity_index.mention_hint），放在需求之前
         user_prompt = {
             "role": "user",
             "content": (
                 #f"已知图谱 schema: labels={schema_hint.get('labels')}, relTypes={schema_hint.get('relTypes')}\n"
-                f"请为以下需求编写只读 Cypher，并尽量添加 LIMIT（默认 {limit or '100'}）：\n{nlq}"
+                (f"{hint}\n" if hint else "")
+                + f"请为以下需求编写只读 Cypher，并尽量添加 LIMIT（默认 {limit or '100'}）：\n{nlq}"
             ),
         }
-        async with httpx.AsyncClient(timeout=20.0) as client:
+        async with self._session() as client:
             headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
             payload = {
                 "model": self.model,
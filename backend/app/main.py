@@ -1,21 +1,71 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import re
-from typing import Any, Dict
-from fastapi import FastAPI, HTTPException
+from contextlib import AsyncExitStack, ExitStack, asynccontextmanager
+from typing import Any, Dict, List, Literal
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from starlette.background import BackgroundTask
 
-from .schemas import NLQRequest, RunCQLRequest, NLQResponse, GraphPayload
+from .schemas import NLQRequest, RunCQLRequest, NLQResponse, ExpandRequest, JobRequest, ExportRequest
 from .neo4j_client import neo4j_client
 from .cql_validator import is_readonly_cql, explain_safe
-from .echarts_converter import records_to_graph, normalize_records, build_table
+from .echarts_converter import records_to_graph, normalize_records, build_table, table_row
+from .serialization import FastJSONResponse, graph_payload, dumps, serialized_response
+from .layout import apply_layout
+from .summarize import summarize_graph, parse_aggregate_id
+from .scoring import score_nodes
+from .graph_expand import build_expand_query, graph_delta
+from .compression import CompressionMiddleware, response_format
+from .data_version import result_version
+from .shared_cache import cache_key, shared_cache
+from .stats import get_stats
+from .metrics import MetricsMiddleware, stage, observe_result, render_metrics
+from .admission import admit, admit_from_thread, run_admitted, PRIORITY_INTERACTIVE, PRIORITY_NLQ, PRIORITY_BACKGROUND
+from .jobs import Job, JobManager, page as job_page
+from .explore import ExplorationState
+from .entity_index import anchor_on_ids, entity_index, mention_hint, result_must_be_empty
+from .export import MEDIA_TYPES, export_chunks
 from .config import settings
 from .llm_client import llm_client
+from . import profiling, startup
 
 
-app = FastAPI(title="NL → CQL → Neo4j → ECharts")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 启动：建立并校验 Bolt 连接池、预取 schema、执行预热查询（页缓存与计划缓存）、建立 LLM 连接
+    try:
+        with startup.phase("neo4j_connect"):
+            await run_in_threadpool(neo4j_client.verify)
+        with startup.phase("schema"):
+            await run_in_threadpool(neo4j_client.get_schema, True)
+        if settings.WARMUP_ENABLED:
+            with startup.phase("warmup"):
+                startup.report["warmup"] = await run_in_threadpool(
+                    startup.run_warmup, neo4j_client.run_read, startup.load_warmup_queries(), settings.WARMUP_BUDGET_MS
+                )
+        if settings.ENTITY_INDEX_ENABLED:
+            with startup.phase("entity_index"):
+                await run_in_threadpool(entity_index.refresh)
+    except Exception as e:  # noqa: BLE001
+        if settings.STARTUP_STRICT:
+            raise
+        startup.logger.warning("Neo4j 预热失败，将在首个请求时重试连接：%s", e)
+    with startup.phase("llm_connect"):
+        await llm_client.start(warm=settings.LLM_WARMUP)
+    startup.mark_ready()
+    yield
+    jobs.shutdown()
+    await llm_client.aclose()
+    await run_in_threadpool(neo4j_client.close)
+
+
+app = FastAPI(title="NL → CQL → Neo4j → ECharts", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,16 +74,49 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 查询类端点的响应协商（msgpack / br / gzip）
+app.add_middleware(CompressionMiddleware, paths=("/nlq", "/run-cql", "/graph/expand", "/export"))
+# 最外层：端到端延迟、状态码与 Server-Timing（包含压缩耗时）
+app.add_middleware(MetricsMiddleware)
+# 单请求剖析（在 Metrics 外层，产物中带上 Server-Timing）；未设置 PROFILE_TOKEN 时不挂载
+if settings.PROFILE_TOKEN:
+    app.add_middleware(profiling.ProfileMiddleware)
+app.add_middleware(startup.FirstByteMiddleware)
 
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
 
 
+def _convert_graph(records: List[Dict[str, Any]], layout: bool = False, summarize: bool = True,
+                   score: str | None = None) -> Dict[str, Any]:
+    # records → (超预算时摘要) → 重要度打分 → ECharts graph；layout=True 时附带服务端预计算坐标
+    with stage("records_to_graph"):
+        nodes, links = records_to_graph(records)
+    summary = None
+    if summarize:
+        with stage("summarize"):
+            nodes, links, summary = summarize_graph(nodes, links)
+    with stage("score"):
+        score_nodes(nodes, links, score or settings.NODE_SCORING)
+    graph = graph_payload(nodes, links)
+    if summary:
+        graph["meta"]["summary"] = summary
+    if layout:
+        with stage("layout"):
+            if apply_layout(nodes, links):
+                graph["meta"]["layout"] = "none"
+    observe_result(rows=len(records), nodes=len(nodes), links=len(links))
+    return graph
+
+
 @app.get("/")
 def index() -> FileResponse:
     return FileResponse("frontend/index.html")
 
 @app.get("/health")
-def health() -> Dict[str, Any]:
+def health(verbose: bool = False) -> Dict[str, Any]:
+    # verbose=true 附带启动报告（各阶段耗时、就绪 / 首字节时间、常驻内存）
+    if verbose:
+        return {"status": "ok", "startup": {**startup.report, "rssNowMb": startup.rss_mb()}}
     return {"status": "ok"}
 
 
@@ -42,19 +125,42 @@ def get_schema() -> Dict[str, Any]:
     return neo4j_client.get_schema()
 
 
-@app.post("/run-cql")
-def run_cql(payload: RunCQLRequest) -> Dict[str, Any]:
-    ok, reason = is_readonly_cql(payload.cql)
-    if not ok:
-        raise HTTPException(status_code=400, detail=reason)
-    ok, reason = explain_safe(payload.cql)
-    if not ok:
-        raise HTTPException(status_code=400, detail=reason)
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    # Prometheus 文本格式；METRICS_ENABLED=false 时各计时点为空操作，这里只剩压缩统计
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, request: Request, format: Literal["json", "collapsed"] = "json"):
+    # 取回剖析产物（编号见响应头 X-Profile-Id）；需要与剖析请求相同的令牌，未启用剖析时当作不存在
+    if not settings.PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiling.authorized(request.headers, request.scope.get("query_string", b"")):
+        raise HTTPException(status_code=403, detail={"error": "剖析令牌无效"})
+    body = profiling.load_profile(profile_id, format)
+    if body is None:
+        raise HTTPException(status_code=404, detail={"error": "剖析结果不存在或已被清理", "id": profile_id})
+    if format == "collapsed":
+        return PlainTextResponse(body)
+    return PlainTextResponse(body, media_type="application/json")
+
+
+@app.get("/suggest", response_class=FastJSONResponse)
+async def suggest(q: str = Query("", max_length=64), limit: int = Query(settings.SUGGEST_LIMIT, ge=1, le=50),
+                  label: List[str] | None = Query(None)) -> FastJSONResponse:
+    # 搜索框输入联想：只查进程内实体索引，不访问数据库也不进线程池；索引尚未构建或已停用时返回空列表
+    index = entity_index.current()
+    with stage("suggest"):
+        suggestions = index.suggest(q, limit, label) if index is not None else []
+    return FastJSONResponse({"q": q, "suggestions": suggestions})
 
-    # 必需参数校验：解析 CQL 中的 $param 名称并检查 payload.params 是否包含
+
+def _check_params(cql: str, params: Dict[str, Any] | None) -> None:
+    # 必需参数校验：解析 CQL 中的 $param 名称并检查 params 是否包含
     try:
-        required_params = set(re.findall(r"\$([A-Za-z_]\w*)", payload.cql))
-        provided_params = set((payload.params or {}).keys())
+        required_params = set(re.findall(r"\$([A-Za-z_]\w*)", cql))
+        provided_params = set((params or {}).keys())
         missing = sorted(required_params - provided_params)
         if missing:
             raise HTTPException(status_code=400, detail={"error": "缺少必需参数", "missing": missing})
@@ -63,62 +169,530 @@ def run_cql(payload: RunCQLRequest) -> Dict[str, Any]:
     except Exception as e:  # noqa: BLE001
         raise HTTPException(status_code=400, detail={"error": "参数校验异常", "detail": str(e)})
 
+
+async def _read(cql: str, params: Dict[str, Any] | None, priority: int):
+    # Neo4j 读取受并发上限约束；阻塞的驱动调用放进线程池，不占用事件循环
+    with stage("run_read"):
+        return await run_admitted("neo4j", priority, neo4j_client.run_read, cql, params or {})
+
+
+@app.get("/stats", response_class=FastJSONResponse)
+async def stats(request: Request, refresh: bool = False) -> FastJSONResponse:
+    # 数据集规模快照，导入完成（数据版本戳变化）前复用缓存；refresh=true 强制重新统计（全量度分布扫描），
+    # 需要与剖析相同的令牌（X-Profile-Token 或 ?profile=）。
+    # 只占一个 Neo4j 准入槽位，各统计查询在槽位内顺序执行，不绕过 NEO4J_MAX_CONCURRENCY
+    if refresh and not profiling.authorized(request.headers, request.scope.get("query_string", b"")):
+        raise HTTPException(status_code=403, detail={"error": "refresh 需要有效的 PROFILE_TOKEN"})
     try:
-        records, keys = neo4j_client.run_read(payload.cql, payload.params or {})
-        nodes, links = records_to_graph(records)
-        table = build_table(records, keys)
-        categories = sorted({n.get("category", "Node") for n in nodes})
-        categories_payload = [{"name": c} for c in categories]
-        resp: Dict[str, Any] = {
-            "graph": {
-                "nodes": nodes,
-                "links": links,
-                "categories": categories_payload,
-                "meta": {"nodeCount": len(nodes), "linkCount": len(links)},
-            }
-        }
+        snapshot = await run_admitted(
+            "neo4j", PRIORITY_BACKGROUND,
+            get_stats, lambda cql: neo4j_client.run_read(cql)[0], neo4j_client.get_schema, refresh, 1
+        )
+        return FastJSONResponse(snapshot)
+    except HTTPException:
+        raise
+    except Exception as e:  # noqa: BLE001
+        raise HTTPException(status_code=500, detail={"error": str(e)})
+
+
+async def _cached_response(key: str, version: str):
+    # 共享缓存中的值是已序列化的响应体，命中时不再转换与序列化。
+    # SQLite 读写可能等锁（busy timeout）或顺带淘汰，放进线程池，不阻塞事件循环
+    cache = shared_cache()
+    if cache is None:
+        return None
+    with stage("cache_lookup"):
+        body = await run_in_threadpool(cache.get, key, version)
+    return serialized_response(body) if body is not None else None
+
+
+def _cache_response(key: str, version: str, response: FastJSONResponse) -> None:
+    # 同步写入：只在线程池中调用（respond 内，或经 run_in_threadpool）
+    cache = shared_cache()
+    if cache is not None:
+        with stage("cache_store"):
+            cache.put(key, version, response.body)
+
+
+async def _generate_cypher(query: str, schema_hint: Dict[str, Any], limit: int | None, priority: int):
+    # NLQ→CQL 翻译按模型与系统提示词版本缓存；命中时不占用 LLM 并发槽位
+    # 问句中识别出的实体（名称 → 标签与 ID）作为提示交给 LLM，也是缓存键的一部分
+    hint = ""
+    index = entity_index.current()
+    if index is not None:
+        with stage("resolve_entities"):
+            hint = mention_hint(index.resolve(query))
+    cache = shared_cache()
+    key = cache_key("nlq-cql", query, limit, hint)
+    version = llm_client.translation_version()
+    if cache is not None:
+        with stage("cache_lookup"):
+            hit = await run_in_threadpool(cache.get, key, version)
+        if hit is not None:
+            cached = json.loads(hit)
+            return cached["cql"], cached["params"]
+    async with admit("llm", priority):
+        with stage("generate_cypher"):
+            cql, params = await llm_client.generate_cypher(query, schema_hint, limit, hint=hint)
+    if cache is not None and cql:
+        await run_in_threadpool(cache.put, key, version, dumps({"cql": cql, "params": params or {}}))
+    return cql, params
+
+
+def _anchor_entities(cql: str, params: Dict[str, Any] | None):
+    # 生成的 `x.Name CONTAINS $p` 锚定到实体 ID；名称在索引中不存在且匹配必然为空时返回相近名称，
+    # 以及结果是否必然为空表（无聚合，可以不查询数据库直接回答）。
+    # 只使用与当前数据版本一致的索引：后台重建期间的旧索引可能缺少新导入的实体；
+    # 版本为空（无导入戳且 STATS_CACHE_TTL_S=0）时索引永不重建，无法判断是否过期，不做锚定
+    index = entity_index.current()
+    if index is None or not index.version or index.version != result_version():
+        return cql, params, None, False
+    with stage("anchor_entities"):
+        cql, params, unknown = anchor_on_ids(cql, params or {}, index, settings.ENTITY_ANCHOR_MAX_IDS)
+        if not unknown:
+            return cql, params, None, False
+        did_you_mean = {name: index.did_you_mean(name, settings.ENTITY_SUGGESTIONS) for name in unknown}
+        return cql, params, did_you_mean, result_must_be_empty(cql)
+
+
+@app.post("/run-cql", response_class=FastJSONResponse)
+async def run_cql(payload: RunCQLRequest) -> FastJSONResponse:
+    with stage("is_readonly_cql"):
+        ok, reason = is_readonly_cql(payload.cql)
+    if not ok:
+        raise HTTPException(status_code=400, detail=reason)
+    _check_params(payload.cql, payload.params)
+
+    # 版本戳在查询前取得：查询期间导入完成时，本次结果写在旧版本下，不会被当作新数据命中
+    version = result_version()
+    key = cache_key("run-cql", payload.model_dump(), response_format())
+    cached = await _cached_response(key, version)
+    if cached is not None:
+        return cached
+
+    with stage("explain_safe"):
+        ok, reason = await run_in_threadpool(explain_safe, payload.cql)
+    if not ok:
+        raise HTTPException(status_code=400, detail=reason)
+
+    def respond(records: List[Dict[str, Any]], keys: List[str]) -> FastJSONResponse:
+        with stage("build_table"):
+            table = build_table(records, keys)
+        resp: Dict[str, Any] = {"graph": _convert_graph(records, bool(payload.layout), payload.summarize is not False, payload.score)}
         if payload.raw:
             resp["raw"] = normalize_records(records)
             resp["keys"] = keys
         resp["table"] = table
-        return resp
+        response = FastJSONResponse(resp)
+        _cache_response(key, version, response)
+        return response
+
+    try:
+        records, keys = await _read(payload.cql, payload.params, PRIORITY_INTERACTIVE)
+        return await run_in_threadpool(respond, records, keys)
+    except HTTPException:
+        raise
     except Exception as e:  # noqa: BLE001
         raise HTTPException(status_code=500, detail={"error": str(e), "cql": payload.cql, "params": payload.params})
 
 
-@app.post("/nlq", response_model=NLQResponse)
-async def nlq(payload: NLQRequest) -> NLQResponse:
-    schema_hint = neo4j_client.get_schema()
+# response_model 仅用于 OpenAPI 文档；返回 FastJSONResponse 时 FastAPI 不再逐项校验大图
+@app.post("/nlq", response_model=NLQResponse, response_class=FastJSONResponse)
+async def nlq(payload: NLQRequest) -> FastJSONResponse:
+    version = result_version()
+    key = cache_key("nlq", payload.model_dump(), response_format())
+    cached = await _cached_response(key, version)
+    if cached is not None:
+        return cached
+
+    with stage("get_schema"):
+        schema_hint = await run_admitted("neo4j", PRIORITY_NLQ, neo4j_client.get_schema)
     limit = payload.options.limit if payload.options else settings.QUERY_HARD_LIMIT
     debug_raw = bool(payload.options.debug_raw) if payload.options else False
+    layout = bool(payload.options.layout) if payload.options else False
+    summarize = payload.options.summarize is not False if payload.options else True
+    score = payload.options.score if payload.options else None
 
-    cql, params = await llm_client.generate_cypher(payload.query, schema_hint, limit)
+    cql, params = await _generate_cypher(payload.query, schema_hint, limit, PRIORITY_NLQ)
     if not cql:
         raise HTTPException(status_code=400, detail="LLM 未生成 CQL")
 
-    ok, reason = is_readonly_cql(cql)
+    with stage("is_readonly_cql"):
+        ok, reason = is_readonly_cql(cql)
     if not ok:
         raise HTTPException(status_code=400, detail=f"生成的 CQL 不安全：{reason}")
 
-    ok, reason = explain_safe(cql)
+    cql, params, did_you_mean, empty = _anchor_entities(cql, params)
+    if empty:
+        # 名称不存在且没有聚合：不查询数据库，直接返回空图与相近名称
+        graph = graph_payload([], [])
+        graph["meta"]["didYouMean"] = did_you_mean
+        response = FastJSONResponse({"cql": cql, "params": params or {}, "graph": graph, "raw": None, "keys": None,
+                                     "table": {"columns": [], "rows": []}})
+        await run_in_threadpool(_cache_response, key, version, response)
+        return response
+
+    with stage("explain_safe"):
+        ok, reason = await run_in_threadpool(explain_safe, cql)
     if not ok:
         raise HTTPException(status_code=400, detail=reason)
 
+    def respond(records: List[Dict[str, Any]], keys: List[str]) -> FastJSONResponse:
+        with stage("build_table"):
+            table = build_table(records, keys)
+        graph = _convert_graph(records, layout, summarize, score)
+        if did_you_mean:
+            graph["meta"]["didYouMean"] = did_you_mean
+        response = FastJSONResponse({
+            "cql": cql,
+            "params": params or {},
+            "graph": graph,
+            "raw": (normalize_records(records) if debug_raw else None),
+            "keys": (keys if debug_raw else None),
+            "table": table,
+        })
+        _cache_response(key, version, response)
+        return response
+
     try:
-        # 同步执行生成的 CQL
         # 注意：生成的 CQL 也可能包含参数，若缺失会抛出 400（与 /run-cql 一致的语义可在后续复用函数）
-        records, keys = neo4j_client.run_read(cql, params)
-        nodes, links = records_to_graph(records)
-        table = build_table(records, keys)
-        categories = sorted({n.get("category", "Node") for n in nodes})
-        categories_payload = [{"name": c} for c in categories]
-        return NLQResponse(
-            cql=cql,
-            params=params or {},
-            graph=GraphPayload(nodes=nodes, links=links, meta={"nodeCount": len(nodes), "linkCount": len(links), "categories": categories_payload}, categories=categories_payload),
-            raw=(normalize_records(records) if debug_raw else None),
-            keys=(keys if debug_raw else None),
-            table=table,
-        )
+        records, keys = await _read(cql, params, PRIORITY_NLQ)
+        return await run_in_threadpool(respond, records, keys)
+    except HTTPException:
+        raise
     except Exception as e:  # noqa: BLE001
         raise HTTPException(status_code=500, detail={"error": str(e), "cql": cql, "params": params})
+
+
+@app.post("/graph/expand", response_class=FastJSONResponse)
+async def expand(payload: ExpandRequest) -> FastJSONResponse:
+    # 单次锚定读取，只返回客户端尚未持有的节点与边（增量）
+    try:
+        cql, params = build_expand_query(payload.id, payload.rel_types, payload.direction, payload.known_ids, payload.limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def respond(records: List[Dict[str, Any]]) -> FastJSONResponse:
+        with stage("records_to_graph"):
+            nodes, links = graph_delta(records, payload.known_ids)
+        graph = graph_payload(nodes, links)
+        graph["meta"]["expandedFrom"] = payload.id
+        return FastJSONResponse({"graph": graph})
+
+    try:
+        records, _ = await _read(cql, params, PRIORITY_INTERACTIVE)
+        return await run_in_threadpool(respond, records)
+    except HTTPException:
+        raise
+    except Exception as e:  # noqa: BLE001
+        raise HTTPException(status_code=500, detail={"error": str(e), "id": payload.id})
+
+
+async def _export(req: ExportRequest) -> StreamingResponse:
+    # 校验同 /run-cql；在返回响应前占用 Neo4j 槽位并打开游标，过载、语法或连接错误仍以 JSON 错误返回
+    ok, reason = is_readonly_cql(req.cql)
+    if not ok:
+        raise HTTPException(status_code=400, detail=reason)
+    ok, reason = await run_in_threadpool(explain_safe, req.cql)
+    if not ok:
+        raise HTTPException(status_code=400, detail=reason)
+    _check_params(req.cql, req.params)
+    max_rows = min(req.max_rows or settings.EXPORT_MAX_ROWS, settings.EXPORT_MAX_ROWS)
+
+    resources = AsyncExitStack()
+    await resources.enter_async_context(admit("neo4j", PRIORITY_BACKGROUND))
+    try:
+        cursor = ExitStack()
+        keys, rows = await run_in_threadpool(
+            cursor.enter_context,
+            neo4j_client.stream_read(req.cql, req.params or {}, timeout_ms=settings.EXPORT_TIMEOUT_MS),
+        )
+        # 同步关闭：客户端断开时清理发生在已取消的作用域里，不能再等待线程池
+        resources.callback(cursor.close)
+    except Exception as e:  # noqa: BLE001
+        await resources.aclose()
+        raise HTTPException(status_code=500, detail={"error": str(e), "cql": req.cql, "params": req.params})
+
+    async def body():
+        try:
+            # 逐块从 Bolt 游标读取并编码，阻塞读取在线程池中进行
+            chunks = export_chunks(req.format, keys, rows, max_rows, on_done=lambda n: observe_result(rows=n))
+            async for chunk in iterate_in_threadpool(chunks):
+                yield chunk
+        finally:
+            await resources.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[req.format],
+        headers={"Content-Disposition": f'attachment; filename="export.{req.format}"'},
+        # 响应体未开始迭代（客户端提前断开）时由后台任务释放；重复 aclose 为空操作
+        background=BackgroundTask(resources.aclose),
+    )
+
+
+@app.post("/export")
+async def export_post(payload: ExportRequest) -> StreamingResponse:
+    return await _export(payload)
+
+
+@app.get("/export")
+async def export_get(cql: str, params: str | None = None, format: Literal["csv", "jsonl"] = "csv",
+                     max_rows: int | None = Query(None, ge=1)) -> StreamingResponse:
+    # GET 便于直接作为下载链接；params 为 JSON 字符串
+    try:
+        parsed = json.loads(params) if params else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="params 不是合法的 JSON")
+    if parsed is not None and not isinstance(parsed, dict):
+        raise HTTPException(status_code=400, detail="params 必须是 JSON 对象")
+    return await _export(ExportRequest(cql=cql, params=parsed, format=format, max_rows=max_rows))
+
+
+async def _ws_read(session, cql: str, params: Dict[str, Any] | None, priority: int):
+    # 与 _read 相同的准入控制，但复用连接持有的会话
+    with stage("run_read"):
+        return await run_admitted("neo4j", priority, neo4j_client.run_read, cql, params or {}, session)
+
+
+async def _ws_query(state: ExplorationState, session, msg: Dict[str, Any]) -> Dict[str, Any]:
+    # 查询 / 自然语言：默认替换当前图（replace=false 时合并进当前图），回复增量与本次结果表格
+    if msg["type"] == "nlq":
+        priority = PRIORITY_NLQ
+        if not isinstance(msg.get("query"), str) or not msg["query"].strip():
+            raise HTTPException(status_code=400, detail="缺少 query")
+        schema_hint = await run_admitted("neo4j", priority, neo4j_client.get_schema)
+        cql, params = await _generate_cypher(msg["query"], schema_hint, msg.get("limit") or settings.QUERY_HARD_LIMIT, priority)
+        if not cql:
+            raise HTTPException(status_code=400, detail="LLM 未生成 CQL")
+        cql, params, did_you_mean, empty = _anchor_entities(cql, params)
+    else:
+        priority = PRIORITY_INTERACTIVE
+        did_you_mean, empty = None, False
+        cql, params = msg.get("cql"), msg.get("params")
+        if not isinstance(cql, str) or not cql.strip():
+            raise HTTPException(status_code=400, detail="缺少 cql")
+    params = params or {}
+
+    ok, reason = is_readonly_cql(cql)
+    if not ok:
+        raise HTTPException(status_code=400, detail=reason)
+    if empty:
+        # 与 /nlq 一致：名称不存在且没有聚合时不查询数据库，回复空图（replace=false 时当前图不变）与相近名称
+        state.remember(cql, params)
+        delta = state.merge([], [], replace=msg.get("replace") is not False)
+        delta["meta"]["didYouMean"] = did_you_mean
+        delta.update(cql=cql, params=params, table={"columns": [], "rows": []})
+        return delta
+    ok, reason = await run_in_threadpool(explain_safe, cql)
+    if not ok:
+        raise HTTPException(status_code=400, detail=reason)
+    _check_params(cql, params)
+
+    records, keys = await _ws_read(session, cql, params, priority)
+    state.remember(cql, params)
+
+    def respond() -> Dict[str, Any]:
+        with stage("records_to_graph"):
+            nodes, links = records_to_graph(records)
+        summary = None
+        if msg.get("summarize") is not False:
+            with stage("summarize"):
+                nodes, links, summary = summarize_graph(nodes, links)
+        state.score = msg.get("score") or settings.NODE_SCORING
+        with stage("score"):
+            score_nodes(nodes, links, state.score)
+        replace = msg.get("replace") is not False
+        # 服务端坐标只在替换整张图时有意义；合并时新节点交给浏览器端力导向布局。
+        # 替换时整张图重新布局，保留下来的节点也要带上新坐标（update），客户端才能关闭力导向
+        positioned = False
+        if msg.get("layout") and replace:
+            with stage("layout"):
+                positioned = apply_layout(nodes, links)
+        delta = state.merge(nodes, links, replace=replace, update=positioned)
+        if positioned:
+            delta["meta"]["layout"] = "none"
+        if summary:
+            delta["meta"]["summary"] = summary
+        if did_you_mean:
+            delta["meta"]["didYouMean"] = did_you_mean
+        observe_result(rows=len(records), nodes=len(nodes), links=len(links))
+        delta.update(cql=cql, params=params, table=build_table(records, keys))
+        if msg.get("raw"):
+            delta.update(raw=normalize_records(records), keys=keys)
+        return delta
+
+    return await run_in_threadpool(respond)
+
+
+async def _ws_expand(state: ExplorationState, session, msg: Dict[str, Any]) -> Dict[str, Any]:
+    # 展开：已知 id 取自服务端状态，客户端无需上传；展开聚合节点后移除聚合本身
+    node_id = str(msg.get("node") or "")
+    try:
+        cql, params = build_expand_query(node_id, msg.get("rel_types"), msg.get("direction") or "both",
+                                         state.known_ids(), msg.get("limit"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    records, _ = await _ws_read(session, cql, params, PRIORITY_INTERACTIVE)
+
+    def respond() -> Dict[str, Any]:
+        with stage("records_to_graph"):
+            nodes, links = records_to_graph(records)
+        with stage("score"):
+            score_nodes(nodes, links, msg.get("score") or state.score or settings.NODE_SCORING)
+        drop = [node_id] if parse_aggregate_id(node_id) is not None else []
+        delta = state.merge(nodes, links, drop=drop)
+        delta["meta"]["expandedFrom"] = node_id
+        return delta
+
+    return await run_in_threadpool(respond)
+
+
+async def _ws_message(state: ExplorationState, session, msg: Dict[str, Any]) -> Dict[str, Any]:
+    kind = msg.get("type")
+    if kind == "ping":
+        return {"type": "pong"}
+    if kind in ("query", "nlq"):
+        return await _ws_query(state, session, msg)
+    if kind == "expand":
+        return await _ws_expand(state, session, msg)
+    if kind == "filter":
+        return state.filter(msg.get("keep"), msg.get("exclude"))
+    if kind == "remove":
+        return state.remove_nodes(str(i) for i in msg.get("ids") or [])
+    if kind == "reset":
+        return state.reset()
+    if kind == "history":
+        return {"type": "history", "items": list(state.history)}
+    raise HTTPException(status_code=400, detail=f"不支持的消息类型：{kind}")
+
+
+@app.websocket("/ws")
+async def explore_ws(websocket: WebSocket) -> None:
+    """探索会话：连接期间服务端保存客户端当前的图与最近的 CQL，每条消息只回复相对该状态的增量。
+
+    消息按到达顺序逐条处理；回复带回请求中的 id。错误以 {"type": "error", "status", "detail"} 回复，连接保持。
+    """
+    await websocket.accept()
+    state = ExplorationState(settings.WS_HISTORY)
+    session = None
+    try:
+        while True:
+            text = await websocket.receive_text()
+            msg: Dict[str, Any] = {}
+            try:
+                if len(text.encode("utf-8")) > settings.WS_MAX_MESSAGE_BYTES:
+                    raise HTTPException(status_code=413, detail="消息过大")
+                try:
+                    msg = json.loads(text)
+                except ValueError:
+                    raise HTTPException(status_code=400, detail="消息不是合法的 JSON")
+                if not isinstance(msg, dict):
+                    msg = {}
+                    raise HTTPException(status_code=400, detail="消息必须是 JSON 对象")
+                if session is None and msg.get("type") in ("query", "nlq", "expand"):
+                    session = neo4j_client.read_session()
+                reply = await _ws_message(state, session, msg)
+            except HTTPException as e:
+                reply = {"type": "error", "status": e.status_code, "detail": e.detail}
+            except Exception as e:  # noqa: BLE001
+                reply = {"type": "error", "status": 500, "detail": {"error": str(e)}}
+            if "id" in msg:
+                reply["id"] = msg["id"]
+            await websocket.send_text(dumps(reply).decode("utf-8"))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if session is not None:
+            await run_in_threadpool(session.close)
+
+
+def _run_job(job: Job) -> Dict[str, Any]:
+    # 后台任务：独立的超时（JOBS_TIMEOUT_MS）与行数预算（JOBS_MAX_ROWS），逐条读取以便响应取消。
+    # NLQ 已在 create_job 中翻译并校验，这里只执行 CQL
+    req = job.request
+    cql, params = req["cql"], req.get("params") or {}
+    if req.get("empty"):
+        graph = graph_payload([], [])
+        graph["meta"]["didYouMean"] = req["didYouMean"]
+        return {"cql": cql, "params": params, "table": {"columns": [], "rows": []}, "graph": graph}
+
+    # 表格行随读取逐条展开，结果大小（用于 JOBS_MAX_RESULT_MB 淘汰）同时累加，不必在完成后整体再序列化一次。
+    # 读取与交互查询共用 NEO4J_MAX_CONCURRENCY，以最低优先级排队（与 /stats 相同）
+    records: List[Dict[str, Any]] = []
+    table_rows: List[List[Any]] = []
+    job.stage = "admission"
+    with admit_from_thread(job.loop, "neo4j", PRIORITY_BACKGROUND):
+        job.stage = "run_read"
+        with neo4j_client.stream_read(cql, params, timeout_ms=settings.JOBS_TIMEOUT_MS) as (keys, rows):
+            for record in rows:
+                job.check()
+                records.append(record)
+                table_rows.append(table_row(record, keys))
+                job.size += len(dumps(table_rows[-1])) + 1
+                job.rows += 1
+                if job.rows >= settings.JOBS_MAX_ROWS:
+                    job.truncated = True
+                    break
+    job.check()
+    job.stage = "convert"
+    graph = _convert_graph(records, bool(req.get("layout")), req.get("summarize") is not False, req.get("score"))
+    if req.get("didYouMean"):
+        graph["meta"]["didYouMean"] = req["didYouMean"]
+    job.size += len(dumps(graph))
+    return {"cql": cql, "params": params or {}, "table": {"columns": list(keys), "rows": table_rows}, "graph": graph}
+
+
+jobs = JobManager(_run_job)
+
+
+@app.post("/jobs", status_code=202, response_class=FastJSONResponse)
+async def create_job(payload: JobRequest) -> FastJSONResponse:
+    # 长时间分析查询：立即返回任务 id，结果通过 GET /jobs/{id} 分页获取
+    if bool(payload.query) == bool(payload.cql):
+        raise HTTPException(status_code=400, detail="query 与 cql 需且仅需提供一个")
+    request = payload.model_dump()
+    if payload.query:
+        # NLQ 与 /nlq 走同一条路径：共享翻译缓存、实体提示与 LLM 并发上限；不安全的 CQL 在提交前即返回 400
+        with stage("get_schema"):
+            schema_hint = await run_admitted("neo4j", PRIORITY_NLQ, neo4j_client.get_schema)
+        cql, params = await _generate_cypher(payload.query, schema_hint, settings.JOBS_MAX_ROWS, PRIORITY_NLQ)
+        if not cql:
+            raise HTTPException(status_code=400, detail="LLM 未生成 CQL")
+        ok, reason = is_readonly_cql(cql)
+        if not ok:
+            raise HTTPException(status_code=400, detail=f"生成的 CQL 不安全：{reason}")
+        cql, params, request["didYouMean"], request["empty"] = _anchor_entities(cql, params)
+    else:
+        cql, params = payload.cql, payload.params
+        ok, reason = is_readonly_cql(cql)
+        if not ok:
+            raise HTTPException(status_code=400, detail=reason)
+    if not request.get("empty"):
+        ok, reason = await run_in_threadpool(explain_safe, cql)
+        if not ok:
+            raise HTTPException(status_code=400, detail=reason)
+        _check_params(cql, params)
+    request["cql"], request["params"] = cql, params or {}
+    job = jobs.submit("nlq" if payload.query else "cql", request, asyncio.get_running_loop())
+    return FastJSONResponse(job.summary(), status_code=202)
+
+
+@app.get("/jobs/{job_id}", response_class=FastJSONResponse)
+def get_job(job_id: str, offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+            graph: bool = False) -> FastJSONResponse:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    body = job.summary()
+    if job.status == "done" and job.result is not None:
+        body["result"] = job_page(job.result, offset, limit, graph)
+    return FastJSONResponse(body)
+
+
+@app.delete("/jobs/{job_id}", response_class=FastJSONResponse)
+def cancel_job(job_id: str) -> FastJSONResponse:
+    job = jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    return FastJSONResponse(job.summary())
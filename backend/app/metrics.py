@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import compression
+from .config import settings
+
+
+PREFIX = "neo4jslave"
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (0, 1, 10, 50, 100, 200, 500, 1000, 5000, 10000)
+
+# 当前请求各阶段耗时（纳秒），由 MetricsMiddleware 设置；同步端点在线程池中运行时上下文随之复制，列表共享
+_timings: ContextVar[Optional[List[Tuple[str, int]]]] = ContextVar("stage_timings", default=None)
+
+
+class Histogram:
+    """Prometheus 风格的累积直方图（带标签），观测值按桶计数。"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...]) -> None:
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [各桶计数..., +Inf 计数, 总和]
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in sorted(items):
+            base = _labels(self.label_names, labels)
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), labels + (le,))} {cumulative:g}")
+            lines.append(f"{self.name}_sum{base} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{base} {cumulative:g}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]) -> None:
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_labels(self.label_names, labels)} {value:g}" for labels, value in items)
+        return lines
+
+
+class Gauge:
+    """取值时调用 collect() 返回 {标签元组: 值}，用于队列深度等瞬时量。"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...],
+                 collect: Callable[[], Dict[Tuple[str, ...], float]]) -> None:
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        lines.extend(f"{self.name}{_labels(self.label_names, labels)} {value:g}"
+                     for labels, value in sorted(self.collect().items()))
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+stage_seconds = Histogram(f"{PREFIX}_stage_seconds", "Time spent in each request stage.", ("stage",), LATENCY_BUCKETS)
+request_seconds = Histogram(f"{PREFIX}_request_seconds", "End-to-end request latency.", ("method", "path"), LATENCY_BUCKETS)
+result_size = Histogram(f"{PREFIX}_result_size", "Result size per query (rows / nodes / links).", ("kind",), SIZE_BUCKETS)
+requests_total = Counter(f"{PREFIX}_requests_total", "Requests by status code.", ("method", "path", "status"))
+errors_total = Counter(f"{PREFIX}_errors_total", "Responses with status >= 400.", ("method", "path", "status"))
+
+REGISTRY = [stage_seconds, request_seconds, result_size, requests_total, errors_total]
+
+
+def enabled() -> bool:
+    return settings.METRICS_ENABLED
+
+
+@contextmanager
+def _timed(name: str) -> Iterator[None]:
+    started = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter_ns() - started
+        stage_seconds.observe(elapsed / 1e9, name)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+_NOOP = nullcontext()
+
+
+def stage(name: str):
+    """计时一个处理阶段：记入阶段直方图，并出现在本次响应的 Server-Timing 头中。关闭指标时为空操作。"""
+    if not settings.METRICS_ENABLED:
+        return _NOOP
+    return _timed(name)
+
+
+def observe_result(rows: Optional[int] = None, nodes: Optional[int] = None, links: Optional[int] = None) -> None:
+    if not settings.METRICS_ENABLED:
+        return
+    for kind, value in (("rows", rows), ("nodes", nodes), ("links", links)):
+        if value is not None:
+            result_size.observe(value, kind)
+
+
+def server_timing(timings: List[Tuple[str, int]], total_ns: int) -> str:
+    """同名阶段累加，按首次出现顺序输出，单位毫秒。"""
+    merged: Dict[str, int] = {}
+    for name, elapsed in timings:
+        merged[name] = merged.get(name, 0) + elapsed
+    parts = [f"{name};dur={elapsed / 1e6:.1f}" for name, elapsed in merged.items()]
+    parts.append(f"total;dur={total_ns / 1e6:.1f}")
+    return ", ".join(parts)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    # 压缩中间件的字节统计
+    for key, name, help_text in (
+        ("responses", "compressed_responses_total", "Responses compressed by CompressionMiddleware."),
+        ("bytesIn", "compression_bytes_in_total", "Uncompressed bytes fed to the compressor."),
+        ("bytesOut", "compression_bytes_out_total", "Compressed bytes sent."),
+    ):
+        lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_{name} counter")
+        lines.append(f"{PREFIX}_{name} {compression.stats[key]}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """记录端到端延迟与状态码，并把本次请求各阶段耗时写入 Server-Timing 响应头。
+
+    路径标签取已匹配路由的模板（如 /jobs/{job_id}，未匹配的记为 "unmatched"），避免任意 URL 或路径参数撑大时间序列数量。
+    """
+
+    def __init__(self, app: ASGIApp, exclude: Tuple[str, ...] = ("/metrics", "/static")) -> None:
+        self.app = app
+        self.exclude = exclude
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED or scope["path"].startswith(self.exclude):
+            await self.app(scope, receive, send)
+            return
+        timings: List[Tuple[str, int]] = []
+        token = _timings.set(timings)
+        started = time.perf_counter_ns()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(timings, time.perf_counter_ns() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
+            path = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            request_seconds.observe((time.perf_counter_ns() - started) / 1e9, method, path)
+            requests_total.inc(method, path, str(status))
+            if status >= 400:
+                errors_total.inc(method, path, str(status))
@@ -1,37 +1,83 @@
-from typing import Any, Dict, List, Tuple
-from neo4j import GraphDatabase, Driver
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from neo4j import GraphDatabase, Driver, Session
 from .config import settings
+from .data_version import current_data_version
 
 
 class Neo4jClient:
     def __init__(self) -> None:
-        self._driver: Driver = GraphDatabase.driver(
-            settings.NEO4J_URI,
-            auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
-        )
+        # 连接池在首次使用时创建（导入模块不连接数据库）；服务启动时由 lifespan 提前创建并校验
+        self._driver: Optional[Driver] = None
+        self._lock = threading.Lock()
+        self._schema: Optional[Tuple[str, Dict[str, List[str]]]] = None
+
+    @property
+    def driver(self) -> Driver:
+        if self._driver is None:
+            with self._lock:
+                if self._driver is None:
+                    self._driver = GraphDatabase.driver(
+                        settings.NEO4J_URI,
+                        auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+                    )
+        return self._driver
+
+    def verify(self) -> None:
+        self.driver.verify_connectivity()
 
     def close(self) -> None:
-        if self._driver:
-            self._driver.close()
+        with self._lock:
+            if self._driver:
+                self._driver.close()
+            self._driver = None
 
-    def get_schema(self) -> Dict[str, List[str]]:
-        with self._driver.session(database=settings.NEO4J_DATABASE, default_access_mode="READ") as session:
+    def get_schema(self, refresh: bool = False) -> Dict[str, List[str]]:
+        """标签与关系类型；按数据版本戳缓存，导入完成后下一次调用重新读取。"""
+        version = current_data_version()
+        cached = self._schema
+        if cached is not None and cached[0] == version and not refresh:
+            return cached[1]
+        with self.driver.session(database=settings.NEO4J_DATABASE, default_access_mode="READ") as session:
             labels = session.run("CALL db.labels()")
             rel_types = session.run("CALL db.relationshipTypes()")
-            return {
+            schema = {
                 "labels": [r[0] for r in labels],
                 "relTypes": [r[0] for r in rel_types],
             }
+        self._schema = (version, schema)
+        return schema
+
+    def read_session(self) -> Session:
+        """长期持有的只读会话（/ws 探索会话每个连接一个），由调用方负责 close()；不可跨线程并发使用。"""
+        return self.driver.session(database=settings.NEO4J_DATABASE, default_access_mode="READ")
 
-    def run_read(self, cql: str, params: Dict[str, Any] | None = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    def run_read(self, cql: str, params: Dict[str, Any] | None = None,
+                 session: Optional[Session] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
         params = params or {}
-        with self._driver.session(database=settings.NEO4J_DATABASE, default_access_mode="READ") as session:
-            # Neo4j Python driver expects tx timeout in seconds (float)
-            timeout_seconds = settings.QUERY_TIMEOUT_MS / 1000.0
-            result = session.run(cql, parameters=params, timeout=timeout_seconds)
-            keys = result.keys()
-            records = [r.data() for r in result]
-            return records, list(keys)
+        if session is not None:
+            return self._run(session, cql, params)
+        with self.driver.session(database=settings.NEO4J_DATABASE, default_access_mode="READ") as session:
+            return self._run(session, cql, params)
+
+    @staticmethod
+    def _run(session: Session, cql: str, params: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        # Neo4j Python driver expects tx timeout in seconds (float)
+        timeout_seconds = settings.QUERY_TIMEOUT_MS / 1000.0
+        result = session.run(cql, parameters=params, timeout=timeout_seconds)
+        keys = result.keys()
+        records = [r.data() for r in result]
+        return records, list(keys)
+
+    @contextmanager
+    def stream_read(self, cql: str, params: Dict[str, Any] | None = None,
+                    timeout_ms: Optional[int] = None) -> Iterator[Tuple[List[str], Iterator[Dict[str, Any]]]]:
+        """逐条读取结果（不整体缓冲）：yield (keys, 记录迭代器)，离开上下文时关闭会话并丢弃未读完的结果。"""
+        with self.driver.session(database=settings.NEO4J_DATABASE, default_access_mode="READ") as session:
+            timeout_seconds = (timeout_ms or settings.QUERY_TIMEOUT_MS) / 1000.0
+            result = session.run(cql, parameters=params or {}, timeout=timeout_seconds)
+            yield list(result.keys()), (r.data() for r in result)
 
 neo4j_client = Neo4jClient()
 
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import hmac
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+
+PROFILE_ID = re.compile(r"[0-9]{8}-[0-9]{6}-[0-9a-f]{6}")
+# 栈顶落在这些模块里的线程处于等待状态（空闲的线程池 worker、事件循环的 select），不计入样本
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+
+def profile_dir() -> Path:
+    return Path(settings.PROFILE_DIR or Path(settings.IMPORT_STATE_DIR) / "profiles")
+
+
+def authorized(headers: Headers, query_string: bytes) -> bool:
+    """X-Profile-Token 头或 ?profile=<token> 与 PROFILE_TOKEN 一致；未设置 PROFILE_TOKEN 时总是 False。"""
+    token = settings.PROFILE_TOKEN
+    if not token:
+        return False
+    supplied = headers.get("x-profile-token") or dict(parse_qsl(query_string.decode("latin-1"))).get("profile", "")
+    return hmac.compare_digest(supplied.encode("utf-8"), token.encode("utf-8"))
+
+
+_short_names: Dict[str, str] = {}
+
+
+def _short(filename: str) -> str:
+    short = _short_names.get(filename)
+    if short is None:
+        path = filename.replace("\\", "/")
+        for marker in ("/site-packages/", "/backend/"):
+            if marker in path:
+                short = path.rsplit(marker, 1)[1]
+                break
+        else:
+            short = path.rsplit("/", 1)[-1]
+        _short_names[filename] = short
+    return short
+
+
+class StackSampler:
+    """后台线程每 interval 秒读取一次所有线程的调用栈（sys._current_frames），按折叠栈计数。
+
+    请求的处理分布在事件循环线程与线程池中，确定性剖析器（cProfile）只覆盖启用它的线程，因此用采样；
+    同一时间段内其它请求的栈也会被采到，剖析应在低负载时进行。
+    tracemalloc 开启时每隔 snapshot_interval 秒检查一次已跟踪内存，创新高（超过上次快照 10%）时重新快照，
+    这样分配统计反映请求的内存高峰，而不只是请求结束时仍存活的对象。
+    """
+
+    def __init__(self, interval: float, snapshot_interval: float = 0.01) -> None:
+        self.interval = interval
+        self.snapshot_interval = snapshot_interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self._snapshot_size = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        checked = time.monotonic()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _short(frame.f_code.co_filename) in _IDLE_FILES:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({_short(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                parts.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+            if time.monotonic() - checked >= self.snapshot_interval:
+                self.check_memory()
+                checked = time.monotonic()
+
+    def check_memory(self) -> None:
+        if not tracemalloc.is_tracing():
+            return
+        current = tracemalloc.get_traced_memory()[0]
+        if current > self._snapshot_size * 1.1:
+            self.snapshot = tracemalloc.take_snapshot()
+            self._snapshot_size = current
+
+    def collapsed(self) -> List[str]:
+        # Brendan Gregg 的折叠栈格式，可直接交给 flamegraph.pl / speedscope
+        return [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, limit: int) -> List[Dict[str, Any]]:
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ))
+    return [
+        {"where": f"{_short(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+         "sizeKb": round(stat.size / 1024, 1), "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def save_profile(profile: Dict[str, Any], collapsed: List[str]) -> None:
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{profile['id']}.json").write_text(
+        json.dumps({**profile, "collapsed": collapsed}, ensure_ascii=False, indent=1), encoding="utf-8")
+    (directory / f"{profile['id']}.collapsed").write_text("\n".join(collapsed) + "\n", encoding="utf-8")
+    # 只保留最近 PROFILE_KEEP 份（文件名以时间开头，按名称排序即按时间排序）
+    artifacts = sorted(directory.glob("*.json"))
+    for old in artifacts[: max(0, len(artifacts) - settings.PROFILE_KEEP)]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".collapsed").unlink(missing_ok=True)
+
+
+def load_profile(profile_id: str, fmt: str = "json") -> Optional[str]:
+    if not PROFILE_ID.fullmatch(profile_id):
+        return None
+    path = profile_dir() / f"{profile_id}.{'collapsed' if fmt == 'collapsed' else 'json'}"
+    return path.read_text(encoding="utf-8") if path.exists() else None
+
+
+class ProfileMiddleware:
+    """带有效剖析令牌的请求在采样剖析与 tracemalloc 下执行，产物写入 PROFILE_DIR，响应头 X-Profile-Id 给出编号。
+
+    产物包含折叠栈、分配最多的代码行与本次的 Server-Timing（LLM、校验、Neo4j 读取、转换等阶段耗时）。
+    同一时间只剖析一个请求，其余带令牌的请求照常执行并返回 X-Profile: busy。
+    只在设置了 PROFILE_TOKEN 时挂载，未设置时默认路径上没有任何额外开销。
+    """
+
+    def __init__(self, app: ASGIApp, exclude: Tuple[str, ...] = ("/profiles", "/metrics", "/static")) -> None:
+        self.app = app
+        self.exclude = exclude
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope["type"] != "http" or scope["path"].startswith(self.exclude)
+                or not authorized(Headers(scope=scope), scope.get("query_string", b""))):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            async def send_busy(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append("X-Profile", "busy")
+                await send(message)
+
+            await self.app(scope, receive, send_busy)
+            return
+        try:
+            await self._profiled(scope, receive, send)
+        finally:
+            self._busy.release()
+
+    async def _profiled(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+        query = [(k, v) for k, v in parse_qsl(scope.get("query_string", b"").decode("latin-1")) if k != "profile"]
+        profile: Dict[str, Any] = {
+            "id": profile_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": urlencode(query),
+            "pid": os.getpid(),
+            "intervalMs": settings.PROFILE_INTERVAL_MS,
+        }
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000)
+        started = time.perf_counter()
+        sampler.start()
+        finished = False
+
+        async def finish() -> None:
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            profile["elapsedMs"] = round((time.perf_counter() - started) * 1000, 1)
+            sampler.stop()
+            sampler.check_memory()
+            profile["peakKb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            profile["snapshotKb"] = round(sampler._snapshot_size / 1024, 1)
+            if not was_tracing:
+                tracemalloc.stop()
+            profile["samples"] = sampler.samples
+            profile["topAllocations"] = (top_allocations(sampler.snapshot, settings.PROFILE_TOP_ALLOCATIONS)
+                                         if sampler.snapshot is not None else [])
+            await run_in_threadpool(save_profile, profile, sampler.collapsed())
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Profile-Id", profile_id)
+                profile["status"] = message["status"]
+                profile["serverTiming"] = headers.get("server-timing")
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # 最后一块发出前写好产物：客户端收到响应后即可取回剖析结果
+                await finish()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            await finish()
@@ -1,10 +1,16 @@
-﻿from typing import Any, Dict, Optional, List
+﻿from typing import Any, Dict, Optional, List, Literal
 from pydantic import BaseModel
 
 
 class NLQOptions(BaseModel):
     limit: Optional[int] = None
     debug_raw: Optional[bool] = False
+    # 为 true 时后端预先计算节点坐标，前端可直接以 layout: 'none' 渲染
+    layout: Optional[bool] = False
+    # 超出 SUMMARY_MAX_NODES / SUMMARY_MAX_LINKS 时折叠为聚合节点；false 返回完整图
+    summarize: Optional[bool] = True
+    # 节点重要度打分方式，缺省使用 NODE_SCORING
+    score: Optional[Literal["degree", "pagerank", "none"]] = None
 
 
 class NLQRequest(BaseModel):
@@ -16,6 +22,37 @@ class RunCQLRequest(BaseModel):
     cql: str
     params: Optional[Dict[str, Any]] = None
     raw: Optional[bool] = False
+    layout: Optional[bool] = False
+    summarize: Optional[bool] = True
+    score: Optional[Literal["degree", "pagerank", "none"]] = None
+
+
+class ExportRequest(BaseModel):
+    cql: str
+    params: Optional[Dict[str, Any]] = None
+    format: Literal["csv", "jsonl"] = "csv"
+    # 超过 EXPORT_MAX_ROWS 时以配置为准
+    max_rows: Optional[int] = None
+
+
+class ExpandRequest(BaseModel):
+    # 节点 id：elementId、字典节点 id（如 "i:101"）或摘要返回的聚合 id（"agg:..."）
+    id: str
+    rel_types: Optional[List[str]] = None
+    direction: Literal["out", "in", "both"] = "both"
+    # 客户端已持有的节点 id，返回结果中会排除
+    known_ids: Optional[List[str]] = None
+    limit: Optional[int] = None
+
+
+class JobRequest(BaseModel):
+    # query（自然语言）与 cql 二选一
+    query: Optional[str] = None
+    cql: Optional[str] = None
+    params: Optional[Dict[str, Any]] = None
+    layout: Optional[bool] = False
+    summarize: Optional[bool] = True
+    score: Optional[Literal["degree", "pagerank", "none"]] = None
 
 
 class GraphPayload(BaseModel):
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List
+
+from fastapi.responses import Response
+
+from .compression import response_format
+from .metrics import stage
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时退回标准库 json
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgpack
+except ImportError:  # 未安装 msgpack 时始终输出 JSON
+    msgpack = None  # type: ignore[assignment]
+
+
+def _default(value: Any) -> Any:
+    # Neo4j 的时间/空间类型等无法直接序列化的值统一转为字符串
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def dumps(obj: Any) -> bytes:
+    """序列化为 UTF-8 JSON 字节，中文保持原样输出（不转义为 \\uXXXX）。"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def packb(obj: Any) -> bytes:
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def serialized_response(body: bytes) -> Response:
+    """直接返回已按当前协商格式序列化好的字节（共享缓存命中时使用）。"""
+    media_type = "application/msgpack" if msgpack is not None and response_format() == "msgpack" else "application/json"
+    return Response(body, media_type=media_type)
+
+
+class FastJSONResponse(Response):
+    """直接序列化普通 dict/list 的 JSON 响应，跳过 Pydantic 的逐项校验。
+
+    客户端通过 Accept 协商 MessagePack（见 compression.CompressionMiddleware）时改为输出 msgpack。
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        with stage("serialize"):
+            if msgpack is not None and response_format() == "msgpack":
+                self.media_type = "application/msgpack"
+                return packb(content)
+            return dumps(content)
+
+
+def graph_payload(nodes: List[Dict[str, Any]], links: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # 与 schemas.GraphPayload 字段一致；categories 同时放在根层与 meta 中
+    categories = sorted({n.get("category", "Node") for n in nodes})
+    categories_payload = [{"name": c} for c in categories]
+    return {
+        "nodes": nodes,
+        "links": links,
+        "categories": categories_payload,
+        "meta": {"nodeCount": len(nodes), "linkCount": len(links), "categories": categories_payload},
+    }
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import settings
+from .metrics import PREFIX, REGISTRY, Counter
+
+
+lookups_total = Counter(f"{PREFIX}_shared_cache_lookups_total", "Shared cache lookups by namespace and result.",
+                        ("namespace", "result"))
+REGISTRY.append(lookups_total)
+
+
+def cache_key(namespace: str, *parts: Any) -> str:
+    """命名空间 + 请求内容摘要；参数字典按键排序，顺序不同的同一请求命中同一条目。"""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return f"{namespace}:{hashlib.sha1(blob.encode('utf-8')).hexdigest()}"
+
+
+class SharedCache:
+    """同一主机上各 worker 进程共享的缓存（SQLite，WAL 模式），值为已经序列化好的字节。
+
+    每个条目带版本戳（结果用数据版本戳，翻译用模型与提示词版本），读取时版本不符即视为未命中；
+    写入时顺带删除同一命名空间的旧版本条目，总大小超过上限时按最近访问时间淘汰。
+    访问时间最多每 touch_interval 秒更新一次，命中通常只是一次 SELECT。
+    """
+
+    def __init__(self, path: str, max_bytes: int, touch_interval: float = 60.0) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._versions: Dict[str, str] = {}
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 连接不跨线程共享，线程池中每个线程各持有一个
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, version TEXT NOT NULL, "
+                "value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, version: str) -> Optional[bytes]:
+        namespace = key.split(":", 1)[0]
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT value, accessed FROM entries WHERE key = ? AND version = ?",
+                               (key, version)).fetchone()
+            if row is not None and time.time() - row[1] > self.touch_interval:
+                conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error:
+            # 缓存故障不影响请求，按未命中处理
+            row = None
+        lookups_total.inc(namespace, "hit" if row is not None else "miss")
+        return bytes(row[0]) if row is not None else None
+
+    def put(self, key: str, version: str, value: bytes) -> None:
+        # 单条超过总上限的 1/4 时不缓存，避免一个大结果挤掉其余条目
+        if len(value) > self.max_bytes // 4:
+            return
+        namespace = key.split(":", 1)[0]
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, namespace, version, value, size, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, namespace, version, sqlite3.Binary(value), len(value), time.time()),
+            )
+            with self._lock:
+                self._puts += 1
+                version_changed = self._versions.get(namespace) != version
+                self._versions[namespace] = version
+                due = version_changed or self._puts % 32 == 0
+            if version_changed:
+                conn.execute("DELETE FROM entries WHERE namespace = ? AND version != ?", (namespace, version))
+            if due:
+                self.evict()
+        except sqlite3.Error:
+            pass
+
+    def evict(self) -> int:
+        """总大小超过上限时从最久未访问的条目开始删除，返回删除条数。"""
+        conn = self._conn()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        excess = total - self.max_bytes
+        doomed: List[str] = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            doomed.append(key)
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in doomed])
+        return len(doomed)
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM entries")
+
+
+_shared: Optional[SharedCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache() -> Optional[SharedCache]:
+    """进程内单例；SHARED_CACHE_ENABLED=false 时返回 None。"""
+    global _shared
+    if not settings.SHARED_CACHE_ENABLED:
+        return None
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                path = settings.SHARED_CACHE_PATH or str(Path(settings.IMPORT_STATE_DIR) / "shared_cache.sqlite3")
+                _shared = SharedCache(path, settings.SHARED_CACHE_MAX_MB * 1024 * 1024)
+    return _shared
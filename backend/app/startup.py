@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .graph_expand import build_expand_query
+from .metrics import PREFIX, REGISTRY, Gauge
+
+
+logger = logging.getLogger("uvicorn.error")
+
+WARMUP_FILE = Path(__file__).parent / "warmup_queries.json"
+
+
+def _process_started() -> float:
+    # 进程启动时刻（含解释器与依赖导入）；Linux 以外的平台退回本模块导入时刻
+    try:
+        fields = Path("/proc/self/stat").read_text().rsplit(")", 1)[1].split()
+        uptime = float(Path("/proc/uptime").read_text().split()[0])
+        return time.time() - uptime + int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.time()
+
+
+PROCESS_STARTED = _process_started()
+
+# 启动报告：各阶段耗时、就绪与首个响应距进程启动的时间、就绪时的常驻内存（一个空闲 worker 的成本）
+report: Dict[str, Any] = {"phases": {}, "readyMs": None, "firstByteMs": None, "rssMb": None, "warmup": None}
+
+
+def _since_start_ms() -> float:
+    return round((time.time() - PROCESS_STARTED) * 1000, 1)
+
+
+def rss_mb() -> Optional[float]:
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1048576, 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        report["phases"][name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def load_warmup_queries(path: Optional[str] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """读取预热查询（JSON 列表，元素为 CQL 字符串或 {"cql", "params"}），并附加 /graph/expand 的查询模板。"""
+    file = Path(path or settings.WARMUP_QUERIES_FILE or WARMUP_FILE)
+    queries: List[Tuple[str, Dict[str, Any]]] = []
+    for item in json.loads(file.read_text(encoding="utf-8")):
+        if isinstance(item, str):
+            queries.append((item, {}))
+        else:
+            queries.append((item["cql"], item.get("params") or {}))
+    # 锚点不存在时返回空结果，只为让两种锚点写法的执行计划进入计划缓存
+    queries.append(build_expand_query("i:0"))
+    queries.append(build_expand_query("4:00000000-0000-0000-0000-000000000000:0"))
+    return queries
+
+
+def run_warmup(run_read: Callable[[str, Dict[str, Any]], Any], queries: List[Tuple[str, Dict[str, Any]]],
+               budget_ms: int) -> Dict[str, Any]:
+    """依次执行预热查询，使页缓存与计划缓存变热；单条失败只记录，超出总预算后跳过剩余查询。"""
+    started = time.perf_counter()
+    done = failed = 0
+    for cql, params in queries:
+        if (time.perf_counter() - started) * 1000 > budget_ms:
+            break
+        try:
+            run_read(cql, params)
+            done += 1
+        except Exception as e:  # noqa: BLE001
+            failed += 1
+            logger.warning("预热查询失败：%s (%s)", e, cql.splitlines()[0])
+    return {
+        "queries": done,
+        "failed": failed,
+        "skipped": len(queries) - done - failed,
+        "elapsedMs": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def mark_ready() -> None:
+    report["readyMs"] = _since_start_ms()
+    report["rssMb"] = rss_mb()
+    logger.info("启动完成：%s", json.dumps(report, ensure_ascii=False))
+
+
+class FirstByteMiddleware:
+    """记录进程启动到第一个 HTTP 响应开始发送的时间（部署后的首字节时间），之后直接透传。"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or report["firstByteMs"] is not None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and report["firstByteMs"] is None:
+                report["firstByteMs"] = _since_start_ms()
+                logger.info("首个响应：进程启动后 %.1f ms（%s）", report["firstByteMs"], scope["path"])
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _startup_seconds() -> Dict[Tuple[str, ...], float]:
+    values = {(f"phase:{name}",): ms / 1000 for name, ms in report["phases"].items()}
+    for key in ("readyMs", "firstByteMs"):
+        if report[key] is not None:
+            values[(key[:-2],)] = report[key] / 1000
+    return values
+
+
+def _resident_memory() -> Dict[Tuple[str, ...], float]:
+    current = rss_mb()
+    return {(): current * 1048576} if current is not None else {}
+
+
+REGISTRY.extend([
+    Gauge(f"{PREFIX}_startup_seconds", "Startup phase durations, and process start to ready / first response.",
+          ("stage",), _startup_seconds),
+    Gauge(f"{PREFIX}_resident_memory_bytes", "Resident memory of this worker.", (), _resident_memory),
+])
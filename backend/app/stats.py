@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import settings
+from .data_version import current_data_version
+
+
+# run_query(cql) -> 记录列表（字典）；由调用方决定使用哪个驱动 / 会话
+QueryRunner = Callable[[str], List[Dict[str, Any]]]
+
+_cache: Dict[str, Any] = {"version": None, "at": 0.0, "snapshot": None}
+_lock = threading.Lock()
+
+
+def _count(run_query: QueryRunner, cql: str) -> int:
+    rows = run_query(cql)
+    return int(rows[0]["c"]) if rows and rows[0].get("c") is not None else 0
+
+
+def _quote(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+
+def degree_buckets(rows: List[Dict[str, Any]]) -> List[Dict[str, int]]:
+    """把 (degree, count) 行归并为 2 的幂区间：[0,0]、[1,1]、[2,3]、[4,7]…"""
+    buckets: Dict[int, int] = {}
+    for row in rows:
+        d = int(row["degree"])
+        key = -1 if d == 0 else d.bit_length() - 1
+        buckets[key] = buckets.get(key, 0) + int(row["c"])
+    out = []
+    for key in sorted(buckets):
+        lo, hi = (0, 0) if key < 0 else (1 << key, (1 << (key + 1)) - 1)
+        out.append({"min": lo, "max": hi, "count": buckets[key]})
+    return out
+
+
+def collect_stats(run_query: QueryRunner, labels: List[str], rel_types: List[str],
+                  workers: Optional[int] = None, degrees: bool = True) -> Dict[str, Any]:
+    """收集数据集规模快照；workers > 1 时并发执行，为 1 时在调用线程中顺序执行。
+
+    总数、单标签计数与关系类型计数都是计数存储可直接回答的形式（无 WHERE、单标签/单类型）；
+    标签组合与度分布需要扫描节点。degrees=False 时跳过度分布（全局与逐标签的全量扫描），快照中不含 degree。
+    """
+    started = time.perf_counter()
+    jobs: Dict[str, Callable[[], Any]] = {
+        "nodes": lambda: _count(run_query, "MATCH (n) RETURN count(n) AS c"),
+        "relationships": lambda: _count(run_query, "MATCH ()-[r]->() RETURN count(r) AS c"),
+        "combinations": lambda: run_query(
+            "MATCH (n) WITH labels(n) AS labels RETURN labels, count(*) AS c ORDER BY c DESC"
+        ),
+    }
+    if degrees:
+        jobs["degree"] = lambda: run_query(
+            "MATCH (n) WITH COUNT { (n)--() } AS degree RETURN degree, count(*) AS c"
+        )
+    for label in labels:
+        q = _quote(label)
+        jobs[f"label:{label}"] = lambda q=q: _count(run_query, f"MATCH (n:{q}) RETURN count(n) AS c")
+        if degrees:
+            jobs[f"degree:{label}"] = lambda q=q: run_query(
+                f"MATCH (n:{q}) WITH COUNT {{ (n)--() }} AS d "
+                "RETURN avg(d) AS avg, max(d) AS max, percentileDisc(d, 0.5) AS p50, percentileDisc(d, 0.95) AS p95"
+            )
+    for rel_type in rel_types:
+        q = _quote(rel_type)
+        jobs[f"type:{rel_type}"] = lambda q=q: _count(run_query, f"MATCH ()-[r:{q}]->() RETURN count(r) AS c")
+
+    workers = workers or settings.STATS_WORKERS
+    if workers <= 1:
+        results = {key: job() for key, job in jobs.items()}
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {key: pool.submit(job) for key, job in jobs.items()}
+            results = {key: f.result() for key, f in futures.items()}
+
+    snapshot: Dict[str, Any] = {
+        "totals": {"nodes": results["nodes"], "relationships": results["relationships"]},
+        "labels": {label: results[f"label:{label}"] for label in labels},
+        "labelCombinations": [
+            {"labels": sorted(row["labels"]), "count": int(row["c"])} for row in results["combinations"]
+        ],
+        "relationshipTypes": {t: results[f"type:{t}"] for t in rel_types},
+    }
+    if degrees:
+        by_label = {}
+        for label in labels:
+            row = (results[f"degree:{label}"] or [{}])[0]
+            by_label[label] = {
+                "avg": round(float(row.get("avg") or 0.0), 3),
+                "max": int(row.get("max") or 0),
+                "p50": int(row.get("p50") or 0),
+                "p95": int(row.get("p95") or 0),
+            }
+        snapshot["degree"] = {"histogram": degree_buckets(results["degree"]), "byLabel": by_label}
+    snapshot["elapsedMs"] = round((time.perf_counter() - started) * 1000, 1)
+    return snapshot
+
+
+def get_stats(run_query: QueryRunner, schema: Callable[[], Dict[str, List[str]]], refresh: bool = False,
+              workers: Optional[int] = None) -> Dict[str, Any]:
+    """返回缓存的统计快照；数据版本戳变化（导入完成）时重新收集。没有导入戳（外部写入数据）时
+    无从得知数据是否变化，另按 STATS_CACHE_TTL_S 过期。"""
+    version = current_data_version()
+    with _lock:
+        snap = _cache["snapshot"]
+        ttl = settings.STATS_CACHE_TTL_S
+        fresh = (
+            snap is not None
+            and _cache["version"] == version
+            and (version or ttl <= 0 or time.monotonic() - _cache["at"] < ttl)
+        )
+        if fresh and not refresh:
+            return snap
+        hint = schema()
+        snap = collect_stats(run_query, hint.get("labels", []), hint.get("relTypes", []), workers)
+        snap["dataVersion"] = version
+        snap["collectedAt"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        _cache.update(version=version, at=time.monotonic(), snapshot=snap)
+        return snap
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .config import settings
+
+
+AGGREGATE_PREFIX = "agg:"
+_SEP = "|"
+
+
+def aggregate_id(anchor: str, rel_type: str, direction: str, category: str) -> str:
+    return AGGREGATE_PREFIX + _SEP.join([anchor, rel_type, direction, category])
+
+
+def parse_aggregate_id(value: str) -> Optional[Dict[str, str]]:
+    """解析聚合节点 id；anchor 为空表示无锚点的孤立节点聚合。非聚合 id 返回 None。"""
+    if not value.startswith(AGGREGATE_PREFIX):
+        return None
+    parts = value[len(AGGREGATE_PREFIX):].rsplit(_SEP, 3)
+    if len(parts) != 4:
+        return None
+    anchor, rel_type, direction, category = parts
+    return {"anchor": anchor, "relType": rel_type, "direction": direction, "category": category}
+
+
+def _shortest_path(adj: Dict[str, List[Tuple[str, int, str]]], src: str, targets: Set[str]) -> Dict[str, Tuple[str, int]]:
+    # BFS 父指针：node -> (parent, link_index)
+    parent: Dict[str, Tuple[str, int]] = {src: (src, -1)}
+    queue = deque([src])
+    remaining = set(targets) - {src}
+    while queue and remaining:
+        cur = queue.popleft()
+        for nxt, li, _ in adj[cur]:
+            if nxt not in parent:
+                parent[nxt] = (cur, li)
+                remaining.discard(nxt)
+                queue.append(nxt)
+    return parent
+
+
+def summarize_graph(
+    nodes: List[Dict[str, Any]],
+    links: List[Dict[str, Any]],
+    max_nodes: int | None = None,
+    max_links: int | None = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """超出节点/边预算时折叠高度数邻域。
+
+    保留锚点（度数最高的枢纽节点）及锚点之间的最短路径；锚点的邻居按
+    (锚点, 关系类型, 方向, 邻居标签) 分组，成员数达到 SUMMARY_GROUP_MIN 的组折叠为一个
+    带 count 的聚合节点，更远的节点随其一跳祖先并入同一组。聚合节点 id 可交给
+    /graph/expand 展开。未超预算时原样返回，第三个返回值为 None。
+    """
+    max_nodes = max_nodes or settings.SUMMARY_MAX_NODES
+    max_links = max_links or settings.SUMMARY_MAX_LINKS
+    if len(nodes) <= max_nodes and len(links) <= max_links:
+        return nodes, links, None
+
+    by_id = {str(n["id"]): n for n in nodes}
+    adj: Dict[str, List[Tuple[str, int, str]]] = defaultdict(list)
+    for li, link in enumerate(links):
+        src, tgt = str(link["source"]), str(link["target"])
+        if src not in by_id or tgt not in by_id:
+            continue
+        adj[src].append((tgt, li, "out"))
+        adj[tgt].append((src, li, "in"))
+
+    group_min = settings.SUMMARY_GROUP_MIN
+    ranked = sorted(by_id, key=lambda nid: len(adj[nid]), reverse=True)
+    anchors = [nid for nid in ranked if len(adj[nid]) >= group_min][: settings.SUMMARY_MAX_ANCHORS]
+    if not anchors and ranked and adj[ranked[0]]:
+        anchors = [ranked[0]]
+    anchor_set = set(anchors)
+
+    # 锚点与锚点之间的最短连接路径
+    keep: Set[str] = set(anchors)
+    keep_links: Set[int] = set()
+    for i, a in enumerate(anchors):
+        others = set(anchors[i + 1:])
+        if not others:
+            break
+        parent = _shortest_path(adj, a, others)
+        for b in others:
+            if b not in parent:
+                continue
+            cur = b
+            while cur != a:
+                prev, li = parent[cur]
+                keep.add(cur)
+                keep_links.add(li)
+                cur = prev
+
+    # 从保留节点出发做多源 BFS，为其余节点分配所属分组
+    owner: Dict[str, Tuple[str, str, str, str]] = {}
+    first_hop: Dict[Tuple[str, str, str, str], List[str]] = defaultdict(list)
+    members: Dict[Tuple[str, str, str, str], List[str]] = defaultdict(list)
+    queue = deque()
+    for k in anchors + [k for k in keep if k not in anchor_set]:
+        for nxt, li, direction in adj[k]:
+            if nxt in keep or nxt in owner:
+                continue
+            key = (k, links[li].get("label") or links[li].get("category") or "", direction,
+                   str(by_id[nxt].get("category", "Node")))
+            owner[nxt] = key
+            first_hop[key].append(nxt)
+            members[key].append(nxt)
+            queue.append(nxt)
+    while queue:
+        cur = queue.popleft()
+        for nxt, _, _ in adj[cur]:
+            if nxt in keep or nxt in owner:
+                continue
+            owner[nxt] = owner[cur]
+            members[owner[cur]].append(nxt)
+            queue.append(nxt)
+
+    # 小分组在预算内按原样展开，其余折叠；每个尚未处理的分组至少预留一个聚合节点的位置
+    collapsed: Set[Tuple[str, str, str, str]] = set()
+    budget = max_nodes - len(keep)
+    ordered = sorted(members, key=lambda k: len(members[k]))
+    for i, key in enumerate(ordered):
+        pending = len(ordered) - i - 1
+        if len(first_hop[key]) < group_min and len(members[key]) + pending <= budget:
+            keep.update(members[key])
+            budget -= len(members[key])
+        else:
+            collapsed.add(key)
+            budget -= 1
+
+    # 与锚点不连通的节点：预算内保留，超出部分按标签聚合（无锚点）
+    orphans: Dict[str, List[str]] = defaultdict(list)
+    unreached = [nid for nid in by_id if nid not in keep and nid not in owner]
+    if len(unreached) > budget:
+        # 为每个标签的聚合节点预留位置
+        budget -= len({by_id[nid].get("category", "Node") for nid in unreached})
+    for nid in unreached:
+        if budget > 0:
+            keep.add(nid)
+            budget -= 1
+        else:
+            orphans[str(by_id[nid].get("category", "Node"))].append(nid)
+
+    out_nodes = [n for n in nodes if str(n["id"]) in keep]
+    # 锚点间路径上的边总是保留（摘要正是为了保住这些连接），其余保留节点之间的边在剩余预算内按原顺序补足；
+    # 每个折叠分组还要一条连回锚点的边
+    out_links = [links[li] for li in sorted(keep_links)]
+    budget_links = max(0, max_links - len(collapsed) - len(out_links))
+    out_links += [l for li, l in enumerate(links)
+                  if li not in keep_links and str(l["source"]) in keep and str(l["target"]) in keep][:budget_links]
+
+    aggregates = 0
+    for key in sorted(collapsed):
+        anchor, rel_type, direction, category = key
+        agg = aggregate_id(anchor, rel_type, direction, category)
+        count = len(first_hop[key])
+        out_nodes.append({
+            "id": agg,
+            "name": f"{category} ×{count}",
+            "category": category,
+            "symbolSize": 30 + min(30, count // 10),
+            "value": {
+                "aggregate": True,
+                "anchor": anchor,
+                "relType": rel_type,
+                "direction": direction,
+                "label": category,
+                "count": count,
+                "memberCount": len(members[key]),
+            },
+        })
+        src, tgt = (anchor, agg) if direction == "out" else (agg, anchor)
+        out_links.append({
+            "source": src,
+            "target": tgt,
+            "category": rel_type,
+            "label": rel_type,
+            "value": {"aggregate": True, "count": count},
+        })
+        aggregates += 1
+    for category, ids in sorted(orphans.items()):
+        out_nodes.append({
+            "id": aggregate_id("", "", "", category),
+            "name": f"{category} ×{len(ids)}",
+            "category": category,
+            "symbolSize": 30,
+            "value": {"aggregate": True, "anchor": None, "label": category, "count": len(ids), "memberCount": len(ids)},
+        })
+        aggregates += 1
+
+    summary = {
+        "originalNodeCount": len(nodes),
+        "originalLinkCount": len(links),
+        "anchors": anchors,
+        "aggregates": aggregates,
+    }
+    return out_nodes, out_links, summary
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+每个请求都会经过的热点函数基准：records_to_graph、build_table、normalize_records、is_readonly_cql，
+以及每次按键都会调用的输入联想 EntityIndex.suggest。
+
+每个用例取 --repeat 次中的最短耗时，另用 tracemalloc 单独执行一次取峰值内存，与 benchmarks/baseline.json 比较；
+耗时超出基线 --time-threshold 或峰值内存超出 --memory-threshold（均为相对比例）时以返回码 1 退出。
+耗时按同一进程中校准负载（纯 Python 的字典 / 字符串操作）的耗时比例折算，抵消机器整体快慢与 CPU 限频；
+跨机器的差异仍可能较大，必要时先在改动前的代码上 --update，或以 --skip-time 只比较内存。
+
+用法：
+  python3 benchmarks/bench_hotpaths.py                     # 与基线比较
+  python3 benchmarks/bench_hotpaths.py --update            # 重写基线
+  python3 benchmarks/bench_hotpaths.py --only records_to_graph --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# generators 负责把 backend/ 与 scripts/loadtest/ 加入 sys.path，须最先导入
+from generators import long_cql, path_records, wide_table
+
+from app.cql_validator import is_readonly_cql
+from app.echarts_converter import build_table, normalize_records, records_to_graph
+from app.entity_index import LOAD_QUERY, EntityIndex
+from fake_neo4j import MiniGraDB
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+CALIBRATION = "_calibration"
+
+
+def _calibration() -> None:
+    # 与被测函数相近的操作组合：构造小字典、格式化字符串、集合去重
+    seen = set()
+    rows = []
+    for i in range(100_000):
+        key = f"i:{i % 50_000}"
+        if key in seen:
+            continue
+        seen.add(key)
+        rows.append({"id": key, "name": str(i), "value": {"ID": i}})
+
+
+def build_cases(scale: float = 1.0) -> Dict[str, Callable[[], Any]]:
+    """用例名 → 无参可调用对象；输入在此处一次生成，不计入耗时。"""
+    db = MiniGraDB(items=max(50, int(5000 * scale)), seed=0)
+    paths_data = path_records(db, int(5000 * scale), hops=3, as_data=True)
+    paths_objects = path_records(db, int(5000 * scale), hops=3, as_data=False)
+    table = wide_table(db, int(2000 * scale), 20)
+    cql = long_cql(max(4, int(200 * scale)))
+    index = EntityIndex(db.answer(LOAD_QUERY, {})[0])
+    # 单次联想只有几十微秒，按一组逐字输入的前缀计时：名称的前 1~3 个字与常见的单字
+    prefixes = sorted({name[:n] for name in index.names[:200] for n in (1, 2, 3)}) + ["的", "木", "铁"]
+    return {
+        CALIBRATION: _calibration,
+        "records_to_graph.paths_data": lambda: records_to_graph(paths_data),
+        "records_to_graph.paths_objects": lambda: records_to_graph(paths_objects),
+        "build_table.wide": lambda: build_table(table["records"], table["keys"]),
+        "normalize_records.paths_objects": lambda: normalize_records(paths_objects),
+        "normalize_records.wide": lambda: normalize_records(table["records"]),
+        "is_readonly_cql.long": lambda: is_readonly_cql(cql),
+        "entity_index.suggest": lambda: [index.suggest(p, 10) for p in prefixes],
+    }
+
+
+def measure(cases: Dict[str, Callable[[], Any]], repeat: int) -> Dict[str, Dict[str, float]]:
+    """各用例轮流执行 repeat 轮、取最短耗时：机器短时变慢时影响的是某一轮，而不是某一个用例的全部样本。"""
+    timings: Dict[str, List[float]] = {name: [] for name in cases}
+    for fn in cases.values():
+        fn()  # 预热：首次调用的正则编译等一次性开销不计入
+    # 与 timeit 相同，计时期间关闭循环垃圾回收：否则耗时取决于此前用例留下的堆大小
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for name, fn in cases.items():
+                t0 = time.perf_counter()
+                fn()
+                timings[name].append(time.perf_counter() - t0)
+    finally:
+        gc.enable()
+    results = {}
+    for name, fn in cases.items():
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        results[name] = {"timeMs": round(min(timings[name]) * 1000, 3), "peakKb": round(peak / 1024, 1)}
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            time_threshold: float, memory_threshold: float, skip_time: bool = False) -> List[Tuple[str, str, float]]:
+    """返回超出阈值的 (用例, 指标, 相对变化)；基线中没有的用例不参与比较，耗时先按校准负载折算。"""
+    speed = 1.0
+    if CALIBRATION in results and baseline.get(CALIBRATION, {}).get("timeMs"):
+        speed = results[CALIBRATION]["timeMs"] / baseline[CALIBRATION]["timeMs"]
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or name == CALIBRATION:
+            continue
+        checks = [("peakKb", memory_threshold)] if skip_time else [("timeMs", time_threshold), ("peakKb", memory_threshold)]
+        for metric, threshold in checks:
+            if base[metric] > 0:
+                expected = base[metric] * speed if metric == "timeMs" else base[metric]
+                change = current[metric] / expected - 1
+                if change > threshold:
+                    regressions.append((name, metric, change))
+    return regressions
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--scale", type=float, default=1.0, help="输入规模系数；改变后与基线不可比")
+    ap.add_argument("--only", default="", help="只运行名称包含该子串的用例")
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--update", action="store_true", help="把本次结果写为基线")
+    ap.add_argument("--time-threshold", type=float, default=0.25)
+    ap.add_argument("--memory-threshold", type=float, default=0.10)
+    ap.add_argument("--skip-time", action="store_true", help="只比较峰值内存（耗时基线来自其他机器时）")
+    args = ap.parse_args()
+
+    cases = {name: fn for name, fn in build_cases(args.scale).items()
+             if args.only in name or name == CALIBRATION}
+    baseline_path = Path(args.baseline)
+    stored = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+    if stored and stored.get("scale", 1.0) != args.scale and not args.update:
+        print(f"基线规模为 {stored.get('scale')}，与 --scale {args.scale} 不可比", file=sys.stderr)
+        sys.exit(2)
+    baseline = stored.get("cases", {})
+
+    results = measure(cases, args.repeat)
+    print(f"{'case':<34}{'time ms':>10}{'base':>10}{'peak KB':>12}{'base':>12}")
+    for name in cases:
+        base = baseline.get(name, {})
+        print(f"{name:<34}{results[name]['timeMs']:>10}{base.get('timeMs', '-'):>10}"
+              f"{results[name]['peakKb']:>12}{base.get('peakKb', '-'):>12}")
+
+    if args.update:
+        merged = dict(baseline)
+        merged.update(results)
+        baseline_path.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "scale": args.scale,
+            "repeat": args.repeat,
+            "cases": dict(sorted(merged.items())),
+        }, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"基线已写入 {baseline_path}")
+        return
+
+    regressions = compare(results, baseline, args.time_threshold, args.memory_threshold, args.skip_time)
+    for name, metric, change in regressions:
+        print(f"回退：{name} {metric} +{change:.0%}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+基准用的合成输入：大路径结果、宽表、长 CQL。
+
+路径结果复用 scripts/loadtest/fake_neo4j.py 的 MiniGraDB 合成图，提供两种形态：
+驱动对象（Node / Relationship / Path，流式与测试路径）与 Record.data() 展开后的字典 / 列表（run_read 的实际返回）。
+"""
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(_ROOT / "backend"))
+sys.path.insert(0, str(_ROOT / "scripts" / "loadtest"))
+
+from neo4j import Record  # noqa: E402
+from neo4j.graph import Path as GraphPath  # noqa: E402
+
+from fake_neo4j import BASE_NAMES, MiniGraDB  # noqa: E402
+
+
+def path_records(db: MiniGraDB, n_paths: int, hops: int = 3, as_data: bool = True, seed: int = 0) -> List[Dict[str, Any]]:
+    """n_paths 条随机游走路径，每条最多 hops 跳；形如 `MATCH path = ... RETURN path` 的结果。"""
+    rnd = random.Random(seed)
+    records = []
+    for _ in range(n_paths):
+        start = node = rnd.choice(db.nodes)
+        rels = []
+        for _ in range(hops):
+            edges = db.adjacency[node.element_id]
+            if not edges:
+                break
+            rel, node = rnd.choice(edges)
+            rels.append(rel)
+        rec = {"path": GraphPath(start, *rels)}
+        records.append(Record(rec).data() if as_data else rec)
+    return records
+
+
+def wide_table(db: MiniGraDB, rows: int, cols: int, seed: int = 0) -> Dict[str, Any]:
+    """rows 行 cols 列的混合结果：标量、节点、关系、属性字典与列表轮流出现，覆盖 build_table 的各个分支。"""
+    rnd = random.Random(seed)
+    keys = [f"c{i}" for i in range(cols)]
+    rels = [rel for edges in db.adjacency.values() for rel, _ in edges[:1]]
+    records = []
+    for _ in range(rows):
+        rec: Dict[str, Any] = {}
+        for i, key in enumerate(keys):
+            kind = i % 5
+            if kind == 0:
+                rec[key] = rnd.randint(0, 10_000)
+            elif kind == 1:
+                rec[key] = rnd.choice(BASE_NAMES) * rnd.randint(1, 4)
+            elif kind == 2:
+                rec[key] = rnd.choice(db.nodes)
+            elif kind == 3:
+                rec[key] = rnd.choice(rels)
+            else:
+                rec[key] = [dict(rnd.choice(db.nodes)) for _ in range(3)]
+        records.append(rec)
+    return {"records": records, "keys": keys}
+
+
+def long_cql(clauses: int, seed: int = 0) -> str:
+    """LLM 生成风格的长只读 CQL：多段 OPTIONAL MATCH / WITH，字符串字面量中夹杂关键字形状的文本。"""
+    rnd = random.Random(seed)
+    rel_types = ["CONSUMES", "PRODUCES", "DROPS", "IN_GROUP", "TOOL_MINE_DROPS", "HAND_MINE_DROPS"]
+    parts = ["MATCH (n0:item) WHERE n0.Name CONTAINS $name"]
+    carried = ["n0"]
+    for i in range(1, clauses + 1):
+        rel = rnd.choice(rel_types)
+        literal = rnd.choice(BASE_NAMES) + rnd.choice(["", " created", " settings", " merged", " removed"])
+        parts.append(f"OPTIONAL MATCH (n{i - 1})-[r{i}:{rel}]-(n{i}) WHERE n{i}.Name <> '{literal}' AND r{i}.Count >= {i % 7}")
+        carried.append(f"n{i}")
+        if i % 4 == 0:
+            parts.append(f"WITH {', '.join(carried)}")
+    parts.append(f"RETURN {', '.join(carried)} ORDER BY n0.ID LIMIT 100")
+    return "\n".join(parts)
@@ -2,17 +2,41 @@
 """
 MiniGraDB 数据导入脚本
 将 CSV 导出文件导入到 Neo4j
+
+导入内容由映射规格（IMPORT_SPEC，或 --spec 指定的 YAML/JSON 文件）描述：每个节点文件的列、类型与标签，
+每个关系文件的类型、端点与属性。连接参数与后端共用 backend/app/config.py 的 Settings（.env）。
+
+用法：
+  python3 import_minigradb.py [--export-dir DIR] [--spec spec.yaml] [--mode full|delta] [--resume]
+  python3 import_minigradb.py [--export-dir DIR] --bulk-export OUT_DIR
+
+--mode delta 时对比上次导入的清单（IMPORT_STATE_DIR/manifest.json），只对新增、变化和删除的行执行
+批量 MERGE / DELETE；无清单时退回全量导入。只有数据实际变化时才更新数据版本戳，后端缓存不会无故失效。
+
+全量导入在每个批次提交后写检查点（IMPORT_STATE_DIR/checkpoint.json），中断后用 --resume 从断点继续；
+进度行给出吞吐、批次延迟 p50/p95 与 ETA，结束时写出按文件计时的 import_report.json。
+
+--bulk-export 用于首次装载与灾难恢复：把导出转换为 neo4j-admin database import 的表头/数据文件
+（按 ID 空间合并多标签行，预先剔除悬空端点），并在 OUT_DIR/bulk_report.json 中记录计数与导入命令。
 """
+import argparse
 import csv
+import hashlib
+import itertools
+import json
+import os
 import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 from neo4j import GraphDatabase
 
-# 配置
-URI = "bolt://localhost:7687"
-AUTH = ("neo4j", "miniworld")
-EXPORT_DIR = Path("/home/owalabuy/awa/MiniGraDB/MiniGraDB/neo4j_export_20250917_143741")
-BATCH_SIZE = 500
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from backend.app.config import settings  # noqa: E402
+from backend.app.data_version import bump_data_version  # noqa: E402
 
 
 def safe_int(value):
@@ -25,387 +49,1038 @@ def safe_int(value):
         return None
 
 
-def clear_database(driver):
-    """清空数据库"""
-    with driver.session() as session:
-        print("清空数据库...")
-        session.run("MATCH (n) DETACH DELETE n")
-        print("数据库已清空")
+def safe_float(value):
+    if not value:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
 
 
-def import_nodes_items(driver):
-    """导入物品节点"""
-    csv_file = EXPORT_DIR / "nodes_items.csv"
-    if not csv_file.exists():
-        print(f"跳过: {csv_file} 不存在")
-        return
-    
-    with driver.session() as session, open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        batch = []
-        count = 0
-        
-        for row in reader:
-            # 处理空值 - EggItemID 可能是浮点数格式如 '13011.0'
-            egg_item_id = None
-            if row['EggItemID']:
-                try:
-                    egg_item_id = int(float(row['EggItemID']))
-                except (ValueError, TypeError):
-                    egg_item_id = None
-            
-            batch.append({
-                'id': int(row['ID']),
-                'name': row['Name'],
-                'type': float(row['Type']) if row['Type'] else None,
-                'disc': row['Disc'] if row['Disc'] else None,
-                'getway': row['GetWay'] if row['GetWay'] else None,
-                'egg_item_id': egg_item_id
-            })
-            
-            if len(batch) >= BATCH_SIZE:
-                session.run("""
-                    UNWIND $batch AS row
-                    CREATE (n:item {
-                        ID: row.id,
-                        Name: row.name,
-                        Type: row.type,
-                        Disc: row.disc,
-                        GetWay: row.getway,
-                        EggItemID: row.egg_item_id
-                    })
-                """, batch=batch)
-                count += len(batch)
-                print(f"  已导入 {count} 个物品节点...")
-                batch = []
-        
-        if batch:
-            session.run("""
-                UNWIND $batch AS row
-                CREATE (n:item {
-                    ID: row.id,
-                    Name: row.name,
-                    Type: row.type,
-                    Disc: row.disc,
-                    GetWay: row.getway,
-                    EggItemID: row.egg_item_id
-                })
-            """, batch=batch)
-            count += len(batch)
-        
-        print(f"✓ 共导入 {count} 个物品节点")
-
-
-def import_nodes_blocks(driver):
-    """导入方块节点"""
-    csv_file = EXPORT_DIR / "nodes_blocks.csv"
-    if not csv_file.exists():
-        return
-    
-    with driver.session() as session, open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+def safe_str(value):
+    return value if value else None
+
+
+TYPE_CASTS = {"int": safe_int, "float": safe_float, "str": safe_str}
+
+
+# 映射规格：列名 -> 类型，或 {"from": CSV 列名, "type": 类型}。
+# 节点 labels 的第一个标签是 ID 所在的标签；多标签（如 item + block）的行按 ID 合并到同一个 :item 节点上，
+# 形成 :item:block / :item:monster。
+IMPORT_SPEC = {
+    "nodes": [
+        {
+            "file": "nodes_items.csv",
+            "labels": ["item"],
+            "columns": {"ID": "int", "Name": "str", "Type": "float", "Disc": "str", "GetWay": "str",
+                        # EggItemID 可能是浮点数格式如 '13011.0'
+                        "EggItemID": "int"},
+        },
+        {
+            "file": "nodes_blocks.csv",
+            "labels": ["item", "block"],
+            "columns": {"ID": "int", "MineTool": "float", "ToolLevel": "float"},
+        },
+        {
+            "file": "nodes_monsters.csv",
+            "labels": ["item", "monster"],
+            "columns": {"ID": "int", "Life": "float", "Attack": "float"},
+        },
+        {
+            "file": "nodes_groups.csv",
+            "labels": ["group"],
+            "columns": {"ID": {"from": "ItemGroup", "type": "int"}},  # 列名是 ItemGroup
+        },
+        {
+            "file": "nodes_recipes.csv",
+            "labels": ["recipe"],
+            "columns": {"ID": "int", "IsFollowMe": "int", "StationLabel": "str"},
+        },
+    ],
+    "relationships": [
+        {"file": "rel_in_group.csv", "type": "IN_GROUP",
+         "from": {"label": "item", "column": "itemId"}, "to": {"label": "group", "column": "groupId"}},
+        {"file": "rel_block_handminedrops.csv", "type": "HAND_MINE_DROPS",
+         "from": {"label": "block", "column": "blockId"}, "to": {"label": "item", "column": "itemId"},
+         "properties": {"Prob": "int", "CountMin": "int", "CountMax": "int"}},
+        {"file": "rel_block_toolminedrops.csv", "type": "TOOL_MINE_DROPS",
+         "from": {"label": "block", "column": "blockId"}, "to": {"label": "item", "column": "itemId"},
+         "properties": {"Prob": "int", "CountMin": "int", "CountMax": "int"}},
+        {"file": "rel_block_precisedrop.csv", "type": "PRECISE_DROP",
+         "from": {"label": "block", "column": "blockId"}, "to": {"label": "item", "column": "itemId"}},
+        {"file": "rel_monster_drops.csv", "type": "DROPS",
+         "from": {"label": "monster", "column": "monsterId"}, "to": {"label": "item", "column": "itemId"},
+         "properties": {"Prob": "int", "CountMin": "int", "CountMax": "int", "Conditions": "str", "Source": "str"}},
+        {"file": "rel_recipe_consumes.csv", "type": "CONSUMES",
+         "from": {"label": "recipe", "column": "recipeId"}, "to": {"label": "item", "column": "targetId"},
+         "properties": {"Count": {"from": "count", "type": "str"}, "ContainerID": {"from": "containerId", "type": "str"}}},
+        {"file": "rel_recipe_produces.csv", "type": "PRODUCES",
+         "from": {"label": "recipe", "column": "recipeId"}, "to": {"label": "item", "column": "targetId"},
+         "properties": {"Count": {"from": "count", "type": "str"}}},
+        # 旧版“单标签 + 桥接”方案：GDB 等不支持多标签时，用 PLACE/SUMMON 连接 item 与 block/monster 节点。
+        # 当前库采用多标签（:item:block / :item:monster 与道具合一），默认不导入。
+        {"file": "rel_item_place.csv", "type": "PLACE", "enabled": False,
+         "from": {"label": "item", "column": "itemId"}, "to": {"label": "block", "column": "blockId"}},
+        {"file": "rel_item_summon.csv", "type": "SUMMON", "enabled": False,
+         "from": {"label": "item", "column": "itemId"}, "to": {"label": "monster", "column": "monsterId"}},
+        {"file": "rel_item_fuel_for_device.csv", "type": "FUEL_FOR",
+         "from": {"label": "item", "column": "itemId"}, "to": {"label": "item", "column": "Device"},
+         "properties": {"Heat": "str", "ProvideHeat": "str", "Combustion": "str"}},
+    ],
+}
+
+
+def row_hash(row):
+    return hashlib.sha1(json.dumps(row, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def manifest_path():
+    return Path(settings.IMPORT_STATE_DIR) / "manifest.json"
+
+
+def load_manifest():
+    """清单格式：{"nodes": {文件: {ID: [行哈希, ID 值]}}, "relationships": {文件: {行哈希: [次数, 行]}}}"""
+    path = manifest_path()
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_manifest(manifest):
+    path = manifest_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def load_spec(path=None):
+    """读取 YAML/JSON 映射规格；未指定时使用内置 IMPORT_SPEC"""
+    if not path:
+        return IMPORT_SPEC
+    text = Path(path).read_text(encoding="utf-8")
+    if str(path).endswith((".yaml", ".yml")):
+        import yaml  # 仅在使用 YAML 规格时需要 PyYAML
+
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def _columns(mapping):
+    """规范化列定义为 [(属性名, CSV 列名, 转换函数)]"""
+    out = []
+    for prop, col in (mapping or {}).items():
+        if isinstance(col, str):
+            out.append((prop, prop, TYPE_CASTS[col]))
+        else:
+            out.append((prop, col.get("from", prop), TYPE_CASTS[col.get("type", "str")]))
+    return out
+
+
+def iter_rows(csv_file, columns):
+    """流式读取 CSV 并按列定义转换类型"""
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield {prop: cast(row.get(col)) for prop, col, cast in columns}
+
+
+class AdaptiveBatcher:
+    """根据实测提交耗时调整批大小，使单个事务接近目标时长"""
+
+    def __init__(self, initial=None, target_ms=None, min_size=None, max_size=None):
+        self.size = initial or settings.IMPORT_BATCH_SIZE
+        self.target = (target_ms or settings.IMPORT_TARGET_TX_MS) / 1000.0
+        self.min_size = min_size or settings.IMPORT_MIN_BATCH
+        self.max_size = max_size or settings.IMPORT_MAX_BATCH
+        self._lock = threading.Lock()
+
+    def record(self, rows, seconds):
+        if rows <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            # 每行耗时外推到目标时长，单次最多放大/缩小一倍，避免抖动
+            ideal = rows * self.target / seconds
+            ideal = max(self.size / 2.0, min(self.size * 2.0, ideal))
+            self.size = int(max(self.min_size, min(self.max_size, 0.5 * self.size + 0.5 * ideal)))
+
+    def batches(self, rows):
         batch = []
-        count = 0
-        
-        for row in reader:
-            batch.append({
-                'id': int(row['ID']),
-                'mine_tool': float(row['MineTool']) if row['MineTool'] else None,
-                'tool_level': float(row['ToolLevel']) if row['ToolLevel'] else None
-            })
-            
-            if len(batch) >= BATCH_SIZE:
-                session.run("""
-                    UNWIND $batch AS row
-                    CREATE (n:block {
-                        ID: row.id,
-                        MineTool: row.mine_tool,
-                        ToolLevel: row.tool_level
-                    })
-                """, batch=batch)
-                count += len(batch)
-                print(f"  已导入 {count} 个方块节点...")
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.size:
+                yield batch
                 batch = []
-        
         if batch:
-            session.run("""
-                UNWIND $batch AS row
-                CREATE (n:block {
-                    ID: row.id,
-                    MineTool: row.mine_tool,
-                    ToolLevel: row.tool_level
-                })
-            """, batch=batch)
-            count += len(batch)
-        
-        print(f"✓ 共导入 {count} 个方块节点")
-
-
-def import_nodes_monsters(driver):
-    """导入生物节点"""
-    csv_file = EXPORT_DIR / "nodes_monsters.csv"
+            yield batch
+
+
+def _write_batch(driver, query, batch, batcher, on_commit=None, counter=None):
+    """在独立会话中以托管事务写入一个批次；死锁等瞬时错误由驱动自动重试。提交后回调 on_commit(行数, 秒)。
+
+    指定 counter（如 "relationships_created"）时返回结果摘要中的对应计数，否则返回批次行数。
+    """
+    started = time.perf_counter()
+    with driver.session(database=settings.NEO4J_DATABASE) as session:
+        summary = session.execute_write(lambda tx: tx.run(query, batch=batch).consume())
+    elapsed = time.perf_counter() - started
+    batcher.record(len(batch), elapsed)
+    if on_commit is not None:
+        on_commit(len(batch), elapsed)
+    return getattr(summary.counters, counter) if counter else len(batch)
+
+
+def node_query(spec):
+    key_label, *extra = spec["labels"]
+    extra_labels = "".join(f":{label}" for label in extra)
+    set_labels = f", n{extra_labels}" if extra_labels else ""
+    return f"""
+        UNWIND $batch AS row
+        MERGE (n:{key_label} {{ID: row.ID}})
+        SET n += row{set_labels}
+    """
+
+
+def rel_query(spec):
+    """端点已在客户端解析为 elementId（row.a / row.b），服务端按内部 id 直接定位，不再逐行做 (label, ID) 查找"""
+    props = ", ".join(f"{prop}: row.{prop}" for prop, _, _ in _columns(spec.get("properties")))
+    rel_props = f" {{{props}}}" if props else ""
+    return f"""
+        UNWIND $batch AS row
+        MATCH (a) WHERE elementId(a) = row.a
+        MATCH (b) WHERE elementId(b) = row.b
+        CREATE (a)-[r:{spec['type']}{rel_props}]->(b)
+    """
+
+
+def node_delete_query(spec):
+    """删除节点文件中已不存在的行：单标签直接 DETACH DELETE；多标签只撤销附加标签及其属性"""
+    key_label, *extra = spec["labels"]
+    if not extra:
+        return f"""
+            UNWIND $batch AS row
+            MATCH (n:{key_label} {{ID: row.ID}})
+            DETACH DELETE n
+        """
+    removals = [f"n:{label}" for label in extra]
+    removals += [f"n.{prop}" for prop, _, _ in _columns(spec["columns"]) if prop != "ID"]
+    return f"""
+        UNWIND $batch AS row
+        MATCH (n:{key_label}{''.join(f':{label}' for label in extra)} {{ID: row.ID}})
+        REMOVE {', '.join(removals)}
+    """
+
+
+def rel_delete_query(spec):
+    """按端点 + 类型 + 属性删除指定条数的关系（行可能重复，row.n 为需要删除的条数）"""
+    return f"""
+        UNWIND $batch AS row
+        MATCH (a:{spec['from']['label']} {{ID: row.from_id}})-[r:{spec['type']}]->(b:{spec['to']['label']} {{ID: row.to_id}})
+        WHERE properties(r) = row.props
+        WITH row, collect(r)[..row.n] AS rs
+        FOREACH (x IN rs | DELETE x)
+    """
+
+
+def spec_labels(spec):
+    labels = []
+    for node in spec["nodes"]:
+        labels.extend(node["labels"])
+    for rel in spec["relationships"]:
+        labels.extend([rel["from"]["label"], rel["to"]["label"]])
+    return list(dict.fromkeys(labels))
+
+
+def create_constraints(driver, spec):
+    """为 (label, ID) 建立唯一约束（同时提供索引），关系导入按 ID 查找端点时不再扫描标签"""
+    labels = spec_labels(spec)
+    with driver.session(database=settings.NEO4J_DATABASE) as session:
+        for label in labels:
+            session.run(
+                f"CREATE CONSTRAINT {label}_id_unique IF NOT EXISTS "
+                f"FOR (n:{label}) REQUIRE n.ID IS UNIQUE"
+            )
+        session.run("CALL db.awaitIndexes(300)")
+    print(f"✓ 已创建 {len(labels)} 个 ID 唯一约束")
+
+
+def clear_database(driver):
+    """清空数据库：按 IMPORT_DELETE_BATCH 分批删除，避免单个巨型事务耗尽堆内存"""
+    print("清空数据库...")
+    deleted = 0
+    with driver.session(database=settings.NEO4J_DATABASE) as session:
+        while True:
+            record = session.execute_write(lambda tx: tx.run(
+                "MATCH (n) WITH n LIMIT $limit DETACH DELETE n RETURN count(*) AS c",
+                limit=settings.IMPORT_DELETE_BATCH,
+            ).single())
+            if not record or record["c"] == 0:
+                break
+            deleted += record["c"]
+            print(f"  已删除 {deleted} 个节点...")
+    print("数据库已清空")
+
+
+def _track_nodes(rows, manifest):
+    for row in rows:
+        manifest[str(row["ID"])] = [row_hash(row), row["ID"]]
+        yield row
+
+
+def _track_relationships(rows, manifest):
+    for row in rows:
+        h = row_hash(row)
+        entry = manifest.setdefault(h, [0, row])
+        entry[0] += 1
+        yield row
+
+
+def _untrack_relationships(rows, manifest):
+    """把未写入数据库的关系行移出清单（每行减一次计数）"""
+    for row in rows:
+        h = row_hash(row)
+        entry = manifest.get(h)
+        if entry is None:
+            continue
+        entry[0] -= 1
+        if entry[0] <= 0:
+            del manifest[h]
+
+
+def count_rows(csv_file):
+    """按换行数估算数据行数（用于 ETA，含多行字段时略有偏差）"""
+    lines = 0
+    with open(csv_file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return max(lines - 1, 0)
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * (len(ordered) - 1) + 0.5))]
+
+
+class Progress:
+    """单个文件的导入进度：吞吐、批次延迟分位数与 ETA"""
+
+    def __init__(self, name, total=None, offset=0, fmt="text"):
+        self.name = name
+        self.total = total
+        self.offset = offset
+        self.rows = 0
+        self.latencies = []
+        self.fmt = fmt
+        self.started = time.perf_counter()
+        self.finished = None
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def record(self, rows, seconds):
+        with self._lock:
+            self.rows += rows
+            self.latencies.append(seconds)
+
+    def skip(self, rows):
+        """记录未写入（如端点悬空）的行，只推进位置"""
+        with self._lock:
+            self.skipped += rows
+
+    def snapshot(self):
+        with self._lock:
+            rows, skipped, latencies = self.rows, self.skipped, list(self.latencies)
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        done = self.offset + rows + skipped
+        eta = (self.total - done) / rate if self.total is not None and rate > 0 else None
+        if self.finished is not None:
+            eta = 0.0
+        return {
+            "file": self.name,
+            "rows": done,
+            "written": rows,
+            "total": self.total,
+            "rowsPerSec": round(rate, 1),
+            "batches": len(latencies),
+            "p50Ms": round(_percentile(latencies, 0.5) * 1000, 1),
+            "p95Ms": round(_percentile(latencies, 0.95) * 1000, 1),
+            "etaSec": round(max(eta, 0.0), 1) if eta is not None else None,
+            "elapsedSec": round(elapsed, 3),
+            "skipped": skipped,
+        }
+
+    def emit(self, final=False):
+        if final:
+            self.finished = time.perf_counter()
+        snap = self.snapshot()
+        if self.fmt == "json":
+            print(json.dumps({"event": "done" if final else "progress", **snap}, ensure_ascii=False), flush=True)
+            return snap
+        total = f"/{snap['total']}" if snap["total"] is not None else ""
+        eta = f"，ETA {snap['etaSec']:.0f}s" if snap["etaSec"] is not None and not final else ""
+        prefix = "✓" if final else " "
+        print(f"{prefix} [{self.name}] {snap['rows']}{total} 行，{snap['rowsPerSec']:.0f} 行/秒，"
+              f"批延迟 p50 {snap['p50Ms']:.0f}ms / p95 {snap['p95Ms']:.0f}ms{eta}", flush=True)
+        return snap
+
+
+def checkpoint_path():
+    return Path(settings.IMPORT_STATE_DIR) / "checkpoint.json"
+
+
+class ImportRun:
+    """一次导入运行的检查点与报告。
+
+    检查点按文件记录已提交的行偏移（每个批次提交后原子写入 checkpoint.json）；关系文件分块并行写入，
+    偏移推进到已完成的块，正在写的块额外记录块大小、分区数与各分区已提交行数，恢复时按同样方式重新分区，
+    已提交的批次不会重复 CREATE。
+    """
+
+    def __init__(self, mode="full", resume=False, fmt="text", checkpoint=True):
+        self.mode = mode
+        self.fmt = fmt
+        self.enabled = checkpoint
+        self.started_at = time.time()
+        self.files = {}
+        self._lock = threading.Lock()
+        state = None
+        if resume and checkpoint_path().exists():
+            state = json.loads(checkpoint_path().read_text(encoding="utf-8"))
+        self.resumed = state is not None
+        self.state = state or {"mode": mode, "files": {}}
+
+    def file_state(self, name):
+        return dict(self.state["files"].get(name, {}))
+
+    def update(self, name, **fields):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self.state["files"].setdefault(name, {})
+            for key, value in fields.items():
+                if value is None:
+                    entry.pop(key, None)
+                else:
+                    entry[key] = value
+            self._save()
+
+    def commit_partition(self, name, index, rows):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.state["files"][name]["chunk"]["partitions"][str(index)] = rows
+            self._save()
+
+    def _save(self):
+        path = checkpoint_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def progress(self, name, total=None, offset=0):
+        progress = Progress(name, total, offset, self.fmt)
+        self.files[name] = progress
+        return progress
+
+    def finish(self):
+        """导入成功后删除检查点，返回并写出本次运行的 JSON 报告"""
+        if self.enabled and checkpoint_path().exists():
+            checkpoint_path().unlink()
+        files = {name: p.snapshot() for name, p in self.files.items()}
+        report = {
+            "mode": self.mode,
+            "resumed": self.resumed,
+            "startedAt": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "elapsedSec": round(time.time() - self.started_at, 3),
+            "written": sum(f["written"] for f in files.values()),
+            "files": files,
+        }
+        state_dir = Path(settings.IMPORT_STATE_DIR)
+        state_dir.mkdir(parents=True, exist_ok=True)
+        (state_dir / "import_report.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        # 历史记录逐行追加，便于跨数据版本比较导入性能
+        with open(state_dir / "import_history.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+        return report
+
+
+def import_nodes(driver, spec, export_dir, batcher, manifest=None, run=None):
+    """按规格导入一个节点文件；多标签行合并到 ID 所在标签的节点上。传入 manifest 时记录每行哈希"""
+    csv_file = export_dir / spec["file"]
     if not csv_file.exists():
-        return
-    
-    with driver.session() as session, open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        batch = []
-        count = 0
-        
-        for row in reader:
-            batch.append({
-                'id': int(row['ID']),
-                'life': float(row['Life']) if row['Life'] else None,
-                'attack': float(row['Attack']) if row['Attack'] else None
-            })
-            
-            if len(batch) >= BATCH_SIZE:
-                session.run("""
-                    UNWIND $batch AS row
-                    CREATE (n:monster {
-                        ID: row.id,
-                        Life: row.life,
-                        Attack: row.attack
-                    })
-                """, batch=batch)
-                count += len(batch)
-                print(f"  已导入 {count} 个生物节点...")
-                batch = []
-        
-        if batch:
-            session.run("""
-                UNWIND $batch AS row
-                CREATE (n:monster {
-                    ID: row.id,
-                    Life: row.life,
-                    Attack: row.attack
-                })
-            """, batch=batch)
-            count += len(batch)
-        
-        print(f"✓ 共导入 {count} 个生物节点")
-
-
-def import_nodes_groups(driver):
-    """导入分组节点"""
-    csv_file = EXPORT_DIR / "nodes_groups.csv"
+        print(f"跳过: {csv_file} 不存在")
+        return 0
+    run = run or ImportRun(checkpoint=False)
+
+    query = node_query(spec)
+    rows = (r for r in iter_rows(csv_file, _columns(spec["columns"])) if r.get("ID") is not None)
+    if manifest is not None:
+        rows = _track_nodes(rows, manifest)
+    state = run.file_state(spec["file"])
+    if state.get("done"):
+        for _ in rows:  # 仍需读完文件以记录清单
+            pass
+        print(f"跳过: {spec['file']} 已在上次运行中完成")
+        return 0
+    offset = state.get("rows", 0)
+    rows = itertools.islice(rows, offset, None)
+    progress = run.progress(spec["file"], count_rows(csv_file), offset)
+    count = 0
+    for batch in batcher.batches(rows):
+        count += _write_batch(driver, query, batch, batcher, progress.record)
+        run.update(spec["file"], rows=offset + count)
+        progress.emit()
+    run.update(spec["file"], done=True)
+    progress.emit(final=True)
+    return count
+
+
+def rel_columns(spec):
+    columns = [("from_id", spec["from"]["column"], safe_int), ("to_id", spec["to"]["column"], safe_int)]
+    return columns + _columns(spec.get("properties"))
+
+
+class EndpointIndex:
+    """节点导入完成后按标签一次性加载 ID -> elementId 映射，关系端点在客户端解析"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._maps = {}
+
+    def ids(self, label):
+        if label not in self._maps:
+            started = time.perf_counter()
+            with self.driver.session(database=settings.NEO4J_DATABASE) as session:
+                result = session.run(f"MATCH (n:{label}) WHERE n.ID IS NOT NULL RETURN n.ID AS id, elementId(n) AS eid")
+                self._maps[label] = {record["id"]: record["eid"] for record in result}
+            print(f"  已加载 :{label} 端点映射 {len(self._maps[label])} 个，耗时 {time.perf_counter() - started:.2f}s")
+        return self._maps[label]
+
+
+def resolve_endpoints(chunk, spec, endpoints):
+    """把行的 from_id / to_id 换成 elementId；返回 (可写入的行, 悬空行)"""
+    from_ids = endpoints.ids(spec["from"]["label"])
+    to_ids = endpoints.ids(spec["to"]["label"])
+    props = [prop for prop, _, _ in _columns(spec.get("properties"))]
+    resolved, dangling = [], []
+    for row in chunk:
+        a = from_ids.get(row["from_id"])
+        b = to_ids.get(row["to_id"])
+        if a is None or b is None:
+            dangling.append(row)
+            continue
+        out = {prop: row[prop] for prop in props}
+        out["a"], out["b"] = a, b
+        resolved.append(out)
+    return resolved, dangling
+
+
+def partition_rows(resolved, n_parts):
+    """按起点 elementId 把行分到 n_parts 个分区，分区内按 (起点, 终点) 排序。
+
+    分区必须跨进程稳定（续传时按同样方式重建中断的块再跳过已提交的行），因此用 crc32 而不是
+    每个进程随机化的 hash()。同一起点只落在一个分区，不会被两个线程同时写。
+    """
+    partitions = [[] for _ in range(n_parts)]
+    for data in resolved:
+        partitions[zlib.crc32(data["a"].encode("utf-8")) % n_parts].append(data)
+    # 同一批次内相邻行命中相同的节点与关系链
+    for part in partitions:
+        part.sort(key=itemgetter("a", "b"))
+    return partitions
+
+
+def import_relationships(driver, spec, export_dir, batcher, pool, manifest=None, rows=None, run=None,
+                         endpoints=None, untrack=None):
+    """按规格导入一个关系文件：端点在客户端解析，按起点分区后由线程池并行写入。rows 缺省时从 CSV 读取。
+
+    返回实际创建的关系数（取自结果摘要）；端点不存在的行被过滤并单独计数，同时从清单（untrack，缺省为
+    manifest）中移除，端点在后续数据中出现时增量导入仍会补建这些关系。
+    从检查点继续时，上次已提交部分的悬空行同样要移出清单；悬空计数随检查点保存，不会重复计入。
+    """
+    csv_file = export_dir / spec["file"]
     if not csv_file.exists():
-        return
-    
-    with driver.session() as session, open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        batch = []
-        count = 0
-        
-        for row in reader:
-            batch.append({'id': int(row['ItemGroup'])})  # 列名是 ItemGroup
-            
-            if len(batch) >= BATCH_SIZE:
-                session.run("""
-                    UNWIND $batch AS row
-                    CREATE (n:group {ID: row.id})
-                """, batch=batch)
-                count += len(batch)
-                batch = []
-        
-        if batch:
-            session.run("""
-                UNWIND $batch AS row
-                CREATE (n:group {ID: row.id})
-            """, batch=batch)
-            count += len(batch)
-        
-        print(f"✓ 共导入 {count} 个分组节点")
-
-
-def import_nodes_recipes(driver):
-    """导入配方节点"""
-    csv_file = EXPORT_DIR / "nodes_recipes.csv"
+        print(f"跳过: {csv_file} 不存在")
+        return 0
+    run = run or ImportRun(checkpoint=False)
+    endpoints = endpoints or EndpointIndex(driver)
+    name = spec["file"]
+    untrack = manifest if untrack is None else untrack
+
+    query = rel_query(spec)
+    total = None
+    if rows is None:
+        rows = iter_rows(csv_file, rel_columns(spec))
+        total = count_rows(csv_file)
+    if manifest is not None:
+        rows = _track_relationships(rows, manifest)
+    state = run.file_state(name)
+    if state.get("done"):
+        _untrack_dangling(rows, spec, endpoints, untrack)
+        print(f"跳过: {name} 已在上次运行中完成")
+        return 0
+    offset = state.get("rows", 0)
+    # 已提交的前 offset 行不再写入，只读过以记录清单并移除其中的悬空行
+    _untrack_dangling(itertools.islice(rows, offset), spec, endpoints, untrack)
+    progress = run.progress(name, total, offset)
+    workers = settings.IMPORT_REL_WORKERS
+    count = 0
+    dangling = state.get("dangling", 0)
+    samples = []
+
+    def write_partition(index, part, committed):
+        created = done = 0
+        for batch in batcher.batches(part[committed:]):
+            created += _write_batch(driver, query, batch, batcher, progress.record, counter="relationships_created")
+            done += len(batch)
+            run.commit_partition(name, index, committed + done)
+        return created
+
+    def flush(chunk, n_parts, committed):
+        nonlocal dangling
+        resolved, missing = resolve_endpoints(chunk, spec, endpoints)
+        dangling += len(missing)
+        progress.skip(len(missing))
+        if untrack is not None:
+            _untrack_relationships(missing, untrack)
+        samples.extend([r["from_id"], r["to_id"]] for r in missing[:5 - len(samples)])
+        partitions = partition_rows(resolved, n_parts)
+        run.update(name, chunk={"size": len(chunk), "workers": n_parts,
+                                "partitions": {str(i): committed.get(str(i), 0) for i in range(n_parts)}})
+        futures = [pool.submit(write_partition, i, part, committed.get(str(i), 0))
+                   for i, part in enumerate(partitions) if part]
+        return sum(f.result() for f in futures)
+
+    def next_chunk(size):
+        return list(itertools.islice(rows, size))
+
+    # 上次中断在某个块中间：按记录的块大小与分区数重建该块，跳过各分区已提交的行
+    pending = state.get("chunk")
+    if pending:
+        progress.offset += sum(pending["partitions"].values())
+        chunk = next_chunk(pending["size"])
+        count += flush(chunk, pending["workers"], pending["partitions"])
+        offset += len(chunk)
+        run.update(name, rows=offset, chunk=None, dangling=dangling)
+
+    # 每次读入若干批次的行，分区并行写完后再读下一块，保证同一起点不会被两个线程同时写
+    while True:
+        chunk = next_chunk(batcher.size * workers * 4)
+        if not chunk:
+            break
+        count += flush(chunk, workers, {})
+        offset += len(chunk)
+        run.update(name, rows=offset, chunk=None, dangling=dangling)
+        progress.emit()
+    run.update(name, done=True)
+    progress.emit(final=True)
+    print(f"✓ {spec['type']}: 创建 {count} 条关系，悬空端点 {dangling} 行"
+          + (f"（示例 {samples}）" if samples else ""))
+    return count
+
+
+def _untrack_dangling(rows, spec, endpoints, untrack, chunk_size=10000):
+    """读完 rows（清单随之记录），把其中端点不存在的行移出 untrack"""
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        if untrack is not None:
+            _untrack_relationships(resolve_endpoints(chunk, spec, endpoints)[1], untrack)
+
+
+def diff_nodes(rows, old, new):
+    """读取节点行填充 new 清单，返回 (新增或变化的行, 旧清单中已不存在的 ID)"""
+    upserts = [r for r in _track_nodes(rows, new) if old.get(str(r["ID"]), [None])[0] != new[str(r["ID"])][0]]
+    deletes = [entry[1] for key, entry in old.items() if key not in new]
+    return upserts, deletes
+
+
+def diff_relationships(old, new):
+    """旧清单中多出的关系（按行哈希计数比较），返回 rel_delete_query 所需的删除行"""
+    deletes = []
+    for h, (n, row) in old.items():
+        extra = n - new.get(h, [0])[0]
+        if extra > 0:
+            props = {k: v for k, v in row.items() if k not in ("from_id", "to_id") and v is not None}
+            deletes.append({"from_id": row["from_id"], "to_id": row["to_id"], "props": props, "n": extra})
+    return deletes
+
+
+def untrack_detached(spec, manifest, detached, spaces):
+    """DETACH DELETE 连带删除了节点上的关系：把端点已被删除的关系行移出清单，返回移除的行数。
+
+    detached 为 ID 空间（键标签）-> 已删除的 ID；端点重新出现时，下一次增量导入会把这些关系当作新增补建。
+    """
+    from_ids = detached.get(spaces.get(spec["from"]["label"], spec["from"]["label"]), set())
+    to_ids = detached.get(spaces.get(spec["to"]["label"], spec["to"]["label"]), set())
+    if not from_ids and not to_ids:
+        return 0
+    stale = [h for h, (_, row) in manifest.items() if row["from_id"] in from_ids or row["to_id"] in to_ids]
+    for h in stale:
+        del manifest[h]
+    return len(stale)
+
+
+def delta_nodes(driver, spec, export_dir, batcher, old, new, detached=None):
+    """对比新旧清单，只 MERGE 新增/变化的行并处理已删除的行；返回变化行数。
+
+    单标签节点的删除是 DETACH DELETE，被删除的 ID 记入 detached（ID 空间 -> ID 集合）。
+    """
+    csv_file = export_dir / spec["file"]
+    label_text = ":".join(spec["labels"])
     if not csv_file.exists():
-        return
-    
-    with driver.session() as session, open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        batch = []
-        count = 0
-        
-        for row in reader:
-            batch.append({
-                'id': safe_int(row['ID']),
-                'is_follow_me': safe_int(row['IsFollowMe']),
-                'station_label': row['StationLabel'] if row['StationLabel'] else None
-            })
-            
-            if len(batch) >= BATCH_SIZE:
-                session.run("""
-                    UNWIND $batch AS row
-                    CREATE (n:recipe {
-                        ID: row.id,
-                        IsFollowMe: row.is_follow_me,
-                        StationLabel: row.station_label
-                    })
-                """, batch=batch)
-                count += len(batch)
-                batch = []
-        
-        if batch:
-            session.run("""
-                UNWIND $batch AS row
-                CREATE (n:recipe {
-                    ID: row.id,
-                    IsFollowMe: row.is_follow_me,
-                    StationLabel: row.station_label
-                })
-            """, batch=batch)
-            count += len(batch)
-        
-        print(f"✓ 共导入 {count} 个配方节点")
-
-
-def import_relationships(driver, rel_name, rel_type, from_label, to_label, csv_mapping):
-    """通用关系导入函数"""
-    csv_file = EXPORT_DIR / f"rel_{rel_name}.csv"
+        print(f"跳过: {csv_file} 不存在")
+        return 0
+    rows = (r for r in iter_rows(csv_file, _columns(spec["columns"])) if r.get("ID") is not None)
+    upserts, deletes = diff_nodes(rows, old, new)
+    for batch in batcher.batches(upserts):
+        _write_batch(driver, node_query(spec), batch, batcher)
+    for batch in batcher.batches([{"ID": node_id} for node_id in deletes]):
+        _write_batch(driver, node_delete_query(spec), batch, batcher)
+    if detached is not None and len(spec["labels"]) == 1:
+        detached.setdefault(spec["labels"][0], set()).update(deletes)
+    print(f"✓ :{label_text} 新增/变化 {len(upserts)}，删除 {len(deletes)}")
+    return len(upserts) + len(deletes)
+
+
+def delta_relationship_deletes(driver, spec, export_dir, batcher, old, new):
+    """读取新文件填充 new 清单，删除旧清单中多出的关系；返回删除条数"""
+    csv_file = export_dir / spec["file"]
     if not csv_file.exists():
         return 0
-    
-    with driver.session() as session, open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        batch = []
-        count = 0
-        
-        for row in reader:
-            data = {}
-            for key, value in csv_mapping.items():
-                if value in row and row[value]:
-                    # 使用 safe_int 处理可能为浮点数的整数
-                    if key in ['from_id', 'to_id', 'count', 'containerId', 'CountMin', 'CountMax', 'Prob']:
-                        data[key] = safe_int(row[value])
-                    else:
-                        data[key] = row[value]
-                else:
-                    data[key] = None
-            batch.append(data)
-            
-            if len(batch) >= BATCH_SIZE:
-                # 构建动态属性字符串
-                props = ", ".join([f"{k}: row.{k}" for k in csv_mapping.keys() if k not in ['from_id', 'to_id']])
-                if props:
-                    query = f"""
-                        UNWIND $batch AS row
-                        MATCH (a:{from_label} {{ID: row.from_id}})
-                        MATCH (b:{to_label} {{ID: row.to_id}})
-                        CREATE (a)-[r:{rel_type} {{{props}}}]->(b)
-                    """
-                else:
-                    query = f"""
-                        UNWIND $batch AS row
-                        MATCH (a:{from_label} {{ID: row.from_id}})
-                        MATCH (b:{to_label} {{ID: row.to_id}})
-                        CREATE (a)-[r:{rel_type}]->(b)
-                    """
-                session.run(query, batch=batch)
-                count += len(batch)
-                print(f"  已导入 {count} 条 {rel_type} 关系...")
-                batch = []
-        
-        if batch:
-            props = ", ".join([f"{k}: row.{k}" for k in csv_mapping.keys() if k not in ['from_id', 'to_id']])
-            if props:
-                query = f"""
-                    UNWIND $batch AS row
-                    MATCH (a:{from_label} {{ID: row.from_id}})
-                    MATCH (b:{to_label} {{ID: row.to_id}})
-                    CREATE (a)-[r:{rel_type} {{{props}}}]->(b)
-                """
-            else:
-                query = f"""
-                    UNWIND $batch AS row
-                    MATCH (a:{from_label} {{ID: row.from_id}})
-                    MATCH (b:{to_label} {{ID: row.to_id}})
-                    CREATE (a)-[r:{rel_type}]->(b)
-                """
-            session.run(query, batch=batch)
-            count += len(batch)
-        
-        print(f"✓ 共导入 {count} 条 {rel_type} 关系")
-        return count
-
-
-def main():
+    for _ in _track_relationships(iter_rows(csv_file, rel_columns(spec)), new):
+        pass
+    deletes = diff_relationships(old, new)
+    for batch in batcher.batches(deletes):
+        _write_batch(driver, rel_delete_query(spec), batch, batcher)
+    return sum(d["n"] for d in deletes)
+
+
+def delta_relationship_inserts(old, new):
+    for h, (n, row) in new.items():
+        for _ in range(n - old.get(h, [0])[0]):
+            yield row
+
+
+def run_full(driver, spec, export_dir, batcher, run):
+    manifest = {"nodes": {}, "relationships": {}}
+    if run.resumed:
+        print("从检查点继续导入，跳过清空数据库")
+    else:
+        # 清空数据库
+        clear_database(driver)
+        run.update("clear_database", done=True)
+    # 先建约束/索引，再导入节点与关系
+    create_constraints(driver, spec)
+
+    print("\n--- 导入节点 ---")
+    for node_spec in spec["nodes"]:
+        if node_spec.get("enabled", True):
+            import_nodes(driver, node_spec, export_dir, batcher,
+                         manifest=manifest["nodes"].setdefault(node_spec["file"], {}), run=run)
+
+    print("\n--- 导入关系 ---")
+    endpoints = EndpointIndex(driver)
+    with ThreadPoolExecutor(max_workers=settings.IMPORT_REL_WORKERS) as pool:
+        for rel_spec in spec["relationships"]:
+            if rel_spec.get("enabled", True):
+                import_relationships(driver, rel_spec, export_dir, batcher, pool,
+                                     manifest=manifest["relationships"].setdefault(rel_spec["file"], {}),
+                                     run=run, endpoints=endpoints)
+    return manifest, True
+
+
+def run_delta(driver, spec, export_dir, batcher, old_manifest, run):
+    manifest = {"nodes": {}, "relationships": {}}
+    create_constraints(driver, spec)
+    rel_specs = [r for r in spec["relationships"] if r.get("enabled", True)]
+    changed = 0
+
+    print("\n--- 删除已移除的关系 ---")
+    for rel_spec in rel_specs:
+        new = manifest["relationships"].setdefault(rel_spec["file"], {})
+        removed = delta_relationship_deletes(driver, rel_spec, export_dir, batcher,
+                                             old_manifest["relationships"].get(rel_spec["file"], {}), new)
+        if removed:
+            print(f"✓ {rel_spec['type']} 删除 {removed} 条")
+        changed += removed
+
+    print("\n--- 增量更新节点 ---")
+    detached = {}
+    for node_spec in spec["nodes"]:
+        if node_spec.get("enabled", True):
+            changed += delta_nodes(driver, node_spec, export_dir, batcher,
+                                   old_manifest["nodes"].get(node_spec["file"], {}),
+                                   manifest["nodes"].setdefault(node_spec["file"], {}), detached)
+    spaces = id_spaces(spec)
+    for rel_spec in rel_specs:
+        removed = untrack_detached(rel_spec, manifest["relationships"][rel_spec["file"]], detached, spaces)
+        if removed:
+            print(f"✓ {rel_spec['type']} 随节点删除 {removed} 行")
+
+    print("\n--- 新增关系 ---")
+    endpoints = EndpointIndex(driver)
+    with ThreadPoolExecutor(max_workers=settings.IMPORT_REL_WORKERS) as pool:
+        for rel_spec in rel_specs:
+            old = old_manifest["relationships"].get(rel_spec["file"], {})
+            new = manifest["relationships"][rel_spec["file"]]
+            rows = list(delta_relationship_inserts(old, new))
+            if rows:
+                changed += import_relationships(driver, rel_spec, export_dir, batcher, pool,
+                                                rows=iter(rows), run=run, endpoints=endpoints, untrack=new)
+    return manifest, changed > 0
+
+
+# ---------------- 离线批量导入（neo4j-admin database import） ----------------
+
+ADMIN_TYPES = {safe_int: "long", safe_float: "double", safe_str: "string"}
+
+
+def id_spaces(spec):
+    """标签 -> ID 空间。多标签节点（item + block）与 ID 所在标签共用同一个空间"""
+    spaces = {}
+    for node in spec["nodes"]:
+        if node.get("enabled", True):
+            for label in node["labels"]:
+                spaces.setdefault(label, node["labels"][0])
+    return spaces
+
+
+def _write_csv(path, rows):
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        for row in rows:
+            writer.writerow(["" if v is None else v for v in row])
+            count += 1
+    return count
+
+
+def _property_fields(columns):
+    return [f"{prop}:{ADMIN_TYPES[cast]}" for prop, _, cast in columns]
+
+
+def export_node_space(key_label, specs, export_dir, out_dir, ids_by_label):
+    """把同一 ID 空间的节点文件合并成一个 neo4j-admin 节点文件。
+
+    主文件（labels 只有 key_label）流式读取；附加标签文件（block / monster）按 ID 读入内存后逐行合并，
+    只出现在附加文件中的 ID 仍会生成节点，与事务导入中 MERGE 的行为一致。
+    """
+    primary = [s for s in specs if s["labels"] == [key_label]]
+    extras = [s for s in specs if s["labels"] != [key_label]]
+    columns = {}
+    for s in primary + extras:
+        for prop, col, cast in _columns(s["columns"]):
+            columns.setdefault(prop, (prop, col, cast))
+    props = [c for c in columns.values() if c[0] != "ID"]
+    stats = {"sourceRows": 0, "skippedNoId": 0, "duplicates": 0, "nodes": 0}
+
+    extra_rows = {}
+    for s in extras:
+        csv_file = export_dir / s["file"]
+        if not csv_file.exists():
+            print(f"跳过: {csv_file} 不存在")
+            continue
+        for row in iter_rows(csv_file, _columns(s["columns"])):
+            stats["sourceRows"] += 1
+            if row.get("ID") is None:
+                stats["skippedNoId"] += 1
+                continue
+            labels, values = extra_rows.setdefault(row["ID"], ([], {}))
+            labels.extend(l for l in s["labels"][1:] if l not in labels)
+            values.update((k, v) for k, v in row.items() if v is not None)
+
+    def primary_rows():
+        for s in primary:
+            csv_file = export_dir / s["file"]
+            if not csv_file.exists():
+                print(f"跳过: {csv_file} 不存在")
+                continue
+            for row in iter_rows(csv_file, _columns(s["columns"])):
+                stats["sourceRows"] += 1
+                if row.get("ID") is None:
+                    stats["skippedNoId"] += 1
+                    continue
+                yield row
+
+    seen = ids_by_label.setdefault(key_label, set())
+
+    def rows():
+        for row in primary_rows():
+            if row["ID"] in seen:
+                stats["duplicates"] += 1
+                continue
+            labels, values = extra_rows.pop(row["ID"], ([], {}))
+            yield row["ID"], {**row, **values}, labels
+        # 只出现在附加标签文件中的节点
+        for node_id, (labels, values) in extra_rows.items():
+            yield node_id, values, labels
+
+    def lines():
+        for node_id, values, labels in rows():
+            seen.add(node_id)
+            for label in labels:
+                ids_by_label.setdefault(label, set()).add(node_id)
+            yield [node_id] + [values.get(prop) for prop, _, _ in props] + [";".join([key_label] + labels)]
+
+    header = out_dir / f"nodes_{key_label}_header.csv"
+    data = out_dir / f"nodes_{key_label}.csv"
+    _write_csv(header, [[f"ID:ID({key_label})"] + _property_fields(props) + [":LABEL"]])
+    stats["nodes"] = _write_csv(data, lines())
+    stats["labels"] = {label: len(ids) for label, ids in ids_by_label.items()
+                       if label == key_label or any(label in s["labels"] for s in extras)}
+    return header, data, stats
+
+
+def export_relationships(spec, export_dir, out_dir, spaces, ids_by_label):
+    """生成一个关系类型的 neo4j-admin 文件；端点不存在（或缺少对应标签）的行在此过滤并计数"""
+    csv_file = export_dir / spec["file"]
+    if not csv_file.exists():
+        print(f"跳过: {csv_file} 不存在")
+        return None
+    rel_type = spec["type"]
+    from_label, to_label = spec["from"]["label"], spec["to"]["label"]
+    from_ids = ids_by_label.get(from_label, set())
+    to_ids = ids_by_label.get(to_label, set())
+    props = _columns(spec.get("properties"))
+    stats = {"sourceRows": 0, "dangling": 0, "danglingSamples": [], "relationships": 0}
+
+    def lines():
+        for row in iter_rows(csv_file, rel_columns(spec)):
+            stats["sourceRows"] += 1
+            if row["from_id"] not in from_ids or row["to_id"] not in to_ids:
+                stats["dangling"] += 1
+                if len(stats["danglingSamples"]) < 5:
+                    stats["danglingSamples"].append([row["from_id"], row["to_id"]])
+                continue
+            yield [row["from_id"]] + [row[prop] for prop, _, _ in props] + [row["to_id"], rel_type]
+
+    header = out_dir / f"rels_{rel_type}_header.csv"
+    data = out_dir / f"rels_{rel_type}.csv"
+    _write_csv(header, [[f":START_ID({spaces.get(from_label, from_label)})"] + _property_fields(props)
+                        + [f":END_ID({spaces.get(to_label, to_label)})", ":TYPE"]])
+    stats["relationships"] = _write_csv(data, lines())
+    return header, data, stats
+
+
+def bulk_export(spec, export_dir, out_dir):
+    """把 MiniGraDB CSV 转换为 neo4j-admin database import 格式，写出导入命令与 bulk_report.json"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    spaces = id_spaces(spec)
+    node_specs = {}
+    for node in spec["nodes"]:
+        if node.get("enabled", True):
+            node_specs.setdefault(node["labels"][0], []).append(node)
+
+    ids_by_label = {}
+    report = {"nodes": {}, "relationships": {}}
+    args = []
+    for key_label, specs in node_specs.items():
+        header, data, stats = export_node_space(key_label, specs, export_dir, out_dir, ids_by_label)
+        report["nodes"][key_label] = stats
+        args.append(f"--nodes={header.name},{data.name}")
+        print(f"✓ :{key_label} 节点 {stats['nodes']} 个（跳过无 ID {stats['skippedNoId']}，重复 {stats['duplicates']}）")
+
+    for rel in spec["relationships"]:
+        if not rel.get("enabled", True):
+            continue
+        result = export_relationships(rel, export_dir, out_dir, spaces, ids_by_label)
+        if result is None:
+            continue
+        header, data, stats = result
+        report["relationships"][rel["type"]] = stats
+        args.append(f"--relationships={header.name},{data.name}")
+        print(f"✓ {rel['type']} 关系 {stats['relationships']} 条（悬空端点 {stats['dangling']}）")
+
+    report["command"] = " ".join(
+        ["neo4j-admin database import full", "--id-type=integer", "--multiline-fields=true"]
+        + args + [settings.NEO4J_DATABASE]
+    )
+    (out_dir / "bulk_report.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n在 {out_dir} 中执行（数据库需先停止）：\n  {report['command']}")
+    return report
+
+
+def print_stats(driver):
+    with driver.session(database=settings.NEO4J_DATABASE) as session:
+        # 统计节点
+        result = session.run("MATCH (n) RETURN labels(n) AS labels, count(n) AS count ORDER BY count DESC")
+        print("节点统计:")
+        for record in result:
+            print(f"  {':'.join(record['labels'])}: {record['count']}")
+
+        # 统计关系
+        result = session.run("MATCH ()-[r]->() RETURN type(r) AS type, count(r) AS count ORDER BY count DESC")
+        print("\n关系统计:")
+        for record in result:
+            print(f"  {record['type']}: {record['count']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="MiniGraDB CSV → Neo4j 导入")
+    parser.add_argument("--export-dir", default=settings.MINIGRADB_EXPORT_DIR, help="MiniGraDB CSV 导出目录")
+    parser.add_argument("--spec", default=None, help="YAML/JSON 映射规格文件，缺省使用内置 IMPORT_SPEC")
+    parser.add_argument("--mode", choices=["full", "delta"], default="full",
+                        help="full：分批清空后全量导入；delta：只应用与上次导入清单相比的差异")
+    parser.add_argument("--resume", action="store_true",
+                        help="从 IMPORT_STATE_DIR/checkpoint.json 记录的位置继续上次中断的全量导入")
+    parser.add_argument("--progress-format", choices=["text", "json"], default="text",
+                        help="进度输出格式；json 时每行一个 JSON 事件")
+    parser.add_argument("--bulk-export", metavar="OUT_DIR", default=None,
+                        help="不连接数据库，只生成 neo4j-admin database import 所需的 CSV 与报告")
+    args = parser.parse_args(argv)
+    if args.resume and args.mode == "delta":
+        parser.error("--resume 只适用于全量导入")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    spec = load_spec(args.spec)
+    export_dir = Path(args.export_dir)
+
     print("=" * 60)
     print("MiniGraDB 数据导入工具")
     print("=" * 60)
-    
+
+    if args.bulk_export:
+        bulk_export(spec, export_dir, Path(args.bulk_export))
+        return
+
     try:
-        driver = GraphDatabase.driver(URI, auth=AUTH)
-        
-        # 测试连接
-        with driver.session() as session:
-            result = session.run("RETURN 1 AS test")
-            result.single()
-            print("✓ Neo4j 连接成功")
-        
-        # 清空数据库
-        clear_database(driver)
-        
-        print("\n--- 导入节点 ---")
-        import_nodes_items(driver)
-        import_nodes_blocks(driver)
-        import_nodes_monsters(driver)
-        import_nodes_groups(driver)
-        import_nodes_recipes(driver)
-        
-        print("\n--- 导入关系 ---")
-        # 导入各种关系
-        import_relationships(driver, "in_group", "IN_GROUP", "item", "group", 
-                            {'from_id': 'itemId', 'to_id': 'groupId'})
-        
-        import_relationships(driver, "block_handminedrops", "HAND_MINE_DROPS", "block", "item",
-                            {'from_id': 'blockId', 'to_id': 'itemId', 'Prob': 'Prob', 'CountMin': 'CountMin', 'CountMax': 'CountMax'})
-        
-        import_relationships(driver, "block_toolminedrops", "TOOL_MINE_DROPS", "block", "item",
-                            {'from_id': 'blockId', 'to_id': 'itemId', 'Prob': 'Prob', 'CountMin': 'CountMin', 'CountMax': 'CountMax'})
-        
-        import_relationships(driver, "block_precisedrop", "PRECISE_DROP", "block", "item",
-                            {'from_id': 'blockId', 'to_id': 'itemId'})
-        
-        import_relationships(driver, "monster_drops", "DROPS", "monster", "item",
-                            {'from_id': 'monsterId', 'to_id': 'itemId', 'Prob': 'Prob', 'CountMin': 'CountMin', 'CountMax': 'CountMax', 'Conditions': 'Conditions', 'Source': 'Source'})
-        
-        import_relationships(driver, "recipe_consumes", "CONSUMES", "recipe", "item",
-                            {'from_id': 'recipeId', 'to_id': 'targetId', 'Count': 'count', 'ContainerID': 'containerId'})
-        
-        import_relationships(driver, "recipe_produces", "PRODUCES", "recipe", "item",
-                            {'from_id': 'recipeId', 'to_id': 'targetId', 'Count': 'count'})
-        
-        # 以下为旧版“单标签 + 桥接”方案：GDB 等不支持多标签时，用 PLACE/SUMMON 连接 item 与 block/monster 节点。
-        # 若当前库采用 Neo4j 多标签（:item:block / :item:monster 与道具合一），论文与查询均不再依赖此二关系，可整段删除或改为条件导入。
-        import_relationships(driver, "item_place", "PLACE", "item", "block",
-                            {'from_id': 'itemId', 'to_id': 'blockId'})
-        
-        import_relationships(driver, "item_summon", "SUMMON", "item", "monster",
-                            {'from_id': 'itemId', 'to_id': 'monsterId'})
-        
-        import_relationships(driver, "item_fuel_for_device", "FUEL_FOR", "item", "item",
-                            {'from_id': 'itemId', 'to_id': 'Device', 'Heat': 'Heat', 'ProvideHeat': 'ProvideHeat', 'Combustion': 'Combustion'})
-        
+        driver = GraphDatabase.driver(settings.NEO4J_URI, auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD))
+        driver.verify_connectivity()
+        print("✓ Neo4j 连接成功")
+
+        batcher = AdaptiveBatcher()
+        old_manifest = load_manifest() if args.mode == "delta" else None
+        if args.mode == "delta" and old_manifest is None:
+            print("未找到上次导入清单，改为全量导入")
+        if old_manifest is None:
+            run = ImportRun("full", resume=args.resume, fmt=args.progress_format)
+            manifest, changed = run_full(driver, spec, export_dir, batcher, run)
+        else:
+            run = ImportRun("delta", fmt=args.progress_format, checkpoint=False)
+            manifest, changed = run_delta(driver, spec, export_dir, batcher, old_manifest, run)
+        save_manifest(manifest)
+        report = run.finish()
+        print(f"✓ 共写入 {report['written']} 行，耗时 {report['elapsedSec']:.2f}s，"
+              f"报告: {Path(settings.IMPORT_STATE_DIR) / 'import_report.json'}")
+        if changed:
+            print(f"✓ 数据版本已更新: {bump_data_version()}")
+        else:
+            print("数据无变化，保留当前数据版本")
+
         print("\n--- 统计 ---")
-        with driver.session() as session:
-            # 统计节点
-            result = session.run("MATCH (n) RETURN labels(n)[0] AS label, count(n) AS count ORDER BY count DESC")
-            print("节点统计:")
-            for record in result:
-                print(f"  {record['label']}: {record['count']}")
-            
-            # 统计关系
-            result = session.run("MATCH ()-[r]->() RETURN type(r) AS type, count(r) AS count ORDER BY count DESC")
-            print("\n关系统计:")
-            for record in result:
-                print(f"  {record['type']}: {record['count']}")
-        
+        print_stats(driver)
+
         print("\n✓ 数据导入完成!")
         driver.close()
-        
+
     except Exception as e:
         print(f"✗ 错误: {e}")
         sys.exit(1)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+对比 /nlq 响应的两种序列化路径耗时：
+
+  1. 原路径：NLQResponse（Pydantic 校验）→ jsonable_encoder → JSONResponse（标准库 json）
+  2. 快速路径：普通 dict → serialization.dumps（orjson，未安装时退回 json）
+
+用法：
+  python3 scripts/bench_serialization.py --nodes 5000 --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(_ROOT / "backend"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.schemas import NLQResponse  # noqa: E402
+from app.serialization import dumps, graph_payload, orjson  # noqa: E402
+
+
+def make_graph(n_nodes: int, seed: int = 0):
+    rnd = random.Random(seed)
+    names = ["木料", "石块", "铜矿石", "野人", "工匠台", "火炬", "树枝", "硅石"]
+    nodes = [
+        {
+            "id": f"i:{i}",
+            "name": f"{rnd.choice(names)}{i}",
+            "category": rnd.choice(["item", "block", "recipe", "monster"]),
+            "symbolSize": 30,
+            "value": {"ID": i, "Name": f"{rnd.choice(names)}{i}", "Type": 1.0, "Disc": "一段较长的中文描述文本" * 3},
+        }
+        for i in range(n_nodes)
+    ]
+    links = [
+        {
+            "source": f"i:{rnd.randrange(n_nodes)}",
+            "target": f"i:{rnd.randrange(n_nodes)}",
+            "category": "CONSUMES",
+            "label": "CONSUMES",
+            "value": {"Count": rnd.randint(1, 9)},
+        }
+        for _ in range(n_nodes * 2)
+    ]
+    return nodes, links
+
+
+def bench(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    nodes, links = make_graph(args.nodes)
+    body = {
+        "cql": "MATCH path = (r:recipe)-[:CONSUMES]-(m:item) RETURN path",
+        "params": {},
+        "graph": graph_payload(nodes, links),
+        "raw": None,
+        "keys": None,
+        "table": {"columns": ["path"], "rows": [["<path>"]] * len(links)},
+    }
+
+    def pydantic_path() -> bytes:
+        model = NLQResponse(**body)
+        return JSONResponse(jsonable_encoder(model)).body
+
+    def fast_path() -> bytes:
+        return dumps(body)
+
+    slow = bench(pydantic_path, args.repeat)
+    fast = bench(fast_path, args.repeat)
+    encoder = "orjson" if orjson is not None else "json"
+    print(f"nodes={len(nodes)} links={len(links)} bytes={len(fast_path())}")
+    print(f"  pydantic + json : {slow:8.2f} ms")
+    print(f"  plain + {encoder:<7}: {fast:8.2f} ms  ({slow / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+压测用的假 OpenAI 兼容服务：POST /chat/completions 按问题模板返回预置的 CQL，
+响应前按给定延迟分布等待，可按比例注入 5xx 错误。
+
+问题由 QUESTIONS 中的模板拼出（名称 + 后缀），服务按后缀选出对应 CQL，名称作为 $name 参数；
+不认识的问题退回第一条模板。
+
+用法：
+  python3 scripts/loadtest/fake_llm.py --port 8900 --latency lognormal:800,0.5 --error-rate 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from latency import parse_latency
+
+
+# (问题后缀, CQL)；CQL 与 backend/app/warmup_queries.json 中的评测查询同形
+QUESTIONS: List[Tuple[str, str]] = [
+    ("是什么", "MATCH path = (n:item) WHERE n.Name CONTAINS $name AND NOT n:monster AND NOT n:block RETURN path LIMIT 100"),
+    ("可以用来做什么", "MATCH path = (m:item)-[:CONSUMES]-(r:recipe)-[:PRODUCES]-(p:item) WHERE m.Name CONTAINS $name RETURN path LIMIT 100"),
+    ("怎么合成", "MATCH path = (p:item)-[:PRODUCES]-(r:recipe)-[:CONSUMES]-(m:item) WHERE p.Name CONTAINS $name RETURN path LIMIT 100"),
+    ("会掉落什么", "MATCH path = (m:item:monster)-[:DROPS]->(i:item) WHERE m.Name CONTAINS $name RETURN path LIMIT 100"),
+    ("挖掉后得到什么", "MATCH path = (n:item:block)-[:TOOL_MINE_DROPS]-(drop:item) WHERE n.Name CONTAINS $name RETURN path LIMIT 100"),
+    ("属于哪个分组", "MATCH path = (n:item)-[:IN_GROUP]-(g:group) WHERE n.Name CONTAINS $name RETURN path LIMIT 100"),
+]
+
+
+def translate(question: str) -> Dict[str, Any]:
+    question = question.strip()
+    for suffix, cql in QUESTIONS:
+        if question.endswith(suffix):
+            return {"cql": cql, "params": {"name": question[: -len(suffix)]}}
+    return {"cql": QUESTIONS[0][1], "params": {"name": question}}
+
+
+def create_app(latency: str = "0", error_rate: float = 0.0, seed: int = 0) -> FastAPI:
+    app = FastAPI(title="fake-llm")
+    sample = parse_latency(latency, seed)
+    rnd = random.Random(seed)
+
+    @app.get("/models")
+    async def models() -> Dict[str, Any]:
+        return {"object": "list", "data": [{"id": "fake", "object": "model"}]}
+
+    @app.post("/chat/completions")
+    async def chat(request: Request):
+        body = await request.json()
+        await asyncio.sleep(sample())
+        if rnd.random() < error_rate:
+            return JSONResponse({"error": {"message": "injected failure"}}, status_code=503)
+        # 用户消息最后一行是原始问题（见 llm_client.generate_cypher 的提示词）
+        question = body["messages"][-1]["content"].splitlines()[-1]
+        content = json.dumps(translate(question), ensure_ascii=False)
+        return {
+            "id": f"chatcmpl-fake-{time.monotonic_ns()}",
+            "object": "chat.completion",
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8900)
+    ap.add_argument("--latency", default="lognormal:800,0.5", help="延迟分布，见 latency.py")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    uvicorn.run(create_app(args.latency, args.error_rate, args.seed), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
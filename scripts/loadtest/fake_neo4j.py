@@ -0,0 +1,212 @@
+"""
+压测用的假 Neo4j 后端：在内存中生成 MiniGraDB 形状的图（物品 / 方块 / 怪物 / 配方 / 分组），
+按 CQL 的大致形状返回 neo4j.graph 的 Node / Relationship / Path，并像真实驱动一样经 Record.data() 转换。
+
+不解析 Cypher，只按几条经验规则应答：
+  - EXPLAIN ...               空结果
+  - RETURN n, r, m            /graph/expand 的邻居查询，锚点取 $key（ID）或 $id（elementId），排除 $known
+  - n.Name AS name            实体索引的全量名称读取（entity_index.LOAD_QUERY），不受 LIMIT 限制
+  - 含 path                   从名称匹配 $name 的节点出发随机游走，跳数等于模式中的关系个数
+  - 其它                      名称匹配的节点
+LIMIT 取字面量或 $参数。每次调用按给定延迟分布 sleep，模拟数据库耗时。
+"""
+from __future__ import annotations
+
+import random
+import re
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from neo4j import Record
+from neo4j.graph import Graph, Node, Path, Relationship
+
+from latency import parse_latency
+
+
+BASE_NAMES = [
+    "石剑", "木料", "工匠台", "野人", "深积岩", "树枝", "铜矿石", "火炬", "硅石", "铁锭",
+    "石镐", "木棍", "熔炉", "草绳", "兽皮", "骨头", "煤炭", "沙子", "玻璃", "陶罐",
+]
+PREFIXES = ["", "", "精制", "粗糙", "大型", "小型", "古老的", "坚固的"]
+GROUP_NAMES = ["工具", "武器", "材料", "食物", "方块", "装饰", "矿物", "家具"]
+
+_LIMIT = re.compile(r"\bLIMIT\s+(\d+|\$\w+)", re.IGNORECASE)
+_HOPS = re.compile(r"-\[")
+
+
+class MiniGraDB:
+    """确定性生成的合成图；同一 seed 与规模总是得到同一张图。"""
+
+    def __init__(self, items: int = 2000, seed: int = 0) -> None:
+        rnd = random.Random(seed)
+        self.graph = Graph()
+        self.nodes: List[Node] = []
+        self.by_id: Dict[int, Node] = {}
+        self.by_element_id: Dict[str, Node] = {}
+        self.adjacency: Dict[str, List[Tuple[Relationship, Node]]] = {}
+        self._rels = 0
+
+        items_ = [self._node(i + 1, ["item"], self._item_props(rnd, i + 1)) for i in range(items)]
+        blocks, monsters, plain = [], [], []
+        for n in items_:
+            roll = rnd.random()
+            if roll < 0.15:
+                n._labels = frozenset({"item", "block"})
+                n._properties.update({"MineTool": rnd.choice(["镐", "斧", "铲"]), "ToolLevel": rnd.randint(0, 4)})
+                blocks.append(n)
+            elif roll < 0.2:
+                n._labels = frozenset({"item", "monster"})
+                monsters.append(n)
+            else:
+                plain.append(n)
+        plain = plain or items_
+
+        groups = [
+            self._node(items + g + 1, ["group"], {"ID": items + g + 1, "Name": GROUP_NAMES[g % len(GROUP_NAMES)] + str(g)})
+            for g in range(max(1, items // 50))
+        ]
+        for n in items_:
+            self._rel("IN_GROUP", n, rnd.choice(groups), {})
+        for r in range(items // 2):
+            rid = 2 * items + r + 1
+            recipe = self._node(rid, ["recipe"], {"ID": rid, "Name": f"配方{rid}", "IsFollowMe": rnd.random() < 0.5})
+            for m in rnd.sample(plain, min(len(plain), rnd.randint(1, 3))):
+                self._rel("CONSUMES", recipe, m, {"Count": rnd.randint(1, 8)})
+            self._rel("PRODUCES", recipe, rnd.choice(plain), {"Count": rnd.randint(1, 4)})
+        for m in monsters:
+            for drop in rnd.sample(plain, min(len(plain), rnd.randint(1, 4))):
+                lo = rnd.randint(1, 3)
+                self._rel("DROPS", m, drop, {"Prob": round(rnd.random(), 2), "CountMin": lo, "CountMax": lo + rnd.randint(0, 3)})
+        for b in blocks:
+            self._rel(rnd.choice(["TOOL_MINE_DROPS", "HAND_MINE_DROPS"]), b, rnd.choice(plain),
+                      {"Prob": 1.0, "CountMin": 1, "CountMax": rnd.randint(1, 3)})
+
+    @staticmethod
+    def _item_props(rnd: random.Random, id_: int) -> Dict[str, Any]:
+        base = BASE_NAMES[id_ - 1] if id_ <= len(BASE_NAMES) else rnd.choice(PREFIXES) + rnd.choice(BASE_NAMES)
+        return {"ID": id_, "Name": base, "Type": float(rnd.randint(0, 9)), "Disc": f"{base}的描述文本" * rnd.randint(1, 3)}
+
+    def _node(self, id_: int, labels: List[str], props: Dict[str, Any]) -> Node:
+        element_id = f"4:fake:{id_}"
+        node = Node(self.graph, element_id, id_, labels, props)
+        self.nodes.append(node)
+        self.by_id[id_] = node
+        self.by_element_id[element_id] = node
+        self.adjacency[element_id] = []
+        return node
+
+    def _rel(self, rel_type: str, start: Node, end: Node, props: Dict[str, Any]) -> None:
+        self._rels += 1
+        rel = self.graph.relationship_type(rel_type)(self.graph, f"5:fake:{self._rels}", self._rels, props)
+        rel._start_node = start
+        rel._end_node = end
+        self.adjacency[start.element_id].append((rel, end))
+        self.adjacency[end.element_id].append((rel, start))
+
+    def schema(self) -> Dict[str, List[str]]:
+        labels = sorted({label for n in self.nodes for label in n.labels})
+        rel_types = sorted(self.graph._relationship_types)
+        return {"labels": labels, "relTypes": rel_types}
+
+    def _anchors(self, cql: str, params: Dict[str, Any], rnd: random.Random) -> List[Node]:
+        names = [v for v in params.values() if isinstance(v, str)]
+        if names:
+            found = [n for n in self.nodes if any(s in str(n.get("Name", "")) for s in names)]
+            if found:
+                return found
+        return rnd.sample(self.nodes, min(len(self.nodes), 20))
+
+    def answer(self, cql: str, params: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """按 CQL 形状生成结果，返回 (records, keys)，records 与真实 run_read 一样是 Record.data() 的结果。"""
+        text = cql.strip()
+        if text.upper().startswith("EXPLAIN"):
+            return [], []
+        m = _LIMIT.search(text)
+        limit = 100
+        if m:
+            raw = m.group(1)
+            limit = int(params.get(raw[1:], limit)) if raw.startswith("$") else int(raw)
+        # 同一查询与参数得到同一结果，便于比较前后两次压测
+        rnd = random.Random(zlib.crc32(repr((text, sorted(params.items(), key=str))).encode("utf-8")))
+
+        if "n.Name AS name" in text:
+            rows = [{"id": n.get("ID"), "name": n.get("Name"), "labels": sorted(n.labels),
+                     "degree": len(self.adjacency[n.element_id])} for n in self.nodes]
+            return rows, ["id", "name", "labels", "degree"]
+
+        if "RETURN n, r, m" in text:
+            anchor = self.by_id.get(params["key"]) if "key" in params else self.by_element_id.get(params.get("id", ""))
+            if anchor is None:
+                return [], ["n", "r", "m"]
+            known = set(params.get("known") or [])
+            rows = [{"n": anchor, "r": rel, "m": other}
+                    for rel, other in self.adjacency[anchor.element_id] if other.element_id not in known]
+            return [Record(r).data() for r in rows[:limit]], ["n", "r", "m"]
+
+        anchors = self._anchors(text, params, rnd)
+        if "path" in text:
+            hops = max(1, len(_HOPS.findall(text)))
+            rows = []
+            for _ in range(limit):
+                start = node = rnd.choice(anchors)
+                rels = []
+                for _ in range(hops):
+                    edges = self.adjacency[node.element_id]
+                    if not edges:
+                        break
+                    rel, node = rnd.choice(edges)
+                    rels.append(rel)
+                rows.append({"path": Path(start, *rels)})
+            return [Record(r).data() for r in rows], ["path"]
+        return [Record({"n": n}).data() for n in anchors[:limit]], ["n"]
+
+
+class _FakeSession:
+    def close(self) -> None:
+        pass
+
+
+class FakeNeo4jClient:
+    """与 neo4j_client.Neo4jClient 接口一致的替身。"""
+
+    def __init__(self, db: MiniGraDB, latency: Callable[[], float] = lambda: 0.0) -> None:
+        self.db = db
+        self.latency = latency
+
+    def verify(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def get_schema(self, refresh: bool = False) -> Dict[str, List[str]]:
+        return self.db.schema()
+
+    def read_session(self) -> _FakeSession:
+        return _FakeSession()
+
+    def run_read(self, cql: str, params: Dict[str, Any] | None = None,
+                 session: Optional[_FakeSession] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+        delay = self.latency()
+        if delay > 0:
+            time.sleep(delay)
+        return self.db.answer(cql, params or {})
+
+    @contextmanager
+    def stream_read(self, cql: str, params: Dict[str, Any] | None = None,
+                    timeout_ms: Optional[int] = None) -> Iterator[Tuple[List[str], Iterator[Dict[str, Any]]]]:
+        records, keys = self.run_read(cql, params)
+        yield keys, iter(records)
+
+
+def install(fake: FakeNeo4jClient, client: Any) -> None:
+    """把替身的方法挂到真实的 neo4j_client 实例上；各模块持有的是同一实例，因此全部生效。"""
+    for name in ("verify", "close", "get_schema", "read_session", "run_read", "stream_read"):
+        setattr(client, name, getattr(fake, name))
+
+
+def from_env(env: Dict[str, str]) -> FakeNeo4jClient:
+    db = MiniGraDB(items=int(env.get("LOADTEST_ITEMS", "2000")), seed=int(env.get("LOADTEST_SEED", "0")))
+    return FakeNeo4jClient(db, parse_latency(env.get("LOADTEST_DB_LATENCY", "lognormal:15,0.6")))
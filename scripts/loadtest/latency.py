@@ -0,0 +1,32 @@
+"""
+延迟分布描述：
+
+  "0" / "fixed:50"          固定 50 ms
+  "uniform:20,80"           20~80 ms 均匀分布
+  "lognormal:800,0.5"       中位数 800 ms、sigma 0.5 的对数正态分布（长尾，接近真实 LLM / 数据库延迟）
+"""
+from __future__ import annotations
+
+import math
+import random
+from typing import Callable, Optional
+
+
+def parse_latency(spec: str, seed: Optional[int] = None) -> Callable[[], float]:
+    """把分布描述解析为采样函数，返回值以秒为单位。"""
+    rnd = random.Random(seed)
+    kind, _, args = spec.partition(":")
+    if not args:
+        kind, args = "fixed", kind
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        ms = values[0] if values else 0.0
+        return lambda: ms / 1000.0
+    if kind == "uniform":
+        lo, hi = values
+        return lambda: rnd.uniform(lo, hi) / 1000.0
+    if kind == "lognormal":
+        median, sigma = values
+        mu = math.log(median)
+        return lambda: rnd.lognormvariate(mu, sigma) / 1000.0
+    raise ValueError(f"未知的延迟分布：{spec}")
@@ -0,0 +1,22 @@
+"""
+压测入口：导入真实的 app.main.app，并把 neo4j_client 替换为 fake_neo4j 的假后端。
+
+由 run.py 以 `uvicorn patched_app:app --app-dir scripts/loadtest` 启动（多 worker 时每个进程各自替换）；
+假图的规模、种子与延迟分布取自环境变量 LOADTEST_ITEMS / LOADTEST_SEED / LOADTEST_DB_LATENCY，
+LLM 地址照常取 LLM_API_BASE / LLM_API_KEY。
+"""
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(_ROOT / "backend"))
+
+from app.main import app  # noqa: E402,F401
+from app.neo4j_client import neo4j_client  # noqa: E402
+
+from fake_neo4j import from_env, install  # noqa: E402
+
+install(from_env(dict(os.environ)), neo4j_client)
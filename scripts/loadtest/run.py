@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+离线压测：启动假 LLM（fake_llm.py）与接入假 Neo4j 的真实后端（patched_app.py），
+按目标速率以开环泊松到达发送请求，最后按端点报告吞吐与 p50/p95/p99 延迟。
+
+不需要 Neo4j 与 LLM 账号；同一 --seed 下请求序列与数据完全相同，便于比较改动前后的结果。
+延迟从计划发送时刻算起，客户端来不及发送造成的排队也计入。
+
+用法：
+  python3 scripts/loadtest/run.py --rate 50 --duration 30 --mix run-cql=3,nlq=1,expand=1
+  python3 scripts/loadtest/run.py --workers 4 --llm-latency lognormal:800,0.5 --db-latency fixed:20 --json out.json
+  python3 scripts/loadtest/run.py --target http://127.0.0.1:8000     # 压测已在运行的服务（需自行接好后端）
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+_HERE = Path(__file__).resolve().parent
+_ROOT = _HERE.parents[1]
+sys.path.insert(0, str(_HERE))
+
+from fake_llm import QUESTIONS  # noqa: E402
+from fake_neo4j import BASE_NAMES  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url: str, proc: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"进程提前退出（{proc.args}），返回码 {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"等待 {url} 就绪超时")
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in BUILDERS:
+            raise SystemExit(f"未知端点：{name}（可选 {', '.join(BUILDERS)}）")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def _run_cql(rnd: random.Random, items: int) -> Tuple[str, Dict[str, Any]]:
+    _, cql = rnd.choice(QUESTIONS)
+    return "/run-cql", {"cql": cql, "params": {"name": rnd.choice(BASE_NAMES)}}
+
+
+def _nlq(rnd: random.Random, items: int) -> Tuple[str, Dict[str, Any]]:
+    suffix, _ = rnd.choice(QUESTIONS)
+    return "/nlq", {"query": rnd.choice(BASE_NAMES) + suffix}
+
+
+def _expand(rnd: random.Random, items: int) -> Tuple[str, Dict[str, Any]]:
+    # 结果经 Record.data() 后节点 id 为 "i:<ID>" 形式，与前端双击展开时传入的 id 相同
+    return "/graph/expand", {"id": f"i:{rnd.randint(1, items)}"}
+
+
+BUILDERS = {"run-cql": _run_cql, "nlq": _nlq, "expand": _expand}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[idx]
+
+
+async def drive(base: str, mix: List[Tuple[str, float]], rate: float, duration: float, items: int,
+                seed: int, max_inflight: int) -> Tuple[Dict[str, Dict[str, Any]], float]:
+    rnd = random.Random(seed)
+    names = [n for n, _ in mix]
+    weights = [w for _, w in mix]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    inflight = 0
+
+    async def one(client: httpx.AsyncClient, name: str, path: str, body: Dict[str, Any], scheduled: float) -> None:
+        nonlocal inflight
+        inflight += 1
+        try:
+            resp = await client.post(path, json=body)
+            await resp.aread()
+            status = str(resp.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            inflight -= 1
+        latencies[name].append(time.perf_counter() - scheduled)
+        statuses[name][status] += 1
+
+    limits = httpx.Limits(max_connections=max_inflight, max_keepalive_connections=max_inflight)
+    async with httpx.AsyncClient(base_url=base, timeout=60.0, limits=limits) as client:
+        tasks = []
+        started = time.perf_counter()
+        at = 0.0
+        while True:
+            at += rnd.expovariate(rate)
+            if at >= duration:
+                break
+            name = rnd.choices(names, weights)[0]
+            path, body = BUILDERS[name](rnd, items)
+            delay = started + at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if inflight >= max_inflight:
+                # 开环压测中积压过多说明服务已饱和；丢弃并计数，而不是无限制地堆积协程
+                statuses[name]["dropped"] += 1
+                continue
+            tasks.append(asyncio.create_task(one(client, name, path, body, started + at)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    report: Dict[str, Dict[str, Any]] = {}
+    for name in names + ["all"]:
+        values = sorted(sum(latencies.values(), []) if name == "all" else latencies[name])
+        counts: Dict[str, int] = defaultdict(int)
+        for key, per in statuses.items():
+            if name in ("all", key):
+                for status, n in per.items():
+                    counts[status] += n
+        ok = sum(n for status, n in counts.items() if status.startswith("2"))
+        report[name] = {
+            "requests": sum(counts.values()),
+            "ok": ok,
+            "statuses": dict(sorted(counts.items())),
+            "throughputRps": round(ok / elapsed, 2) if elapsed else 0.0,
+            "p50Ms": round(percentile(values, 50) * 1000, 1),
+            "p95Ms": round(percentile(values, 95) * 1000, 1),
+            "p99Ms": round(percentile(values, 99) * 1000, 1),
+            "maxMs": round(values[-1] * 1000, 1) if values else 0.0,
+        }
+    return report, elapsed
+
+
+def print_report(report: Dict[str, Dict[str, Any]], elapsed: float, rate: float) -> None:
+    print(f"\n目标速率 {rate:g} req/s，实际用时 {elapsed:.1f} s")
+    print(f"{'endpoint':<10}{'requests':>9}{'ok':>7}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  statuses")
+    for name, r in report.items():
+        statuses = " ".join(f"{k}={v}" for k, v in r["statuses"].items())
+        print(f"{name:<10}{r['requests']:>9}{r['ok']:>7}{r['throughputRps']:>9}{r['p50Ms']:>9}{r['p95Ms']:>9}"
+              f"{r['p99Ms']:>9}{r['maxMs']:>9}  {statuses}")
+
+
+def start_servers(args: argparse.Namespace) -> Tuple[str, List[subprocess.Popen]]:
+    llm_port, app_port = free_port(), free_port()
+    procs = []
+    llm = subprocess.Popen(
+        [sys.executable, str(_HERE / "fake_llm.py"), "--port", str(llm_port), "--latency", args.llm_latency,
+         "--error-rate", str(args.llm_error_rate), "--seed", str(args.seed)],
+        cwd=str(_HERE),
+    )
+    procs.append(llm)
+    env = dict(os.environ)
+    env.update({
+        "LLM_API_BASE": f"http://127.0.0.1:{llm_port}",
+        "LLM_API_KEY": "loadtest",
+        "LOADTEST_ITEMS": str(args.items),
+        "LOADTEST_SEED": str(args.seed),
+        "LOADTEST_DB_LATENCY": args.db_latency,
+        "SHARED_CACHE_ENABLED": "true" if args.cache else "false",
+        # 每次压测使用全新的缓存文件，结果不受上一次运行影响
+        "SHARED_CACHE_PATH": str(Path(tempfile.mkdtemp(prefix="loadtest-")) / "shared_cache.sqlite3"),
+    })
+    # 工作目录必须是仓库根目录：后端以相对路径挂载 frontend/
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "patched_app:app", "--app-dir", str(_HERE), "--host", "127.0.0.1",
+         "--port", str(app_port), "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=str(_ROOT), env=env,
+    )
+    procs.append(app)
+    try:
+        wait_ready(f"http://127.0.0.1:{llm_port}/models", llm)
+        wait_ready(f"http://127.0.0.1:{app_port}/health", app)
+    except BaseException:
+        stop_servers(procs)
+        raise
+    return f"http://127.0.0.1:{app_port}", procs
+
+
+def stop_servers(procs: List[subprocess.Popen]) -> None:
+    for p in procs:
+        p.terminate()
+    for p in procs:
+        try:
+            p.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            p.kill()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rate", type=float, default=20.0, help="目标请求速率（req/s）")
+    ap.add_argument("--duration", type=float, default=30.0, help="发送时长（秒）")
+    ap.add_argument("--mix", default="run-cql=3,nlq=1,expand=1", help="端点及权重")
+    ap.add_argument("--workers", type=int, default=1, help="后端 uvicorn worker 数")
+    ap.add_argument("--items", type=int, default=2000, help="假图中的物品数量")
+    ap.add_argument("--llm-latency", default="lognormal:800,0.5")
+    ap.add_argument("--llm-error-rate", type=float, default=0.0)
+    ap.add_argument("--db-latency", default="lognormal:15,0.6")
+    ap.add_argument("--cache", action="store_true", help="启用跨 worker 共享缓存（默认关闭，测量未命中路径）")
+    ap.add_argument("--max-inflight", type=int, default=512)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--target", default="", help="直接压测该地址，不启动假服务")
+    ap.add_argument("--json", default="", help="同时把报告写入该 JSON 文件")
+    args = ap.parse_args()
+    mix = parse_mix(args.mix)
+
+    procs: List[subprocess.Popen] = []
+    base: Optional[str] = args.target or None
+    if base is None:
+        base, procs = start_servers(args)
+    try:
+        report, elapsed = asyncio.run(
+            drive(base, mix, args.rate, args.duration, args.items, args.seed, args.max_inflight)
+        )
+    finally:
+        stop_servers(procs)
+
+    print_report(report, elapsed, args.rate)
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps({"args": vars(args), "elapsedS": round(elapsed, 2), "endpoints": report},
+                       ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,10 @@
 用法（与 backend 相同环境变量）：
   cd /path/to/neo4jSlave
   export NEO4J_URI=bolt://localhost:7687 NEO4J_USER=neo4j NEO4J_PASSWORD=...
-  python3 scripts/neo4j_paper_stats.py
+  python3 scripts/neo4j_paper_stats.py [--full]
+
+默认只执行计数存储可回答的计数与一次标签组合统计；--full 时额外统计关系类型计数与度分布
+（逐标签全量扫描，明显更慢），并输出与 GET /stats 相同的完整快照。
 
 依赖：pip install neo4j python-dotenv
 也可在已安装项目 requirements 的 venv 中运行。
@@ -33,6 +36,19 @@ except ImportError:
     print("请先安装 neo4j 驱动：pip install neo4j", file=sys.stderr)
     sys.exit(1)
 
+# 统计查询与后端 /stats 共用 backend/app/stats.py
+sys.path.insert(0, str(_ROOT))
+from backend.app.stats import collect_stats  # noqa: E402
+
+
+def combo_count(snapshot: dict, include: set, exclude: set = frozenset()) -> int:
+    """按标签组合计数：包含 include 全部标签、且不含 exclude 中任一标签的节点数"""
+    return sum(
+        row["count"]
+        for row in snapshot["labelCombinations"]
+        if include <= set(row["labels"]) and not exclude & set(row["labels"])
+    )
+
 
 def main() -> None:
     uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
@@ -42,44 +58,44 @@ def main() -> None:
 
     driver = GraphDatabase.driver(uri, auth=(user, password))
     try:
-        with driver.session(database=database, default_access_mode="READ") as session:
-
-            def c1(q: str) -> int:
-                v = session.run(q).single()
-                return int(v[0]) if v and v[0] is not None else 0
-
-            # 与论文表口径一致：互斥分类
-            pure_item = c1(
-                "MATCH (n:item) WHERE NOT n:block AND NOT n:monster RETURN count(n)"
-            )
-            blocks = c1("MATCH (n:item:block) RETURN count(n)")
-            monsters = c1("MATCH (n:item:monster) RETURN count(n)")
-            recipes = c1("MATCH (n:recipe) RETURN count(n)")
-            groups = c1("MATCH (n:group) RETURN count(n)")
-            smelts = c1("MATCH (n:smelt) RETURN count(n)")
-            devices = c1("MATCH (n:device) RETURN count(n)")
-
-            total_nodes = c1("MATCH (n) RETURN count(n)")
-            total_rels = c1("MATCH ()-[r]->() RETURN count(r)")
-
-            rows = {
-                "pure_item_item_only": pure_item,
-                "item_block": blocks,
-                "item_monster": monsters,
-                "recipe": recipes,
-                "group": groups,
-                "smelt": smelts,
-                "device": devices,
-                "sum_typed_rows": pure_item
-                + blocks
-                + monsters
-                + recipes
-                + groups
-                + smelts
-                + devices,
-                "total_nodes_all_labels": total_nodes,
-                "total_relationships": total_rels,
-            }
+        def run_query(q: str) -> list:
+            # 每个查询独立会话，collect_stats 可并发执行
+            with driver.session(database=database, default_access_mode="READ") as session:
+                return [r.data() for r in session.run(q)]
+
+        full = "--full" in sys.argv[1:]
+        labels = [r["label"] for r in run_query("CALL db.labels() YIELD label RETURN label")]
+        rel_types = [r["relationshipType"] for r in run_query(
+            "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType")] if full else []
+        snapshot = collect_stats(run_query, labels, rel_types, degrees=full)
+
+        # 与论文表口径一致：互斥分类（由一次标签组合统计推出，不再逐类扫描）
+        pure_item = combo_count(snapshot, {"item"}, {"block", "monster"})
+        blocks = combo_count(snapshot, {"item", "block"})
+        monsters = combo_count(snapshot, {"item", "monster"})
+        recipes = snapshot["labels"].get("recipe", 0)
+        groups = snapshot["labels"].get("group", 0)
+        smelts = snapshot["labels"].get("smelt", 0)
+        devices = snapshot["labels"].get("device", 0)
+
+        rows = {
+            "pure_item_item_only": pure_item,
+            "item_block": blocks,
+            "item_monster": monsters,
+            "recipe": recipes,
+            "group": groups,
+            "smelt": smelts,
+            "device": devices,
+            "sum_typed_rows": pure_item
+            + blocks
+            + monsters
+            + recipes
+            + groups
+            + smelts
+            + devices,
+            "total_nodes_all_labels": snapshot["totals"]["nodes"],
+            "total_relationships": snapshot["totals"]["relationships"],
+        }
 
         print(json.dumps(rows, ensure_ascii=False, indent=2))
         print("\n--- LaTeX 占比（占 sum_typed_rows，自行核对是否与 total_nodes 一致）---", file=sys.stderr)
@@ -95,6 +111,8 @@ def main() -> None:
         ]:
             pct = 100.0 * val / s
             print(f"  {name}: {val} ({pct:.2f}%)", file=sys.stderr)
+        if full:
+            print(json.dumps(snapshot, ensure_ascii=False, indent=2))
     finally:
         driver.close()
 
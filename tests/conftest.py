@@ -1,10 +1,16 @@
 """
 测试配置与 fixtures
 """
+import os
 import pytest
 import sys
 from pathlib import Path
 
+# 测试之间不共享持久化的结果缓存（需在导入 app.config 之前设置）
+os.environ.setdefault("SHARED_CACHE_ENABLED", "false")
+# 实体索引会在后台线程读取 Neo4j；需要它的测试单独开启并注入数据
+os.environ.setdefault("ENTITY_INDEX_ENABLED", "false")
+
 # 将 backend 加入路径
 BACKEND_DIR = Path(__file__).parent.parent / "backend"
 sys.path.insert(0, str(BACKEND_DIR))
@@ -0,0 +1,163 @@
+"""
+测试准入控制 (admission.py)
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app import admission
+from app.admission import Limiter, Overloaded, admit, admit_from_thread, run_admitted
+from app.metrics import render_metrics
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(autouse=True)
+def reset_limiters():
+    admission._limiters.clear()
+    yield
+    admission._limiters.clear()
+
+
+class TestLimiter:
+    """测试并发上限、优先级与拒绝"""
+
+    async def test_priority_order(self):
+        lim = Limiter("t", limit=1, max_queue=10, timeout=1.0)
+        await lim.acquire(0)
+        order = []
+
+        async def waiter(name, priority):
+            await lim.acquire(priority)
+            order.append(name)
+            lim.release()
+
+        tasks = [asyncio.create_task(waiter("nlq", 1)), asyncio.create_task(waiter("cql", 0))]
+        await asyncio.sleep(0)
+        assert lim.waiting == 2
+        lim.release()
+        await asyncio.gather(*tasks)
+        assert order == ["cql", "nlq"]
+        assert lim.active == 0
+        assert lim.waiting == 0
+
+    async def test_queue_full_rejected_with_429(self):
+        lim = Limiter("t", limit=1, max_queue=1, timeout=1.0)
+        await lim.acquire(0)
+        pending = asyncio.create_task(lim.acquire(0))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as exc:
+            await lim.acquire(0)
+        assert exc.value.status_code == 429
+        assert int(exc.value.headers["Retry-After"]) >= 1
+        lim.release()
+        await pending
+        lim.release()
+        assert lim.active == 0
+
+    async def test_deadline_returns_503(self):
+        lim = Limiter("t", limit=1, max_queue=5, timeout=0.01)
+        await lim.acquire(0)
+        with pytest.raises(Overloaded) as exc:
+            await lim.acquire(0)
+        assert exc.value.status_code == 503
+        assert lim.waiting == 0
+        # 超时的等待者不会占用后续释放的槽位
+        lim.release()
+        assert lim.active == 0
+
+
+class TestAdmit:
+    """测试上下文管理器与指标"""
+
+    async def test_admit_limits_concurrency(self, monkeypatch):
+        monkeypatch.setattr(admission.settings, "NEO4J_MAX_CONCURRENCY", 2)
+        running = peak = 0
+
+        async def work():
+            nonlocal running, peak
+            async with admit("neo4j"):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(work() for _ in range(6)))
+        assert peak == 2
+        text = render_metrics()
+        assert 'neo4jslave_admission_queue_depth{resource="neo4j"} 0' in text
+        assert 'neo4jslave_admission_wait_seconds_count{resource="neo4j"}' in text
+
+    async def test_disabled_passthrough(self, monkeypatch):
+        monkeypatch.setattr(admission.settings, "ADMISSION_ENABLED", False)
+        async with admit("llm"):
+            pass
+        assert "llm" not in admission._limiters
+
+
+class TestRunAdmitted:
+    """测试线程池调用期间的槽位占用"""
+
+    async def test_cancelled_caller_keeps_slot_until_thread_finishes(self):
+        lim = admission._limiters["neo4j"] = Limiter("neo4j", limit=1, max_queue=5, timeout=1.0)
+        started, finish = threading.Event(), threading.Event()
+
+        def read():
+            started.set()
+            finish.wait(2.0)
+            return "rows"
+
+        caller = asyncio.create_task(run_admitted("neo4j", 0, read))
+        while not started.is_set():
+            await asyncio.sleep(0.005)
+        # 客户端断开：等待方被取消，但读取仍在线程中运行，槽位不能归还
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        assert lim.active == 1
+        finish.set()
+        for _ in range(200):
+            if lim.active == 0:
+                break
+            await asyncio.sleep(0.005)
+        assert lim.active == 0
+
+    async def test_returns_result_and_releases(self):
+        lim = admission._limiters["neo4j"] = Limiter("neo4j", limit=1, max_queue=5, timeout=1.0)
+        assert await run_admitted("neo4j", 0, lambda a, b: a + b, 1, 2) == 3
+        assert lim.active == 0
+
+
+class TestAdmitFromThread:
+    """测试后台任务线程占用事件循环上的槽位"""
+
+    async def test_thread_holds_slot_until_done(self):
+        lim = admission._limiters["neo4j"] = Limiter("neo4j", limit=1, max_queue=5, timeout=1.0)
+        loop = asyncio.get_running_loop()
+        entered, leave = threading.Event(), threading.Event()
+
+        def job():
+            with admit_from_thread(loop, "neo4j"):
+                entered.set()
+                leave.wait(2.0)
+
+        worker = asyncio.create_task(asyncio.to_thread(job))
+        while not entered.is_set():
+            await asyncio.sleep(0.005)
+        assert lim.active == 1
+        waiter = asyncio.create_task(lim.acquire(0))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        leave.set()
+        await worker
+        await asyncio.wait_for(waiter, 1.0)
+        lim.release()
+        assert lim.active == 0 and lim.waiting == 0
+
+    async def test_stopped_loop_not_queued(self):
+        loop = asyncio.new_event_loop()
+        loop.close()
+        with admit_from_thread(loop, "neo4j"):
+            pass
+        assert "neo4j" not in admission._limiters
@@ -12,6 +12,7 @@ BACKEND_DIR = Path(__file__).parent.parent / "backend"
 sys.path.insert(0, str(BACKEND_DIR))
 
 from app.main import app
+from app.config import settings
 from unittest.mock import patch, MagicMock
 
 
@@ -110,6 +111,525 @@ class TestRunCQLEndpoint:
                 assert "missing" in response.json()["detail"]
 
 
+class TestExpandEndpoint:
+    """测试 /graph/expand 端点"""
+
+    @patch("app.main.neo4j_client.run_read")
+    def test_expand_returns_delta(self, mock_run_read, client):
+        """只返回客户端未持有的节点"""
+        mock_run_read.return_value = (
+            [{"n": {"ID": 1, "Name": "木料"}, "r": "CONSUMES", "m": {"ID": 2, "Name": "木棍"}}],
+            ["n", "r", "m"],
+        )
+        response = client.post("/graph/expand", json={"id": "i:1", "known_ids": ["i:1"]})
+
+        assert response.status_code == 200
+        graph = response.json()["graph"]
+        assert [n["id"] for n in graph["nodes"]] == ["i:2"]
+        assert graph["meta"]["expandedFrom"] == "i:1"
+        cql, params = mock_run_read.call_args[0]
+        assert params["known_keys"] == ["i:1"]
+
+    def test_expand_invalid_direction(self, client):
+        """非法方向被拒绝"""
+        response = client.post("/graph/expand", json={"id": "i:1", "direction": "up"})
+        assert response.status_code == 422
+
+
+class TestExploreWebSocket:
+    """测试 /ws 探索会话"""
+
+    def test_query_then_expand_streams_deltas(self, client):
+        """查询替换当前图，展开只下发新节点，已知 id 由服务端提供"""
+        results = [
+            ([{"n": {"ID": 1, "Name": "木料"}}], ["n"]),
+            ([{"n": {"ID": 1, "Name": "木料"}, "r": "CONSUMES", "m": {"ID": 2, "Name": "木棍"}}], ["n", "r", "m"]),
+        ]
+        with patch("app.main.neo4j_client.read_session") as read_session, \
+                patch("app.main.neo4j_client.run_read", side_effect=results) as run_read, \
+                patch("app.main.is_readonly_cql", return_value=(True, None)), \
+                patch("app.main.explain_safe", return_value=(True, None)):
+            with client.websocket_connect("/ws") as ws:
+                ws.send_json({"id": 1, "type": "query", "cql": "MATCH (n:item) RETURN n LIMIT 1"})
+                first = ws.receive_json()
+                ws.send_json({"id": 2, "type": "expand", "node": "i:1"})
+                second = ws.receive_json()
+                ws.send_json({"id": 3, "type": "history"})
+                history = ws.receive_json()
+
+        assert first["id"] == 1 and first["type"] == "delta"
+        assert [n["id"] for n in first["add"]["nodes"]] == ["i:1"]
+        assert first["table"]["columns"] == ["n"]
+        assert second["id"] == 2
+        assert [n["id"] for n in second["add"]["nodes"]] == ["i:2"]
+        assert second["meta"]["expandedFrom"] == "i:1"
+        _, params, session = run_read.call_args[0]
+        assert params["known_keys"] == ["i:1"]
+        # 整个连接复用同一个会话，断开时关闭
+        assert session is read_session.return_value
+        read_session.assert_called_once()
+        session.close.assert_called_once()
+        assert history["items"][0]["cql"] == "MATCH (n:item) RETURN n LIMIT 1"
+
+    def test_layout_sends_coordinates_for_retained_nodes(self, client):
+        pytest.importorskip("numpy")
+        one = ([{"n": {"ID": 1, "Name": "木料"}}], ["n"])
+        two = ([{"n": {"ID": 1, "Name": "木料"}, "r": "CONSUMES", "m": {"ID": 2, "Name": "木棍"}}], ["n", "r", "m"])
+        with patch("app.main.neo4j_client.read_session"), \
+                patch("app.main.neo4j_client.run_read", side_effect=[one, two]), \
+                patch("app.main.is_readonly_cql", return_value=(True, None)), \
+                patch("app.main.explain_safe", return_value=(True, None)):
+            with client.websocket_connect("/ws") as ws:
+                ws.send_json({"id": 1, "type": "query", "cql": "MATCH (n) RETURN n"})
+                ws.receive_json()
+                ws.send_json({"id": 2, "type": "query", "cql": "MATCH (n)-[r]->(m) RETURN n, r, m", "layout": True})
+                delta = ws.receive_json()
+
+        assert delta["meta"]["layout"] == "none"
+        assert [n["id"] for n in delta["add"]["nodes"]] == ["i:2"]
+        retained = delta["update"]["nodes"]
+        assert [n["id"] for n in retained] == ["i:1"] and "x" in retained[0] and "y" in retained[0]
+
+    def test_expand_scored_like_query(self, client):
+        pytest.importorskip("numpy")
+        results = [
+            ([{"n": {"ID": 1, "Name": "木料"}}], ["n"]),
+            ([{"n": {"ID": 1, "Name": "木料"}, "r": "CONSUMES", "m": {"ID": 2, "Name": "木棍"}}], ["n", "r", "m"]),
+        ]
+        with patch("app.main.neo4j_client.read_session"), \
+                patch("app.main.neo4j_client.run_read", side_effect=results), \
+                patch("app.main.is_readonly_cql", return_value=(True, None)), \
+                patch("app.main.explain_safe", return_value=(True, None)):
+            with client.websocket_connect("/ws") as ws:
+                ws.send_json({"id": 1, "type": "query", "cql": "MATCH (n) RETURN n", "score": "degree"})
+                ws.receive_json()
+                ws.send_json({"id": 2, "type": "expand", "node": "i:1"})
+                delta = ws.receive_json()
+
+        added = delta["add"]["nodes"]
+        assert [n["id"] for n in added] == ["i:2"] and "importance" in added[0] and "symbolSize" in added[0]
+
+    def test_errors_keep_connection_open(self, client):
+        """校验失败以 error 消息回复，连接保持可用"""
+        with patch("app.main.is_readonly_cql", return_value=(False, "只允许只读查询")):
+            with client.websocket_connect("/ws") as ws:
+                ws.send_json({"id": "a", "type": "query", "cql": "CREATE (n)"})
+                error = ws.receive_json()
+                ws.send_text("not json")
+                bad = ws.receive_json()
+                ws.send_json({"id": "b", "type": "ping"})
+                pong = ws.receive_json()
+
+        assert error == {"type": "error", "status": 400, "detail": "只允许只读查询", "id": "a"}
+        assert bad["status"] == 400
+        assert pong == {"type": "pong", "id": "b"}
+
+
+class TestMetricsEndpoint:
+    """测试 /metrics 端点与 Server-Timing"""
+
+    @patch("app.main.neo4j_client.run_read")
+    def test_run_cql_stages(self, mock_run_read, client):
+        mock_run_read.return_value = ([{"n": {"id": 1, "name": "木料", "labels": ["item"]}}], ["n"])
+        with patch("app.main.is_readonly_cql", return_value=(True, None)):
+            with patch("app.main.explain_safe", return_value=(True, None)):
+                response = client.post("/run-cql", json={"cql": "MATCH (n) RETURN n"})
+        assert response.status_code == 200
+        timing = response.headers["server-timing"]
+        for name in ("run_read", "build_table", "records_to_graph", "serialize", "total"):
+            assert f"{name};dur=" in timing
+
+        text = client.get("/metrics").text
+        assert 'neo4jslave_request_seconds_count{method="POST",path="/run-cql"}' in text
+        assert 'neo4jslave_result_size_count{kind="nodes"}' in text
+
+
+class TestJobsEndpoint:
+    """测试 /jobs 后台任务"""
+
+    def test_cql_job_lifecycle(self, client):
+        import time
+        from contextlib import contextmanager
+
+        @contextmanager
+        def stream_read(cql, params=None, timeout_ms=None):
+            rows = ({"x": i} for i in range(5))
+            yield ["x"], rows
+
+        with patch("app.main.neo4j_client.stream_read", stream_read):
+            with patch("app.main.explain_safe", return_value=(True, None)):
+                response = client.post("/jobs", json={"cql": "MATCH (n) RETURN n.x AS x"})
+            assert response.status_code == 202
+            job_id = response.json()["id"]
+            for _ in range(200):
+                data = client.get(f"/jobs/{job_id}", params={"limit": 2}).json()
+                if data["status"] == "done":
+                    break
+                time.sleep(0.01)
+        assert data["status"] == "done"
+        assert data["progress"]["rows"] == 5
+        assert data["resultBytes"] > len(b"[0],[1],[2],[3],[4]")
+        assert data["result"]["table"]["rows"] == [[0], [1]]
+        assert data["result"]["page"]["next"] == 2
+
+    def test_job_read_takes_background_neo4j_slot(self):
+        from contextlib import contextmanager
+        from app.admission import PRIORITY_BACKGROUND
+        from app.jobs import Job
+        from app.main import _run_job
+
+        slots = []
+
+        @contextmanager
+        def recording(loop, resource, priority):
+            slots.append((resource, priority))
+            yield
+
+        @contextmanager
+        def stream_read(cql, params=None, timeout_ms=None):
+            assert slots, "读取前必须先占用槽位"
+            yield ["x"], iter([{"x": 1}])
+
+        with patch("app.main.admit_from_thread", recording), patch("app.main.neo4j_client.stream_read", stream_read):
+            result = _run_job(Job("cql", {"cql": "MATCH (n) RETURN n.x AS x", "params": {}}))
+        assert slots == [("neo4j", PRIORITY_BACKGROUND)]
+        assert result["table"]["rows"] == [[1]]
+
+    def test_nlq_job_uses_admission_and_validation(self, client):
+        import time
+        from contextlib import asynccontextmanager, contextmanager
+        from app.main import admit
+
+        admitted = []
+
+        @asynccontextmanager
+        async def recording_admit(resource, priority=0):
+            admitted.append(resource)
+            async with admit(resource, priority):
+                yield
+
+        @contextmanager
+        def stream_read(cql, params=None, timeout_ms=None):
+            yield ["x"], iter([{"x": 1}])
+
+        cql = "MATCH (n:item) RETURN n.Name AS x LIMIT 10"
+        with patch("app.main.admit", recording_admit), \
+                patch("app.main.neo4j_client.get_schema", return_value={"labels": [], "relTypes": []}), \
+                patch("app.main.llm_client.generate_cypher", return_value=(cql, {})), \
+                patch("app.main.explain_safe", return_value=(True, None)), \
+                patch("app.main.neo4j_client.stream_read", stream_read):
+            response = client.post("/jobs", json={"query": "所有物品"})
+            assert response.status_code == 202
+            job_id = response.json()["id"]
+            for _ in range(200):
+                data = client.get(f"/jobs/{job_id}").json()
+                if data["status"] == "done":
+                    break
+                time.sleep(0.01)
+        assert "llm" in admitted
+        assert data["kind"] == "nlq" and data["result"]["cql"] == cql
+        assert data["result"]["table"]["rows"] == [[1]]
+
+    def test_nlq_job_rejected_before_submit(self, client):
+        schema = patch("app.main.neo4j_client.get_schema", return_value={"labels": [], "relTypes": []})
+        with schema, patch("app.main.llm_client.generate_cypher", return_value=("MATCH (n) DETACH DELETE n", {})):
+            assert client.post("/jobs", json={"query": "删除"}).status_code == 400
+        # 生成的 CQL 引用了未提供的参数：与 /nlq 一样返回 400
+        generated = ("MATCH (n) WHERE n.Name = $name RETURN n", {})
+        with schema, patch("app.main.llm_client.generate_cypher", return_value=generated), \
+                patch("app.main.explain_safe", return_value=(True, None)):
+            response = client.post("/jobs", json={"query": "木料"})
+        assert response.status_code == 400
+        assert response.json()["detail"]["missing"] == ["name"]
+
+    def test_requires_exactly_one_query(self, client):
+        assert client.post("/jobs", json={}).status_code == 400
+        assert client.post("/jobs", json={"query": "a", "cql": "MATCH (n) RETURN n"}).status_code == 400
+
+    def test_rejects_write_cql(self, client):
+        response = client.post("/jobs", json={"cql": "MATCH (n) DETACH DELETE n"})
+        assert response.status_code == 400
+
+    def test_unknown_job(self, client):
+        assert client.get("/jobs/missing").status_code == 404
+        assert client.delete("/jobs/missing").status_code == 404
+
+
+class TestSharedCache:
+    """测试 /run-cql 的共享缓存命中"""
+
+    def test_second_request_served_from_cache(self, client, tmp_path):
+        from app import shared_cache
+
+        cache = shared_cache.SharedCache(str(tmp_path / "cache.sqlite3"), 1 << 20)
+        with patch("app.main.shared_cache", return_value=cache), \
+                patch("app.main.is_readonly_cql", return_value=(True, None)), \
+                patch("app.main.explain_safe", return_value=(True, None)), \
+                patch("app.main.neo4j_client.run_read", return_value=([{"x": 1}], ["x"])) as run_read:
+            body = {"cql": "MATCH (n) RETURN n.x AS x", "params": {}}
+            first = client.post("/run-cql", json=body)
+            second = client.post("/run-cql", json=body)
+            other = client.post("/run-cql", json={**body, "raw": True})
+
+        assert first.status_code == second.status_code == 200
+        assert second.content == first.content
+        assert second.headers["content-type"] == "application/json"
+        assert run_read.call_count == 2
+        assert "raw" in other.json()
+
+    def test_cache_io_runs_off_event_loop(self, client, tmp_path):
+        import asyncio
+        from app import shared_cache
+
+        on_loop = []
+
+        class RecordingCache(shared_cache.SharedCache):
+            def get(self, key, version):
+                on_loop.append(_has_running_loop(asyncio))
+                return super().get(key, version)
+
+            def put(self, key, version, value):
+                on_loop.append(_has_running_loop(asyncio))
+                return super().put(key, version, value)
+
+        cache = RecordingCache(str(tmp_path / "cache.sqlite3"), 1 << 20)
+        with patch("app.main.shared_cache", return_value=cache), \
+                patch("app.main.neo4j_client.get_schema", return_value={"labels": [], "relTypes": []}), \
+                patch("app.main.llm_client.generate_cypher", return_value=("MATCH (n) RETURN n.x AS x", {})), \
+                patch("app.main.explain_safe", return_value=(True, None)), \
+                patch("app.main.neo4j_client.run_read", return_value=([{"x": 1}], ["x"])):
+            assert client.post("/nlq", json={"query": "所有 x"}).status_code == 200
+            assert client.post("/nlq", json={"query": "所有 x"}).status_code == 200
+        # 响应与翻译各一次查找与写入，第二次请求命中响应缓存
+        assert len(on_loop) == 5 and not any(on_loop)
+
+
+def _has_running_loop(asyncio):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class TestEntityAnchoring:
+    """测试 /nlq 使用实体索引锚定 ID 与“你是不是要找”"""
+
+    @pytest.fixture
+    def index(self, monkeypatch):
+        from app.data_version import result_version
+        from app.entity_index import EntityIndex, entity_index
+
+        monkeypatch.setattr(settings, "ENTITY_INDEX_ENABLED", True)
+        rows = [{"id": 1, "name": "木料", "labels": ["item"]}, {"id": 2, "name": "石剑", "labels": ["item"]}]
+        monkeypatch.setattr(entity_index, "index", EntityIndex(rows, result_version()))
+
+    def test_generated_query_anchored_on_ids(self, client, index):
+        cql = "MATCH path = (n:item) WHERE n.Name CONTAINS $name RETURN path LIMIT 100"
+        with patch("app.main.neo4j_client.get_schema", return_value={"labels": [], "relTypes": []}), \
+                patch("app.main.llm_client.generate_cypher", return_value=(cql, {"name": "木料"})) as generate, \
+                patch("app.main.explain_safe", return_value=(True, None)), \
+                patch("app.main.neo4j_client.run_read", return_value=([], ["path"])) as run_read:
+            response = client.post("/nlq", json={"query": "木料可以用来做什么"})
+
+        assert response.status_code == 200
+        assert "ID=1" in generate.call_args.kwargs["hint"]
+        executed_cql, executed_params = run_read.call_args.args[:2]
+        assert "n.ID IN $name_ids" in executed_cql and executed_params["name_ids"] == [1]
+
+    def test_unknown_name_answered_without_database(self, client, index):
+        cql = "MATCH (n:item) WHERE n.Name CONTAINS $name RETURN n LIMIT 100"
+        with patch("app.main.neo4j_client.get_schema", return_value={"labels": [], "relTypes": []}), \
+                patch("app.main.llm_client.generate_cypher", return_value=(cql, {"name": "石见"})), \
+                patch("app.main.neo4j_client.run_read") as run_read:
+            response = client.post("/nlq", json={"query": "石见是什么"})
+
+        assert response.status_code == 200
+        assert response.json()["graph"]["meta"]["didYouMean"] == {"石见": ["石剑"]}
+        run_read.assert_not_called()
+
+    def test_ws_unknown_name_answered_without_database(self, client, index):
+        cql = "MATCH (n:item) WHERE n.Name CONTAINS $name RETURN n LIMIT 100"
+        with patch("app.main.neo4j_client.get_schema", return_value={"labels": [], "relTypes": []}), \
+                patch("app.main.llm_client.generate_cypher", return_value=(cql, {"name": "石见"})), \
+                patch("app.main.neo4j_client.read_session"), \
+                patch("app.main.neo4j_client.run_read") as run_read:
+            with client.websocket_connect("/ws") as ws:
+                ws.send_json({"id": 1, "type": "nlq", "query": "石见是什么"})
+                delta = ws.receive_json()
+
+        assert delta["type"] == "delta" and delta["add"]["nodes"] == []
+        assert delta["meta"]["didYouMean"] == {"石见": ["石剑"]}
+        assert delta["table"] == {"columns": [], "rows": []}
+        run_read.assert_not_called()
+
+    def test_unknown_name_in_aggregate_still_queried(self, client, index):
+        cql = "MATCH (x:item) WHERE x.Name CONTAINS $name RETURN count(x) AS n"
+        with patch("app.main.neo4j_client.get_schema", return_value={"labels": [], "relTypes": []}), \
+                patch("app.main.llm_client.generate_cypher", return_value=(cql, {"name": "石见"})), \
+                patch("app.main.explain_safe", return_value=(True, None)), \
+                patch("app.main.neo4j_client.run_read", return_value=([{"n": 0}], ["n"])) as run_read:
+            response = client.post("/nlq", json={"query": "有几个石见"})
+
+        assert response.status_code == 200
+        run_read.assert_called_once()
+        data = response.json()
+        assert data["table"] == {"columns": ["n"], "rows": [[0]]}
+        assert data["graph"]["meta"]["didYouMean"] == {"石见": ["石剑"]}
+
+    def test_unversioned_index_not_trusted(self, client, monkeypatch):
+        # 无导入戳且不按时间过期时索引可能早已过期：不锚定、不短路，照常查询数据库
+        from app.entity_index import EntityIndex, entity_index
+
+        monkeypatch.setattr(settings, "ENTITY_INDEX_ENABLED", True)
+        monkeypatch.setattr(settings, "STATS_CACHE_TTL_S", 0)
+        monkeypatch.setattr(entity_index, "index", EntityIndex([{"id": 2, "name": "石剑", "labels": ["item"]}], ""))
+        cql = "MATCH (n:item) WHERE n.Name CONTAINS $name RETURN n LIMIT 100"
+        with patch("app.main.neo4j_client.get_schema", return_value={"labels": [], "relTypes": []}), \
+                patch("app.main.llm_client.generate_cypher", return_value=(cql, {"name": "石见"})), \
+                patch("app.main.explain_safe", return_value=(True, None)), \
+                patch("app.main.neo4j_client.run_read", return_value=([], ["n"])) as run_read:
+            response = client.post("/nlq", json={"query": "新加的石见"})
+
+        assert response.status_code == 200
+        assert "didYouMean" not in response.json()["graph"]["meta"]
+        assert run_read.call_args.args[0] == cql
+
+
+class TestSuggestEndpoint:
+    """测试 /suggest 输入联想"""
+
+    def test_suggest_from_entity_index(self, client, monkeypatch):
+        from app.data_version import result_version
+        from app.entity_index import EntityIndex, entity_index
+
+        monkeypatch.setattr(settings, "ENTITY_INDEX_ENABLED", True)
+        rows = [{"id": 1, "name": "木料", "labels": ["item"], "degree": 3},
+                {"id": 2, "name": "精制木料", "labels": ["item"], "degree": 9}]
+        monkeypatch.setattr(entity_index, "index", EntityIndex(rows, result_version()))
+        with patch("app.main.neo4j_client.run_read") as run_read:
+            response = client.get("/suggest", params={"q": "木料"})
+
+        assert response.status_code == 200
+        assert [s["name"] for s in response.json()["suggestions"]] == ["木料", "精制木料"]
+        run_read.assert_not_called()
+
+    def test_empty_when_index_disabled(self, client):
+        response = client.get("/suggest", params={"q": "木"})
+        assert response.status_code == 200
+        assert response.json() == {"q": "木", "suggestions": []}
+
+
+class TestExportEndpoint:
+    """测试 /export 流式导出"""
+
+    def test_post_streams_csv(self, client):
+        from contextlib import contextmanager
+        calls = {}
+
+        @contextmanager
+        def stream_read(cql, params=None, timeout_ms=None):
+            calls["timeout_ms"] = timeout_ms
+            yield ["name", "prob"], ({"name": f"掉落{i}", "prob": i} for i in range(5))
+            calls["closed"] = True
+
+        with patch("app.main.neo4j_client.stream_read", stream_read):
+            with patch("app.main.explain_safe", return_value=(True, None)):
+                response = client.post("/export", json={"cql": "MATCH (n) RETURN n.Name AS name, n.p AS prob", "max_rows": 3})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="export.csv"' in response.headers["content-disposition"]
+        lines = response.content.decode("utf-8-sig").splitlines()
+        assert lines == ["name,prob", "掉落0,0", "掉落1,1", "掉落2,2"]
+        assert calls == {"timeout_ms": settings.EXPORT_TIMEOUT_MS, "closed": True}
+
+    def test_get_jsonl_with_params(self, client):
+        from contextlib import contextmanager
+
+        @contextmanager
+        def stream_read(cql, params=None, timeout_ms=None):
+            yield ["id"], iter([{"id": params["id"]}])
+
+        with patch("app.main.neo4j_client.stream_read", stream_read):
+            with patch("app.main.explain_safe", return_value=(True, None)):
+                response = client.get("/export", params={
+                    "cql": "MATCH (n {ID: $id}) RETURN n.ID AS id", "params": '{"id": 7}', "format": "jsonl"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.text == '{"id":7}\n'
+
+    def test_rejects_write_and_missing_params(self, client):
+        assert client.post("/export", json={"cql": "MATCH (n) DETACH DELETE n"}).status_code == 400
+        with patch("app.main.explain_safe", return_value=(True, None)):
+            response = client.get("/export", params={"cql": "MATCH (n {ID: $id}) RETURN n"})
+        assert response.status_code == 400
+        assert response.json()["detail"]["missing"] == ["id"]
+
+
+class TestAdmission:
+    """测试过载时的快速失败"""
+
+    def test_overloaded_returns_429_with_retry_after(self, client):
+        from unittest.mock import AsyncMock
+        from app.admission import Overloaded
+
+        full = AsyncMock(side_effect=Overloaded("neo4j", 429, 3))
+        with patch("app.admission.Limiter.acquire", full):
+            with patch("app.main.is_readonly_cql", return_value=(True, None)):
+                with patch("app.main.explain_safe", return_value=(True, None)):
+                    response = client.post("/run-cql", json={"cql": "MATCH (n) RETURN n"})
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "3"
+        assert response.json()["detail"]["resource"] == "neo4j"
+
+
+class TestStatsEndpoint:
+    """测试 /stats 端点"""
+
+    @patch("app.main.neo4j_client.get_schema")
+    @patch("app.main.neo4j_client.run_read")
+    def test_stats(self, mock_run_read, mock_get_schema, client):
+        from app import stats
+        stats._cache.update(version=None, at=0.0, snapshot=None)
+        mock_get_schema.return_value = {"labels": ["item"], "relTypes": ["DROPS"]}
+        def run_read(cql, params=None):
+            if "labels(n) AS labels" in cql:
+                return [{"labels": ["item"], "c": 3}], ["labels", "c"]
+            if "AS degree" in cql:
+                return [{"degree": 1, "c": 3}], ["degree", "c"]
+            return [{"c": 3}], ["c"]
+        mock_run_read.side_effect = run_read
+
+        response = client.get("/stats")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["totals"]["nodes"] == 3
+        assert data["labels"] == {"item": 3}
+        assert data["relationshipTypes"] == {"DROPS": 3}
+
+        # 数据版本未变化时直接返回缓存
+        calls = mock_run_read.call_count
+        client.get("/stats")
+        assert mock_run_read.call_count == calls
+        stats._cache.update(version=None, at=0.0, snapshot=None)
+
+    @patch("app.main.neo4j_client.get_schema")
+    @patch("app.main.neo4j_client.run_read")
+    def test_refresh_requires_token(self, mock_run_read, mock_get_schema, client, monkeypatch):
+        from app import stats
+        mock_get_schema.return_value = {"labels": [], "relTypes": []}
+        mock_run_read.side_effect = lambda cql, params=None: ([], [])
+        assert client.get("/stats", params={"refresh": "true"}).status_code == 403
+        monkeypatch.setattr(settings, "PROFILE_TOKEN", "secret")
+        assert client.get("/stats", params={"refresh": "true"}).status_code == 403
+        mock_run_read.assert_not_called()
+        response = client.get("/stats", params={"refresh": "true"}, headers={"X-Profile-Token": "secret"})
+        assert response.status_code == 200
+        stats._cache.update(version=None, at=0.0, snapshot=None)
+
+
 class TestNLQEndpoint:
     """测试自然语言查询端点 /nlq"""
 
@@ -147,6 +667,31 @@ class TestNLQEndpoint:
         assert "cql" in data
         assert "graph" in data
 
+    @patch("app.main.neo4j_client.get_schema")
+    @patch("app.main.llm_client.generate_cypher")
+    @patch("app.main.is_readonly_cql")
+    @patch("app.main.explain_safe")
+    @patch("app.main.neo4j_client.run_read")
+    def test_nlq_fast_response_keeps_schema(
+        self, mock_run_read, mock_explain_safe,
+        mock_is_readonly, mock_generate_cypher, mock_get_schema, client
+    ):
+        """测试快速序列化路径：字段与 NLQResponse 一致，中文不转义"""
+        mock_get_schema.return_value = {"labels": ["item"], "relTypes": []}
+        mock_generate_cypher.return_value = ("MATCH (n:item) RETURN n LIMIT 10", {})
+        mock_is_readonly.return_value = (True, None)
+        mock_explain_safe.return_value = (True, None)
+        mock_run_read.return_value = ([{"n": {"ID": 101, "Name": "木料"}}], ["n"])
+
+        response = client.post("/nlq", json={"query": "木料"})
+
+        assert response.status_code == 200
+        assert "木料".encode("utf-8") in response.content
+        data = response.json()
+        assert set(data) == {"cql", "params", "graph", "raw", "keys", "table"}
+        assert data["graph"]["meta"]["nodeCount"] == 1
+        assert data["graph"]["categories"] == [{"name": "item"}]
+
     @patch("app.main.neo4j_client.get_schema")
     @patch("app.main.llm_client.generate_cypher")
     def test_nlq_llm_fails(self, mock_generate_cypher, mock_get_schema, client):
@@ -0,0 +1,31 @@
+"""
+测试热点函数基准 (benchmarks/bench_hotpaths.py) 的用例生成与回退判定
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from bench_hotpaths import CALIBRATION, build_cases, compare, measure  # noqa: E402
+
+
+class TestBenchHotpaths:
+    def test_cases_run_at_small_scale(self):
+        cases = build_cases(scale=0.01)
+        assert {"records_to_graph.paths_data", "build_table.wide", "is_readonly_cql.long"} <= set(cases)
+        results = measure({name: fn for name, fn in cases.items() if name != CALIBRATION}, repeat=1)
+        assert all(r["timeMs"] >= 0 and r["peakKb"] > 0 for r in results.values())
+
+    def test_compare_flags_time_and_memory(self):
+        baseline = {"a": {"timeMs": 10.0, "peakKb": 100.0}, "b": {"timeMs": 10.0, "peakKb": 100.0}}
+        results = {"a": {"timeMs": 14.0, "peakKb": 100.0}, "b": {"timeMs": 10.0, "peakKb": 120.0},
+                   "new": {"timeMs": 99.0, "peakKb": 999.0}}
+        flagged = {(name, metric) for name, metric, _ in compare(results, baseline, 0.25, 0.10)}
+        assert flagged == {("a", "timeMs"), ("b", "peakKb")}
+        assert [(n, m) for n, m, _ in compare(results, baseline, 0.25, 0.10, skip_time=True)] == [("b", "peakKb")]
+
+    def test_compare_scales_time_by_calibration(self):
+        # 整机变慢一倍时，被测用例同样慢一倍不算回退
+        baseline = {CALIBRATION: {"timeMs": 10.0, "peakKb": 1.0}, "a": {"timeMs": 10.0, "peakKb": 1.0}}
+        results = {CALIBRATION: {"timeMs": 20.0, "peakKb": 1.0}, "a": {"timeMs": 20.0, "peakKb": 1.0}}
+        assert compare(results, baseline, 0.25, 0.10) == []
@@ -0,0 +1,111 @@
+"""
+测试 neo4j-admin 离线导入文件生成 (import_minigradb.bulk_export)
+"""
+import csv
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import import_minigradb as im  # noqa: E402
+
+
+def write(path, text):
+    path.write_text(text.strip() + "\n", encoding="utf-8")
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    src = tmp_path / "export"
+    src.mkdir()
+    write(src / "nodes_items.csv", """
+ID,Name,Type,Disc,GetWay,EggItemID
+1,木料,1.0,,,13011.0
+2,石块,,"带,逗号的描述",,
+2,石块重复,,,,
+,无 ID,,,,
+""")
+    write(src / "nodes_blocks.csv", """
+ID,MineTool,ToolLevel
+2,1,2
+5,1,1
+""")
+    write(src / "nodes_recipes.csv", """
+ID,IsFollowMe,StationLabel
+100,0,工作台
+""")
+    write(src / "rel_recipe_produces.csv", """
+recipeId,targetId,count
+100,1,2
+100,99,1
+101,1,1
+""")
+    write(src / "rel_block_handminedrops.csv", """
+blockId,itemId,Prob,CountMin,CountMax
+2,1,100,1,1
+1,2,100,1,1
+""")
+    return src
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+class TestBulkExport:
+    """测试节点合并、悬空端点过滤与报告计数"""
+
+    def test_node_space_merges_extra_labels(self, export_dir, tmp_path):
+        out = tmp_path / "bulk"
+        report = im.bulk_export(im.IMPORT_SPEC, export_dir, out)
+
+        header = read_rows(out / "nodes_item_header.csv")[0]
+        assert header[0] == "ID:ID(item)"
+        assert header[-1] == ":LABEL"
+        assert "MineTool:double" in header
+
+        rows = {r[0]: r for r in read_rows(out / "nodes_item.csv")}
+        assert set(rows) == {"1", "2", "5"}
+        assert rows["1"][-1] == "item"
+        assert rows["2"][-1] == "item;block"
+        assert rows["2"][header.index("Disc:string")] == "带,逗号的描述"
+        # 只出现在 blocks 中的 ID 也生成 :item:block 节点
+        assert rows["5"][-1] == "item;block"
+
+        stats = report["nodes"]["item"]
+        assert stats["nodes"] == 3
+        assert stats["duplicates"] == 1
+        assert stats["skippedNoId"] == 1
+        assert stats["labels"] == {"item": 3, "block": 2}
+
+    def test_dangling_relationships_filtered(self, export_dir, tmp_path):
+        out = tmp_path / "bulk"
+        report = im.bulk_export(im.IMPORT_SPEC, export_dir, out)
+
+        assert read_rows(out / "rels_PRODUCES_header.csv")[0] == [
+            ":START_ID(recipe)", "Count:string", ":END_ID(item)", ":TYPE"]
+        assert read_rows(out / "rels_PRODUCES.csv") == [["100", "2", "1", "PRODUCES"]]
+        produces = report["relationships"]["PRODUCES"]
+        assert produces["sourceRows"] == 3
+        assert produces["dangling"] == 2
+
+        # block 端点必须带 :block 标签，item 1 不是方块
+        drops = report["relationships"]["HAND_MINE_DROPS"]
+        assert drops["relationships"] == 1
+        assert drops["danglingSamples"] == [[1, 2]]
+        assert read_rows(out / "rels_HAND_MINE_DROPS_header.csv")[0][0] == ":START_ID(item)"
+
+    def test_report_written(self, export_dir, tmp_path):
+        out = tmp_path / "bulk"
+        im.bulk_export(im.IMPORT_SPEC, export_dir, out)
+
+        report = json.loads((out / "bulk_report.json").read_text(encoding="utf-8"))
+        assert report["command"].startswith("neo4j-admin database import full")
+        assert "--nodes=nodes_item_header.csv,nodes_item.csv" in report["command"]
+        assert "--relationships=rels_PRODUCES_header.csv,rels_PRODUCES.csv" in report["command"]
+        # 源文件不存在的关系类型不出现在报告里
+        assert "DROPS" not in report["relationships"]
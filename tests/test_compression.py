@@ -0,0 +1,110 @@
+"""
+测试响应协商与压缩 (compression.py)
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import compression
+from app.compression import CompressionMiddleware, choose_encoding, wants_msgpack
+from app.config import settings
+from app.serialization import FastJSONResponse
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, paths=("/q",))
+
+    @app.get("/q/big")
+    def big():
+        return FastJSONResponse({"nodes": [{"name": "木料", "category": "item"}] * 500})
+
+    @app.get("/q/small")
+    def small():
+        return FastJSONResponse({"ok": True})
+
+    @app.get("/q/stream")
+    def stream():
+        def gen():
+            for i in range(50):
+                yield ('{"row": %d, "name": "木料"}\n' % i).encode("utf-8")
+        return StreamingResponse(gen(), media_type="application/x-ndjson")
+
+    @app.get("/other")
+    def other():
+        return FastJSONResponse({"nodes": [{"name": "木料"}] * 500})
+
+    return app
+
+
+@pytest.fixture
+def client():
+    return TestClient(make_app())
+
+
+class TestNegotiation:
+    """测试 Accept / Accept-Encoding 解析"""
+
+    def test_choose_encoding_prefers_server_order(self, monkeypatch):
+        monkeypatch.setattr(settings, "COMPRESSION_ENCODINGS", "gzip")
+        assert choose_encoding("gzip, br") == "gzip"
+        assert choose_encoding("identity") is None
+
+    def test_choose_encoding_respects_q_zero(self, monkeypatch):
+        monkeypatch.setattr(settings, "COMPRESSION_ENCODINGS", "gzip")
+        assert choose_encoding("gzip;q=0, *") is None
+
+    def test_wants_msgpack(self):
+        assert wants_msgpack("application/msgpack")
+        assert not wants_msgpack("application/json")
+        assert not wants_msgpack("application/json, application/msgpack;q=0.5")
+        assert not wants_msgpack("")
+
+
+class TestCompressionMiddleware:
+    """测试压缩中间件"""
+
+    def test_gzip_large_response(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "COMPRESSION_ENCODINGS", "gzip")
+        before = dict(compression.stats)
+        resp = client.get("/q/big", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        assert resp.headers["vary"] == "Accept, Accept-Encoding"
+        assert resp.json()["nodes"][0]["name"] == "木料"
+        assert compression.stats["responses"] == before["responses"] + 1
+        saved = (compression.stats["bytesIn"] - before["bytesIn"]) - (compression.stats["bytesOut"] - before["bytesOut"])
+        assert saved > 0
+
+    def test_brotli(self, client, monkeypatch):
+        pytest.importorskip("brotli")
+        monkeypatch.setattr(settings, "COMPRESSION_ENCODINGS", "br,gzip")
+        resp = client.get("/q/big", headers={"Accept-Encoding": "br, gzip"})
+        assert resp.headers["content-encoding"] == "br"
+        assert len(resp.json()["nodes"]) == 500
+
+    def test_small_response_not_compressed(self, client):
+        resp = client.get("/q/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in resp.headers
+        assert resp.json() == {"ok": True}
+        # 未压缩的小响应同样随 Accept / Accept-Encoding 变化
+        assert resp.headers["vary"] == "Accept, Accept-Encoding"
+
+    def test_streaming_response_compressed(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "COMPRESSION_ENCODINGS", "gzip")
+        resp = client.get("/q/stream", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        lines = resp.text.strip().split("\n")
+        assert len(lines) == 50
+
+    def test_unlisted_path_untouched(self, client):
+        resp = client.get("/other", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in resp.headers
+
+    def test_msgpack_encoding(self, client):
+        msgpack = pytest.importorskip("msgpack")
+        resp = client.get("/q/small", headers={"Accept": "application/msgpack"})
+        assert resp.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(resp.content) == {"ok": True}
+        assert resp.headers["vary"] == "Accept, Accept-Encoding"
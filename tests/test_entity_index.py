@@ -0,0 +1,168 @@
+"""
+测试实体名称的 n-gram 索引 (entity_index.py)
+"""
+import random
+import time
+from unittest.mock import patch
+
+from app import entity_index as ei
+from app.entity_index import EntityIndex, EntityIndexHolder, anchor_on_ids, mention_hint, result_must_be_empty
+
+
+ROWS = [
+    {"id": 1, "name": "木料", "labels": ["item"]},
+    {"id": 2, "name": "石剑", "labels": ["item"]},
+    {"id": 3, "name": "工匠台", "labels": ["item", "block"]},
+    {"id": 4, "name": "精制木料", "labels": ["item"]},
+    {"id": 5, "name": "野人", "labels": ["item", "monster"]},
+    {"id": 7, "name": "木料", "labels": ["recipe"]},
+    {"id": 8, "name": "火", "labels": ["item"]},
+]
+
+
+def make_index():
+    return EntityIndex(ROWS, version="v1")
+
+
+class TestEntityIndex:
+    def test_contains_matches_brute_force(self):
+        rnd = random.Random(0)
+        alphabet = "木料石剑工匠台精制野人火"
+        rows = [{"id": i, "name": "".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 5))), "labels": ["item"]}
+                for i in range(300)]
+        index = EntityIndex(rows)
+        for term in ["木", "木料", "石剑工", "野人火", "匠台精", "不存在"]:
+            expected = sorted({r["name"] for r in rows if term in r["name"]})
+            assert sorted(index.names[i] for i in index.contains(term)) == expected
+
+    def test_same_name_entities_merged(self):
+        index = make_index()
+        assert len(index) == 6 and index.entity_count == 7
+        assert index.lookup("木料") == [(1, ("item",)), (7, ("recipe",))]
+
+    def test_resolve_prefers_longest_mentions(self):
+        mentions = make_index().resolve("精制木料和石剑哪个更适合打野人")
+        assert [(m["name"], m["start"]) for m in mentions] == [("精制木料", 0), ("石剑", 5), ("野人", 13)]
+        # 单字名称默认不识别，避免“火”之类的字在问句中大量误报
+        assert make_index().resolve("火把怎么做") == []
+        assert "木料（item ID=1，recipe ID=7）" in mention_hint(make_index().resolve("木料"))
+
+    def test_did_you_mean(self):
+        index = make_index()
+        assert index.did_you_mean("石见")[0] == "石剑"
+        assert index.did_you_mean("工匠桌")[0] == "工匠台"
+        assert index.did_you_mean("完全无关") == []
+
+
+class TestSuggest:
+    ROWS = [
+        {"id": 1, "name": "木料", "labels": ["item"], "degree": 50},
+        {"id": 2, "name": "木棍", "labels": ["item"], "degree": 80},
+        {"id": 3, "name": "木", "labels": ["item"], "degree": 1},
+        {"id": 4, "name": "精制木料", "labels": ["item"], "degree": 200},
+        {"id": 5, "name": "木精", "labels": ["item", "monster"], "degree": 10},
+        {"id": 6, "name": "木料", "labels": ["block"], "degree": 30},
+        {"id": 7, "name": "木质", "labels": ["group"], "degree": 999},
+    ]
+
+    def test_exact_then_prefix_then_substring_by_popularity(self):
+        suggestions = EntityIndex(self.ROWS).suggest("木")
+        assert [(s["name"], s["match"]) for s in suggestions] == [
+            ("木", "exact"), ("木料", "prefix"), ("木棍", "prefix"), ("木精", "prefix"), ("精制木料", "substring")]
+        # 同名实体的热度累加，标签合并；分组等不在联想范围内的标签不出现
+        assert suggestions[1] == {"name": "木料", "labels": ["block", "item"], "popularity": 80, "match": "prefix"}
+
+    def test_limit_and_label_filter(self):
+        index = EntityIndex(self.ROWS)
+        assert [s["name"] for s in index.suggest("木", limit=2)] == ["木", "木料"]
+        assert [s["name"] for s in index.suggest("木", labels=["monster"])] == ["木精"]
+        assert index.suggest("  ") == [] and index.suggest("石") == []
+
+    def test_matches_brute_force_on_large_index(self):
+        # 前缀候选超过 _PREFIX_SORT_MAX 时走倒排表扫描，结果应与逐个比较一致
+        rnd = random.Random(1)
+        alphabet = "木料石剑工匠台"
+        rows = [{"id": i, "name": "".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 6))),
+                 "labels": [rnd.choice(["item", "block", "monster"])], "degree": rnd.randint(0, 100)}
+                for i in range(3000)]
+        index = EntityIndex(rows)
+        for term in ["木", "木料", "石剑工", "台台"]:
+            got = [s["name"] for s in index.suggest(term, limit=20)]
+            ranked = sorted((i for i in range(len(index)) if term in index.names[i]),
+                            key=lambda i: (index.names[i] != term, not index.names[i].startswith(term),
+                                           index._rank[i]))
+            assert got == [index.names[i] for i in ranked[:20]]
+
+
+class TestAnchorOnIds:
+    def test_rewrites_contains_to_id_lookup(self):
+        cql = "MATCH path = (n:item) WHERE n.Name CONTAINS $name AND NOT n:monster RETURN path LIMIT 100"
+        out, params, unknown = anchor_on_ids(cql, {"name": "木料"}, make_index(), max_ids=10)
+        assert "(n.ID IN $name_ids AND n.Name CONTAINS $name)" in out
+        assert params == {"name": "木料", "name_ids": [1, 4, 7]} and unknown == []
+
+    def test_too_many_ids_left_alone(self):
+        cql = "MATCH (n) WHERE n.Name CONTAINS $name RETURN n"
+        assert anchor_on_ids(cql, {"name": "木料"}, make_index(), max_ids=2)[0] == cql
+
+    def test_unknown_only_when_result_must_be_empty(self):
+        index = make_index()
+        cql = "MATCH (n:item) WHERE n.Name CONTAINS $name AND NOT n:block RETURN n"
+        assert anchor_on_ids(cql, {"name": "石见"}, index, 10)[2] == ["石见"]
+        for other in ["OPTIONAL MATCH (n:item) WHERE n.Name CONTAINS $name RETURN n",
+                      "MATCH (n:item) WHERE n.Name CONTAINS $name OR n.ID = 1 RETURN n",
+                      "MATCH (n:item) WHERE NOT n.Name CONTAINS $name RETURN n"]:
+            assert anchor_on_ids(other, {"name": "石见"}, index, 10)[2] == []
+
+    def test_aggregate_result_not_empty(self):
+        # count / collect 在没有匹配行时仍返回一行，名称未知也要查询数据库
+        cql = "MATCH (x:item) WHERE x.Name CONTAINS $name RETURN count(x) AS n"
+        assert anchor_on_ids(cql, {"name": "石见"}, make_index(), 10)[2] == ["石见"]
+        assert not result_must_be_empty(cql)
+        assert not result_must_be_empty("MATCH (x) WHERE x.Name CONTAINS $n WITH collect(x) AS xs RETURN size(xs)")
+        assert result_must_be_empty("MATCH (x:item) WHERE x.Name CONTAINS $name RETURN x.Name, x.ID LIMIT 10")
+
+
+class TestEntityIndexHolder:
+    def test_rebuilds_in_background_after_version_change(self, monkeypatch):
+        monkeypatch.setattr(ei.settings, "ENTITY_INDEX_ENABLED", True)
+        rows = [dict(ROWS[0])]
+        holder = EntityIndexHolder(lambda: list(rows))
+        with patch.object(ei, "result_version", return_value="v1"):
+            first = holder.refresh()
+            assert holder.current() is first
+        rows.append(dict(ROWS[1]))
+        with patch.object(ei, "result_version", return_value="v2"):
+            # 重建期间继续返回旧索引
+            assert holder.current() is first
+            deadline = time.time() + 2
+            while holder.index is first and time.time() < deadline:
+                time.sleep(0.01)
+            assert holder.index.version == "v2" and holder.index.lookup("石剑")
+
+    def test_rebuilds_on_ttl_without_import_stamp(self, tmp_path, monkeypatch):
+        # 没有导入戳（外部写入 / neo4j-admin import）时索引按 STATS_CACHE_TTL_S 到期重建
+        from app import data_version
+
+        monkeypatch.setattr(ei.settings, "ENTITY_INDEX_ENABLED", True)
+        monkeypatch.setattr(ei.settings, "IMPORT_STATE_DIR", str(tmp_path))
+        monkeypatch.setattr(ei.settings, "STATS_CACHE_TTL_S", 60)
+        now = {"t": 6000.0}
+        monkeypatch.setattr(data_version.time, "time", lambda: now["t"])
+        rows = [dict(ROWS[0])]
+        holder = EntityIndexHolder(lambda: list(rows))
+        first = holder.refresh()
+        assert first.version and holder.current() is first
+        rows.append(dict(ROWS[1]))
+        now["t"] += 60
+        holder.current()
+        deadline = time.time() + 2
+        while holder.index is first and time.time() < deadline:
+            time.sleep(0.01)
+        assert holder.index.lookup("石剑")
+
+    def test_disabled_returns_none(self, monkeypatch):
+        monkeypatch.setattr(ei.settings, "ENTITY_INDEX_ENABLED", False)
+        holder = EntityIndexHolder(lambda: ROWS)
+        holder.refresh()
+        assert holder.current() is None
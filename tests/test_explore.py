@@ -0,0 +1,71 @@
+"""
+测试 /ws 探索会话的服务端状态与增量计算 (explore.py)
+"""
+from app.explore import ExplorationState, link_key
+
+
+def node(nid, category="item"):
+    return {"id": nid, "name": nid, "category": category}
+
+
+def link(src, tgt, label="PRODUCES"):
+    return {"source": src, "target": tgt, "label": label}
+
+
+class TestExplorationState:
+    """测试合并、替换、过滤与重置"""
+
+    def test_merge_returns_only_new(self):
+        state = ExplorationState()
+        first = state.merge([node("a"), node("b")], [link("a", "b")])
+        assert [n["id"] for n in first["add"]["nodes"]] == ["a", "b"]
+        assert first["add"]["links"][0]["id"] == "a->b:PRODUCES"
+
+        second = state.merge([node("b"), node("c")], [link("a", "b"), link("b", "c")])
+        assert [n["id"] for n in second["add"]["nodes"]] == ["c"]
+        assert [l["id"] for l in second["add"]["links"]] == ["b->c:PRODUCES"]
+        assert second["remove"] == {"nodes": [], "links": []}
+        assert second["meta"] == {"nodeCount": 3, "linkCount": 2}
+
+    def test_replace_removes_missing(self):
+        state = ExplorationState()
+        state.merge([node("a"), node("b"), node("c")], [link("a", "b"), link("b", "c")])
+        delta = state.merge([node("b"), node("c")], [link("b", "c")], replace=True)
+        assert delta["add"] == {"nodes": [], "links": []}
+        assert delta["remove"] == {"nodes": ["a"], "links": ["a->b:PRODUCES"]}
+        assert state.known_ids() == ["b", "c"]
+
+    def test_update_returns_retained_nodes(self):
+        state = ExplorationState()
+        state.merge([node("a"), node("b")], [])
+        plain = state.merge([node("b"), node("c")], [], replace=True)
+        assert "update" not in plain
+        delta = state.merge([{**node("b"), "x": 1.0, "y": 2.0}, {**node("c"), "x": 3.0, "y": 4.0}], [],
+                            replace=True, update=True)
+        assert delta["add"]["nodes"] == []
+        assert delta["update"]["nodes"] == [{**node("b"), "x": 1.0, "y": 2.0}, {**node("c"), "x": 3.0, "y": 4.0}]
+
+    def test_drop_and_dangling_links(self):
+        state = ExplorationState()
+        state.merge([node("agg", "Aggregate"), node("a")], [link("a", "agg")])
+        delta = state.merge([node("x")], [link("a", "x"), link("zz", "x")], drop=["agg"])
+        assert delta["remove"] == {"nodes": ["agg"], "links": ["a->agg:PRODUCES"]}
+        # 端点不在状态中的边不下发
+        assert [l["id"] for l in delta["add"]["links"]] == ["a->x:PRODUCES"]
+
+    def test_filter_and_reset(self):
+        state = ExplorationState()
+        state.merge([node("a"), node("r", "recipe")], [link("r", "a")])
+        delta = state.filter(exclude=["recipe"])
+        assert delta["remove"] == {"nodes": ["r"], "links": ["r->a:PRODUCES"]}
+        assert delta["categories"] == [{"name": "item"}]
+        assert state.filter(keep=["item"])["remove"]["nodes"] == []
+        assert state.reset()["remove"]["nodes"] == ["a"]
+        assert state.known_ids() == []
+
+    def test_history_bounded(self):
+        state = ExplorationState(history=2)
+        for i in range(3):
+            state.remember(f"RETURN {i}", None)
+        assert [h["cql"] for h in state.history] == ["RETURN 1", "RETURN 2"]
+        assert link_key(link("a", "b", "X")) == "a->b:X"
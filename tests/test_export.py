@@ -0,0 +1,40 @@
+"""
+测试流式导出的行编码 (export.py)
+"""
+import csv
+import io
+import json
+
+from app.export import export_chunks
+
+
+def rows(n):
+    return ({"name": f"物品{i}", "prob": i / 10, "tags": ["a", "b"]} for i in range(n))
+
+
+class TestExportChunks:
+    """测试 CSV / JSON Lines 编码、分块与行数上限"""
+
+    def test_csv(self):
+        body = b"".join(export_chunks("csv", ["name", "prob", "tags"], rows(3), max_rows=10)).decode("utf-8")
+        assert body.startswith("\ufeff")
+        parsed = list(csv.reader(io.StringIO(body.lstrip("\ufeff"))))
+        assert parsed[0] == ["name", "prob", "tags"]
+        assert parsed[2] == ["物品1", "0.1", '["a","b"]']
+        assert len(parsed) == 4
+
+    def test_jsonl(self):
+        body = b"".join(export_chunks("jsonl", ["name", "prob"], rows(2), max_rows=10)).decode("utf-8")
+        lines = [json.loads(line) for line in body.splitlines()]
+        assert lines == [{"name": "物品0", "prob": 0.0}, {"name": "物品1", "prob": 0.1}]
+
+    def test_chunked_and_capped(self):
+        done = []
+        source = rows(1000)
+        chunks = list(export_chunks("jsonl", ["name"], source, max_rows=500, chunk_bytes=1024, on_done=done.append))
+        assert len(chunks) > 1
+        assert all(len(c) < 2048 for c in chunks)
+        assert sum(c.count(b"\n") for c in chunks) == 500
+        assert done == [500]
+        # 达到上限后不再继续读取游标
+        assert next(source)["name"] == "物品501"
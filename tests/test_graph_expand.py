@@ -0,0 +1,75 @@
+"""
+测试邻居展开查询构造与增量过滤 (graph_expand.py)
+"""
+import pytest
+
+from app.graph_expand import build_expand_query, graph_delta
+from app.summarize import aggregate_id
+
+
+class TestBuildExpandQuery:
+    """测试展开查询构造"""
+
+    def test_element_id_anchor(self):
+        cql, params = build_expand_query("4:abc:42")
+        assert "elementId(n) = $id" in cql
+        assert "(n)-[r]-(m)" in cql
+        assert params["id"] == "4:abc:42"
+        assert params["known"] == []
+
+    def test_dict_id_anchor_uses_label_and_id(self):
+        cql, params = build_expand_query("i:101", direction="out")
+        assert "MATCH (n:item {ID: $key})" in cql
+        assert "(n)-[r]->(m)" in cql
+        assert params["key"] == 101
+
+    def test_rel_type_filter_is_parameterized(self):
+        cql, params = build_expand_query("4:abc:42", rel_types=["CONSUMES"], direction="in")
+        assert "type(r) IN $types" in cql
+        assert "(n)<-[r]-(m)" in cql
+        assert params["types"] == ["CONSUMES"]
+
+    def test_aggregate_id_expands_group(self):
+        agg = aggregate_id("4:abc:42", "CONSUMES", "in", "recipe")
+        cql, params = build_expand_query(agg)
+        assert params["id"] == "4:abc:42"
+        assert params["types"] == ["CONSUMES"]
+        assert params["category"] == "recipe"
+        assert "(n)<-[r]-(m)" in cql
+
+    def test_anchorless_aggregate_rejected(self):
+        with pytest.raises(ValueError):
+            build_expand_query(aggregate_id("", "", "", "item"))
+
+    def test_limit_capped(self):
+        from app.config import settings
+        _, params = build_expand_query("i:1", limit=10 ** 9)
+        assert params["limit"] == settings.QUERY_HARD_LIMIT
+
+    def test_known_dict_ids_excluded_by_category_and_id(self):
+        cql, params = build_expand_query("i:101", known_ids=["i:101", "b:5", "4:abc:42"])
+        assert params["known"] == ["4:abc:42"]
+        assert params["known_keys"] == ["i:101", "b:5"]
+        assert "+ ':' + toString(m.ID) IN $known_keys" in cql
+
+    def test_generic_category_matches_unlabeled_nodes(self):
+        cql, params = build_expand_query(aggregate_id("4:abc:42", "CONSUMES", "in", "Node"))
+        assert "size(labels(m)) = 0" in cql
+        assert params["category"] == "Node"
+
+    def test_query_is_readonly(self):
+        from app.cql_validator import is_readonly_cql
+        cql, _ = build_expand_query("4:abc:42", rel_types=["DROPS"], known_ids=["i:1"])
+        assert is_readonly_cql(cql) == (True, None)
+
+
+class TestGraphDelta:
+    """测试增量过滤"""
+
+    def test_known_nodes_removed(self):
+        records = [
+            {"n": {"ID": 1, "Name": "木料"}, "m": {"ID": 2, "Name": "木棍"}},
+            {"n": {"ID": 1, "Name": "木料"}, "m": {"ID": 3, "Name": "木门"}},
+        ]
+        nodes, links = graph_delta(records, ["i:1", "i:2"])
+        assert [n["id"] for n in nodes] == ["i:3"]
@@ -0,0 +1,236 @@
+"""
+测试事务导入的批大小自适应、检查点续传与增量清单 (import_minigradb)
+"""
+import csv
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import import_minigradb as im  # noqa: E402
+from backend.app.config import settings  # noqa: E402
+
+
+REL_SPEC = {"file": "rel_recipe_consumes.csv", "type": "CONSUMES",
+            "from": {"label": "recipe", "column": "recipeId"}, "to": {"label": "item", "column": "targetId"},
+            "properties": {"Count": {"from": "count", "type": "str"}}}
+
+
+class FakeEndpoints:
+    """recipe / item 的 ID 1~10 存在，其余 ID 为悬空端点"""
+
+    def ids(self, label):
+        return {i: f"4:{label}:{i}" for i in range(1, 11)}
+
+
+class FakeWriter:
+    """代替 _write_batch：记录写入的行；含 fail_on 中 Count 的批次第一次写入时抛出异常，模拟导入中断"""
+
+    def __init__(self, fail_on=()):
+        self.written = []
+        self.fail_on = set(fail_on)
+        self._lock = threading.Lock()
+
+    def __call__(self, driver, query, batch, batcher, on_commit=None, counter=None):
+        with self._lock:
+            if self.fail_on & {row["Count"] for row in batch}:
+                self.fail_on.clear()
+                raise RuntimeError("模拟中断")
+            self.written.extend(batch)
+        if on_commit is not None:
+            on_commit(len(batch), 0.001)
+        return len(batch)
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    """40 行关系：recipeId 1~12（11、12 悬空，共 6 行），Count 为行号"""
+    monkeypatch.setattr(settings, "IMPORT_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setattr(settings, "IMPORT_REL_WORKERS", 2)
+    with open(tmp_path / REL_SPEC["file"], "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["recipeId", "targetId", "count"])
+        for i in range(40):
+            writer.writerow([i % 12 + 1, i % 7 + 1, i])
+    return tmp_path
+
+
+def import_rels(export_dir, writer, monkeypatch, resume=False, manifest=None):
+    # 批大小固定为 2，每块 2 × 2 个分区 × 4 = 16 行
+    monkeypatch.setattr(im, "_write_batch", writer)
+    run = im.ImportRun(resume=resume, fmt="json")
+    batcher = im.AdaptiveBatcher(initial=2, target_ms=100, min_size=2, max_size=2)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        im.import_relationships(None, REL_SPEC, export_dir, batcher, pool, manifest=manifest, run=run,
+                                endpoints=FakeEndpoints())
+    return run
+
+
+class TestAdaptiveBatcher:
+    """测试批大小随实测提交耗时调整"""
+
+    def make(self, **kwargs):
+        return im.AdaptiveBatcher(**{"initial": 100, "target_ms": 100, "min_size": 10, "max_size": 1000, **kwargs})
+
+    def test_fast_commits_grow_batch(self):
+        batcher = self.make()
+        # 100 行 50ms：理想批大小 200，与当前值各取一半
+        batcher.record(100, 0.05)
+        assert batcher.size == 150
+
+    def test_slow_commits_shrink_batch(self):
+        batcher = self.make()
+        # 100 行 200ms：理想批大小 50
+        batcher.record(100, 0.2)
+        assert batcher.size == 75
+
+    def test_single_step_limited_to_factor_two(self):
+        grow, shrink = self.make(), self.make()
+        grow.record(100, 0.001)
+        shrink.record(100, 10.0)
+        assert grow.size == 150 and shrink.size == 75
+
+    def test_converges_to_target(self):
+        batcher = self.make()
+        for _ in range(30):
+            # 每行 0.5ms，目标 100ms 对应 200 行
+            batcher.record(batcher.size, batcher.size * 0.0005)
+        assert 195 <= batcher.size <= 200
+
+    def test_clamped_to_min_and_max(self):
+        small = self.make(min_size=90)
+        small.record(100, 10.0)
+        assert small.size == 90
+        large = self.make(max_size=120)
+        large.record(100, 0.001)
+        assert large.size == 120
+
+    def test_empty_or_zero_timing_ignored(self):
+        batcher = self.make()
+        batcher.record(0, 0.05)
+        batcher.record(100, 0.0)
+        assert batcher.size == 100
+
+    def test_batches_follow_current_size(self):
+        batcher = self.make(initial=3)
+        assert [len(b) for b in batcher.batches(range(8))] == [3, 3, 2]
+
+
+class TestDeltaManifest:
+    """测试增量导入的清单对比"""
+
+    def test_diff_nodes_add_change_delete(self):
+        old = {}
+        list(im._track_nodes([{"ID": 1, "Name": "木料"}, {"ID": 2, "Name": "石块"}, {"ID": 3, "Name": "火把"}], old))
+        new = {}
+        rows = [{"ID": 1, "Name": "木料"}, {"ID": 2, "Name": "圆石"}, {"ID": 4, "Name": "木棍"}]
+        upserts, deletes = im.diff_nodes(iter(rows), old, new)
+        assert upserts == [{"ID": 2, "Name": "圆石"}, {"ID": 4, "Name": "木棍"}]
+        assert deletes == [3]
+        assert set(new) == {"1", "2", "4"}
+
+    def test_diff_relationships_add_change_delete(self):
+        a = {"from_id": 1, "to_id": 2, "Count": "1"}
+        b = {"from_id": 1, "to_id": 3, "Count": "1"}
+        b_changed = {"from_id": 1, "to_id": 3, "Count": "2"}
+        c = {"from_id": 5, "to_id": 6, "Count": "1"}
+        old, new = {}, {}
+        list(im._track_relationships([a, a, b, c], old))
+        list(im._track_relationships([a, b_changed, c, {**c, "to_id": 7}], new))
+        deletes = im.diff_relationships(old, new)
+        assert sorted((d["to_id"], d["props"]["Count"], d["n"]) for d in deletes) == [(2, "1", 1), (3, "1", 1)]
+        assert list(im.delta_relationship_inserts(old, new)) == [b_changed, {**c, "to_id": 7}]
+
+    def test_detached_node_relationships_untracked(self):
+        # 删除 item 2 时 DETACH DELETE 也删掉了它的关系，清单不能再记录这些关系
+        manifest = {}
+        list(im._track_relationships([{"from_id": 1, "to_id": 2, "Count": "1"},
+                                      {"from_id": 1, "to_id": 3, "Count": "1"}], manifest))
+        spaces = im.id_spaces(im.IMPORT_SPEC)
+        assert im.untrack_detached(REL_SPEC, manifest, {"item": {2}}, spaces) == 1
+        assert [row["to_id"] for _, row in manifest.values()] == [3]
+        # block 与 item 共用 ID 空间：删除 item 节点同样影响以 block 为起点的关系
+        block_spec = {**REL_SPEC, "from": {"label": "block", "column": "blockId"}}
+        assert im.untrack_detached(block_spec, manifest, {"item": {1}}, spaces) == 1
+        assert manifest == {}
+
+    def test_resume_untracks_dangling_rows_of_committed_chunks(self, export_dir, monkeypatch):
+        # 第二块写入中途中断；继续导入时前一块的悬空行也要从新清单中移除，悬空计数不重复
+        with pytest.raises(RuntimeError):
+            import_rels(export_dir, FakeWriter(fail_on={"20"}), monkeypatch)
+        manifest = {}
+        run = import_rels(export_dir, FakeWriter(), monkeypatch, resume=True, manifest=manifest)
+        assert sorted(int(row["Count"]) for _, row in manifest.values()) == [
+            i for i in range(40) if i % 12 + 1 <= 10]
+        assert run.state["files"][REL_SPEC["file"]]["dangling"] == 6
+
+
+class TestCheckpointResume:
+    """测试全量导入的检查点与从断点继续"""
+
+    def test_commit_partition_saved_atomically(self, export_dir):
+        run = im.ImportRun()
+        run.update("rel.csv", rows=16, chunk={"size": 16, "workers": 2, "partitions": {"0": 0, "1": 0}})
+        run.commit_partition("rel.csv", 1, 4)
+        resumed = im.ImportRun(resume=True)
+        assert resumed.resumed
+        assert resumed.file_state("rel.csv") == {"rows": 16, "chunk": {"size": 16, "workers": 2,
+                                                                       "partitions": {"0": 0, "1": 4}}}
+        # 关闭检查点时不写文件
+        im.checkpoint_path().unlink()
+        im.ImportRun(checkpoint=False).update("rel.csv", rows=1)
+        assert not im.checkpoint_path().exists()
+
+    def test_resume_mid_chunk_writes_each_row_once(self, export_dir, monkeypatch):
+        first = FakeWriter(fail_on={"20"})
+        with pytest.raises(RuntimeError):
+            import_rels(export_dir, first, monkeypatch)
+        state = im.ImportRun(resume=True).file_state(REL_SPEC["file"])
+        # 第一块已完成，第二块中断在中途：记录了块大小、分区数与各分区已提交的行数
+        assert state["rows"] == 16
+        assert state["chunk"]["size"] == 16 and state["chunk"]["workers"] == 2
+        assert 0 < sum(state["chunk"]["partitions"].values()) < 16
+
+        second = FakeWriter()
+        import_rels(export_dir, second, monkeypatch, resume=True)
+        written = sorted(int(row["Count"]) for row in first.written + second.written)
+        assert written == [i for i in range(40) if i % 12 + 1 <= 10]
+
+    def test_finished_file_skipped_but_tracked(self, export_dir, monkeypatch):
+        im.ImportRun().update(REL_SPEC["file"], done=True)
+        writer, manifest = FakeWriter(), {}
+        import_rels(export_dir, writer, monkeypatch, resume=True, manifest=manifest)
+        assert writer.written == []
+        assert sum(n for n, _ in manifest.values()) == 34
+
+    def test_finish_removes_checkpoint_and_writes_report(self, export_dir, monkeypatch):
+        run = import_rels(export_dir, FakeWriter(), monkeypatch)
+        assert im.checkpoint_path().exists()
+        report = run.finish()
+        assert not im.checkpoint_path().exists()
+        assert report["written"] == 34
+        assert report["files"][REL_SPEC["file"]]["skipped"] == 6
+
+    def test_partitions_stable_across_processes(self):
+        # 续传在新进程中重建分区，必须与中断前的进程一致（字符串 hash() 每个进程随机化）
+        script = (
+            "import json, sys; sys.path.insert(0, sys.argv[1]); import import_minigradb as im; "
+            "rows = [{'a': f'4:9b7c1a2e-0000-4d3a-9e7f-123456789abc:{i}', 'b': f'4:x:{i % 7}', 'n': i} "
+            "for i in range(200)]; print(json.dumps(im.partition_rows(rows, 4)))"
+        )
+        root = str(Path(__file__).parent.parent)
+        outputs = set()
+        for seed in ("1", "2", "3"):
+            result = subprocess.run([sys.executable, "-c", script, root], capture_output=True, text=True,
+                                    env={**os.environ, "PYTHONHASHSEED": seed}, check=True)
+            outputs.add(result.stdout)
+        assert len(outputs) == 1
+        partitions = json.loads(outputs.pop())
+        assert all(partitions) and sum(len(p) for p in partitions) == 200
@@ -0,0 +1,123 @@
+"""
+测试后台查询任务 (jobs.py)
+"""
+import threading
+import time
+
+from app.config import settings
+from app.jobs import JobManager, page
+
+
+def wait_done(manager, job_id, timeout=2.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        job = manager.get(job_id)
+        if job is None or job.done:
+            return job
+        time.sleep(0.005)
+    raise AssertionError("任务未结束")
+
+
+def table_runner(n):
+    def run(job):
+        for _ in range(n):
+            job.check()
+            job.rows += 1
+            job.size += 4
+        return {"cql": "MATCH (n) RETURN n", "params": {}, "graph": {"nodes": []},
+                "table": {"columns": ["i"], "rows": [[i] for i in range(n)]}}
+    return run
+
+
+class TestJobManager:
+    """测试执行、取消、超时与淘汰"""
+
+    def test_result_paginated(self):
+        manager = JobManager(table_runner(250), workers=1)
+        job = wait_done(manager, manager.submit("cql", {}).id)
+        assert job.status == "done"
+        assert job.rows == 250
+        assert job.size == 1000
+
+        first = page(job.result, 0, 100)
+        assert first["table"]["rows"][0] == [0]
+        assert first["page"] == {"offset": 0, "limit": 100, "total": 250, "next": 100}
+        assert "graph" not in first
+        last = page(job.result, 200, 100, include_graph=True)
+        assert len(last["table"]["rows"]) == 50
+        assert last["page"]["next"] is None
+        assert last["graph"] == {"nodes": []}
+
+    def test_cancel_running(self):
+        started = threading.Event()
+
+        def run(job):
+            started.set()
+            while True:
+                job.check()
+                time.sleep(0.001)
+
+        manager = JobManager(run, workers=1)
+        job = manager.submit("cql", {})
+        assert started.wait(1.0)
+        manager.cancel(job.id)
+        assert wait_done(manager, job.id).status == "cancelled"
+
+    def test_cancel_queued(self):
+        gate = threading.Event()
+        manager = JobManager(lambda job: gate.wait(1.0) and {}, workers=1)
+        manager.submit("cql", {})
+        queued = manager.submit("cql", {})
+        manager.cancel(queued.id)
+        assert queued.status == "cancelled"
+        gate.set()
+
+    def test_timeout(self, monkeypatch):
+        monkeypatch.setattr(settings, "JOBS_TIMEOUT_MS", 10)
+
+        def run(job):
+            while True:
+                job.check()
+                time.sleep(0.002)
+
+        manager = JobManager(run, workers=1)
+        job = wait_done(manager, manager.submit("cql", {}).id)
+        assert job.status == "failed"
+        assert "时限" in job.error
+
+    def test_failure_recorded(self):
+        def run(job):
+            raise ValueError("语法错误")
+
+        manager = JobManager(run, workers=1)
+        job = wait_done(manager, manager.submit("cql", {}).id)
+        assert job.status == "failed"
+        assert job.error == "语法错误"
+
+    def test_evicts_oldest_beyond_limit(self, monkeypatch):
+        monkeypatch.setattr(settings, "JOBS_MAX_KEPT", 2)
+        manager = JobManager(table_runner(1), workers=1)
+        ids = []
+        for _ in range(3):
+            ids.append(manager.submit("cql", {}).id)
+            wait_done(manager, ids[-1])
+        assert manager.get(ids[0]) is None
+        assert manager.get(ids[2]) is not None
+
+    def test_evicts_oldest_beyond_result_budget(self, monkeypatch):
+        # 大小由 runner 在累积结果时记录：每个任务 0.4 MB，预算 1 MB 只能保留两个
+        monkeypatch.setattr(settings, "JOBS_MAX_RESULT_MB", 1)
+        manager = JobManager(table_runner(100 * 1024), workers=1)
+        ids = []
+        for _ in range(3):
+            ids.append(manager.submit("cql", {}).id)
+            wait_done(manager, ids[-1])
+        assert manager.get(ids[0]) is None
+        assert manager.get(ids[1]) is not None and manager.get(ids[2]) is not None
+
+    def test_ttl_expiry(self, monkeypatch):
+        manager = JobManager(table_runner(1), workers=1)
+        job_id = manager.submit("cql", {}).id
+        wait_done(manager, job_id)
+        monkeypatch.setattr(settings, "JOBS_TTL_S", -1)
+        assert manager.get(job_id) is None
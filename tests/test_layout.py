@@ -0,0 +1,65 @@
+"""
+测试服务端布局 (layout.py)
+"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from app import layout
+from app.config import settings
+from app.layout import apply_layout, layout_key
+
+
+def make_star(n):
+    nodes = [{"id": "hub", "category": "item"}] + [{"id": f"r:{i}", "category": "recipe"} for i in range(n)]
+    links = [{"source": f"r:{i}", "target": "hub", "label": "CONSUMES"} for i in range(n)]
+    return nodes, links
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    layout._cache.clear()
+    yield
+    layout._cache.clear()
+
+
+class TestApplyLayout:
+    """测试坐标计算与缓存"""
+
+    def test_coordinates_written(self):
+        nodes, links = make_star(20)
+        assert apply_layout(nodes, links) is True
+        for n in nodes:
+            assert isinstance(n["x"], float)
+            assert isinstance(n["y"], float)
+
+    def test_nodes_spread_apart(self):
+        nodes, links = make_star(20)
+        apply_layout(nodes, links)
+        points = {(n["x"], n["y"]) for n in nodes}
+        assert len(points) == len(nodes)
+
+    def test_cache_reuses_positions(self):
+        nodes, links = make_star(10)
+        apply_layout(nodes, links)
+        first = {n["id"]: (n["x"], n["y"]) for n in nodes}
+        # 同一节点集合（顺序不同）应命中缓存并得到相同坐标
+        nodes2, links2 = make_star(10)
+        nodes2.reverse()
+        apply_layout(nodes2, links2)
+        assert {n["id"]: (n["x"], n["y"]) for n in nodes2} == first
+        assert len(layout._cache) == 1
+
+    def test_layout_key_order_independent(self):
+        a = [{"id": "a"}, {"id": "b"}]
+        b = [{"id": "b"}, {"id": "a"}]
+        assert layout_key(a) == layout_key(b)
+
+    def test_grid_approximation_for_large_graphs(self, monkeypatch):
+        monkeypatch.setattr(settings, "LAYOUT_EXACT_MAX_NODES", 10)
+        nodes, links = make_star(50)
+        assert apply_layout(nodes, links) is True
+        assert len({(n["x"], n["y"]) for n in nodes}) == len(nodes)
+
+    def test_empty_graph(self):
+        assert apply_layout([], []) is False
@@ -0,0 +1,68 @@
+"""
+测试离线压测工具中的假后端 (scripts/loadtest)
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts" / "loadtest"))
+
+from fake_llm import QUESTIONS, create_app  # noqa: E402
+from fake_neo4j import FakeNeo4jClient, MiniGraDB  # noqa: E402
+from latency import parse_latency  # noqa: E402
+
+from app.echarts_converter import records_to_graph  # noqa: E402
+from app.graph_expand import build_expand_query  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def db():
+    return MiniGraDB(items=200, seed=1)
+
+
+class TestLatency:
+    def test_distributions(self):
+        assert parse_latency("0")() == 0.0
+        assert parse_latency("fixed:50")() == 0.05
+        assert all(0.02 <= parse_latency("uniform:20,80", seed=1)() <= 0.08 for _ in range(50))
+        assert parse_latency("lognormal:100,0.5", seed=1)() > 0
+        with pytest.raises(ValueError):
+            parse_latency("gamma:1,2")
+
+
+class TestFakeNeo4j:
+    def test_paths_convert_like_driver_records(self, db):
+        records, keys = db.answer(QUESTIONS[2][1], {"name": "工匠台"})
+        assert keys == ["path"] and len(records) == 100
+        # Record.data() 把路径展开为 [节点属性, 关系类型, 节点属性, ...]
+        assert isinstance(records[0]["path"], list)
+        nodes, links = records_to_graph(records)
+        assert any("工匠台" in n["name"] for n in nodes)
+        assert links and all(l["label"] for l in links)
+
+    def test_expand_excludes_known(self, db):
+        cql, params = build_expand_query("i:3")
+        records, keys = db.answer(cql, params)
+        assert keys == ["n", "r", "m"] and records
+        neighbour = db.adjacency[db.by_id[3].element_id][0][1]
+        records2, _ = db.answer(*build_expand_query("i:3", known_ids=[neighbour.element_id]))
+        assert len(records2) < len(records)
+
+    def test_client_stream_and_explain(self, db):
+        client = FakeNeo4jClient(db)
+        assert client.run_read("EXPLAIN MATCH (n) RETURN n") == ([], [])
+        with client.stream_read("MATCH (n:item) RETURN n LIMIT 5") as (keys, rows):
+            assert keys == ["n"] and len(list(rows)) == 5
+        assert "recipe" in client.get_schema()["labels"]
+
+
+class TestFakeLLM:
+    def test_chat_completion_returns_canned_cql(self):
+        client = TestClient(create_app())
+        body = {"messages": [{"role": "system", "content": "..."},
+                             {"role": "user", "content": "请编写只读 Cypher：\n野人会掉落什么"}]}
+        data = client.post("/chat/completions", json=body).json()
+        content = data["choices"][0]["message"]["content"]
+        assert '"name": "野人"' in content and "DROPS" in content
@@ -0,0 +1,103 @@
+"""
+测试阶段计时与 Prometheus 指标 (metrics.py)
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.config import settings
+from app.metrics import Histogram, MetricsMiddleware, render_metrics, server_timing, stage
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/work")
+    def work():
+        with stage("run_read"):
+            pass
+        with stage("build_table"):
+            pass
+        return {"ok": True}
+
+    @app.get("/jobs/{job_id}")
+    def job(job_id: str):
+        return {"id": job_id}
+
+    @app.get("/fail")
+    def fail():
+        from fastapi import HTTPException
+        raise HTTPException(status_code=400, detail="bad")
+
+    return app
+
+
+class TestHistogram:
+    """测试直方图累积计数"""
+
+    def test_render_cumulative(self):
+        h = Histogram("t_seconds", "test", ("stage",), (0.1, 1.0))
+        h.observe(0.05, "a")
+        h.observe(0.5, "a")
+        h.observe(5.0, "a")
+        text = "\n".join(h.render())
+        assert 't_seconds_bucket{stage="a",le="0.1"} 1' in text
+        assert 't_seconds_bucket{stage="a",le="1.0"} 2' in text
+        assert 't_seconds_bucket{stage="a",le="+Inf"} 3' in text
+        assert 't_seconds_count{stage="a"} 3' in text
+        assert 't_seconds_sum{stage="a"} 5.550000' in text
+
+
+class TestServerTiming:
+    """测试 Server-Timing 头"""
+
+    def test_merges_repeated_stages(self):
+        header = server_timing([("run_read", 2_000_000), ("serialize", 500_000), ("run_read", 1_000_000)], 4_000_000)
+        assert header == "run_read;dur=3.0, serialize;dur=0.5, total;dur=4.0"
+
+    def test_header_on_response(self):
+        resp = TestClient(make_app()).get("/work")
+        assert resp.status_code == 200
+        timing = resp.headers["server-timing"]
+        assert "run_read;dur=" in timing
+        assert "build_table;dur=" in timing
+        assert "total;dur=" in timing
+
+    def test_disabled_is_noop(self, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+        resp = TestClient(make_app()).get("/work")
+        assert "server-timing" not in resp.headers
+        assert stage("x") is stage("y")
+
+
+class TestMetricsRegistry:
+    """测试请求与错误计数"""
+
+    def test_requests_and_errors_counted(self):
+        client = TestClient(make_app())
+        client.get("/work")
+        client.get("/fail")
+        client.get("/nope")
+        text = render_metrics()
+        assert 'neo4jslave_requests_total{method="GET",path="/work",status="200"}' in text
+        assert 'neo4jslave_errors_total{method="GET",path="/fail",status="400"}' in text
+        assert 'path="unmatched"' in text
+        assert 'neo4jslave_stage_seconds_count{stage="run_read"}' in text
+        assert "neo4jslave_compression_bytes_out_total" in text
+
+    def test_path_label_is_route_template(self):
+        # 不同的 job id 落在同一条时间序列上
+        client = TestClient(make_app())
+        client.get("/jobs/a1")
+        client.get("/jobs/b2")
+        series = [line for line in render_metrics().splitlines()
+                  if line.startswith("neo4jslave_requests_total{") and 'method="GET"' in line
+                  and "/jobs/" in line and 'status="200"' in line]
+        assert len(series) == 1
+        assert 'path="/jobs/{job_id}"' in series[0]
+        assert "a1" not in render_metrics()
+
+    def test_result_size(self):
+        metrics.observe_result(rows=3, nodes=2, links=1)
+        assert 'neo4jslave_result_size_count{kind="rows"}' in render_metrics()
@@ -0,0 +1,88 @@
+"""
+测试单请求剖析 (profiling.py / GET /profiles)
+"""
+import json
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.config import settings
+from app.main import app as main_app
+from app.profiling import ProfileMiddleware
+
+
+def busy_work():
+    # 约 60ms 的纯 Python 计算，并保留一块可观的分配
+    data = []
+    deadline = time.perf_counter() + 0.06
+    while time.perf_counter() < deadline:
+        data.append("木料" * 50)
+    return len(data)
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(ProfileMiddleware)
+
+    @app.get("/work")
+    def work():
+        return {"n": busy_work()}
+
+    return app
+
+
+@pytest.fixture
+def enabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "s3cret")
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+class TestProfileMiddleware:
+    def test_profiled_request_stores_artifact(self, enabled):
+        resp = TestClient(make_app()).get("/work", headers={"X-Profile-Token": "s3cret"})
+        assert resp.status_code == 200
+        profile_id = resp.headers["x-profile-id"]
+        artifact = json.loads(profiling.load_profile(profile_id))
+        assert artifact["path"] == "/work" and artifact["status"] == 200
+        assert artifact["samples"] > 0
+        assert any("busy_work" in line for line in artifact["collapsed"])
+        assert any("test_profiling.py" in a["where"] for a in artifact["topAllocations"])
+        assert "busy_work" in profiling.load_profile(profile_id, "collapsed")
+
+    def test_query_flag_and_token_stripped(self, enabled):
+        resp = TestClient(make_app()).get("/work?profile=s3cret&x=1")
+        artifact = json.loads(profiling.load_profile(resp.headers["x-profile-id"]))
+        assert artifact["query"] == "x=1"
+
+    @pytest.mark.parametrize("headers", [{}, {"X-Profile-Token": "wrong"}])
+    def test_without_valid_token_untouched(self, enabled, headers):
+        resp = TestClient(make_app()).get("/work", headers=headers)
+        assert resp.status_code == 200
+        assert "x-profile-id" not in resp.headers
+        assert list(enabled.iterdir()) == []
+
+    def test_keeps_latest_artifacts(self, enabled, monkeypatch):
+        monkeypatch.setattr(settings, "PROFILE_KEEP", 1)
+        for i in range(3):
+            profiling.save_profile({"id": f"20260101-00000{i}-abcdef"}, [])
+        assert sorted(p.name for p in enabled.glob("*.json")) == ["20260101-000002-abcdef.json"]
+
+
+class TestProfilesEndpoint:
+    def test_disabled_is_not_found(self, monkeypatch):
+        monkeypatch.setattr(settings, "PROFILE_TOKEN", "")
+        assert TestClient(main_app).get("/profiles/20260101-000000-abcdef").status_code == 404
+
+    def test_fetch_requires_token(self, enabled):
+        profiling.save_profile({"id": "20260101-000000-abcdef", "path": "/nlq"}, ["MainThread;f (x.py:1) 3"])
+        client = TestClient(main_app)
+        assert client.get("/profiles/20260101-000000-abcdef").status_code == 403
+        resp = client.get("/profiles/20260101-000000-abcdef", headers={"X-Profile-Token": "s3cret"})
+        assert resp.json()["path"] == "/nlq"
+        resp = client.get("/profiles/20260101-000000-abcdef?format=collapsed&profile=s3cret")
+        assert resp.text == "MainThread;f (x.py:1) 3\n"
+        assert client.get("/profiles/..%2Fsecret", headers={"X-Profile-Token": "s3cret"}).status_code == 404
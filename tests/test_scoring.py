@@ -0,0 +1,63 @@
+"""
+测试节点重要度打分 (scoring.py)
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.scoring import build_csr, degree_scores, pagerank_scores, score_nodes, MIN_SYMBOL_SIZE, MAX_SYMBOL_SIZE
+
+
+def star(n):
+    nodes = [{"id": "hub", "symbolSize": 30}] + [{"id": f"r:{i}", "symbolSize": 30} for i in range(n)]
+    links = [{"source": f"r:{i}", "target": "hub"} for i in range(n)]
+    return nodes, links
+
+
+class TestCSR:
+    """测试 CSR 邻接构造"""
+
+    def test_undirected_degree(self):
+        nodes, links = star(5)
+        indptr, indices = build_csr(nodes, links)
+        assert degree_scores(indptr, indices).tolist() == [5, 1, 1, 1, 1, 1]
+        # hub 的邻居是全部叶子
+        assert sorted(indices[indptr[0]:indptr[1]].tolist()) == [1, 2, 3, 4, 5]
+
+    def test_ignores_unknown_endpoints_and_self_loops(self):
+        nodes = [{"id": "a"}, {"id": "b"}]
+        links = [{"source": "a", "target": "b"}, {"source": "a", "target": "a"}, {"source": "a", "target": "x"}]
+        indptr, _ = build_csr(nodes, links)
+        assert np.diff(indptr).tolist() == [1, 1]
+
+    def test_pagerank_sums_to_one(self):
+        nodes, links = star(10)
+        nodes.append({"id": "isolated"})
+        rank = pagerank_scores(*build_csr(nodes, links))
+        assert rank.sum() == pytest.approx(1.0, abs=1e-6)
+        assert rank.argmax() == 0
+
+
+class TestScoreNodes:
+    """测试尺寸映射"""
+
+    @pytest.mark.parametrize("method", ["degree", "pagerank"])
+    def test_hub_is_largest(self, method):
+        nodes, links = star(20)
+        assert score_nodes(nodes, links, method) is True
+        assert nodes[0]["symbolSize"] == MAX_SYMBOL_SIZE
+        assert nodes[0]["importance"] == 1.0
+        assert nodes[1]["symbolSize"] == MIN_SYMBOL_SIZE
+
+    def test_aggregate_size_preserved(self):
+        nodes, links = star(3)
+        nodes[1]["value"] = {"aggregate": True, "count": 120}
+        nodes[1]["symbolSize"] = 42
+        score_nodes(nodes, links, "degree")
+        assert nodes[1]["symbolSize"] == 42
+        assert "importance" in nodes[1]
+
+    def test_disabled(self):
+        nodes, links = star(3)
+        assert score_nodes(nodes, links, "none") is False
+        assert nodes[0]["symbolSize"] == 30
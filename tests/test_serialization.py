@@ -0,0 +1,38 @@
+"""
+测试快速 JSON 序列化 (serialization.py)
+"""
+import json
+from datetime import date
+
+from app.serialization import dumps, graph_payload
+
+
+class TestDumps:
+    """测试 dumps"""
+
+    def test_non_ascii_kept(self):
+        """中文名称应原样输出为 UTF-8"""
+        out = dumps({"name": "木料"})
+        assert "木料".encode("utf-8") in out
+        assert b"\\u" not in out
+
+    def test_roundtrip(self):
+        """输出可被标准 json 解析"""
+        obj = {"a": [1, 2.5, None, True], "b": {"c": "石块"}}
+        assert json.loads(dumps(obj)) == obj
+
+    def test_unknown_types_as_string(self):
+        """无法直接序列化的值转为字符串"""
+        assert json.loads(dumps({"d": date(2025, 9, 17)}))["d"] == "2025-09-17"
+
+
+class TestGraphPayload:
+    """测试 graph_payload"""
+
+    def test_categories_and_meta(self):
+        nodes = [{"id": "a", "category": "item"}, {"id": "b", "category": "recipe"}, {"id": "c", "category": "item"}]
+        payload = graph_payload(nodes, [])
+        assert payload["categories"] == [{"name": "item"}, {"name": "recipe"}]
+        assert payload["meta"]["nodeCount"] == 3
+        assert payload["meta"]["linkCount"] == 0
+        assert payload["meta"]["categories"] == payload["categories"]
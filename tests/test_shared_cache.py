@@ -0,0 +1,77 @@
+"""
+测试跨 worker 共享缓存 (shared_cache.py)
+"""
+import pytest
+
+from app import data_version
+from app.config import settings
+from app.shared_cache import SharedCache, cache_key
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+class TestSharedCache:
+    """测试命中、版本失效与 LRU 淘汰"""
+
+    def test_roundtrip_across_instances(self, path):
+        # 两个实例模拟同一主机上的两个 worker
+        writer, reader = SharedCache(path, 1 << 20), SharedCache(path, 1 << 20)
+        writer.put("run-cql:a", "v1", b'{"graph":1}')
+        assert reader.get("run-cql:a", "v1") == b'{"graph":1}'
+        assert reader.get("run-cql:missing", "v1") is None
+
+    def test_version_mismatch_misses_and_purges(self, path):
+        cache = SharedCache(path, 1 << 20)
+        cache.put("run-cql:a", "v1", b"old")
+        cache.put("nlq-cql:t", "model-a", b"translation")
+        assert cache.get("run-cql:a", "v2") is None
+        cache.put("run-cql:b", "v2", b"new")
+        # 同命名空间的旧版本条目被清除，其它命名空间不受影响
+        assert cache.get("run-cql:a", "v1") is None
+        assert cache.get("nlq-cql:t", "model-a") == b"translation"
+
+    def test_lru_eviction(self, path):
+        cache = SharedCache(path, max_bytes=400, touch_interval=0)
+        for i in range(4):
+            cache.put(f"run-cql:{i}", "v", bytes(100))
+        cache.get("run-cql:0", "v")  # 最近访问，保留
+        cache.put("run-cql:4", "v", bytes(100))
+        assert cache.evict() == 1
+        assert cache.get("run-cql:1", "v") is None
+        assert cache.get("run-cql:0", "v") is not None
+        # 超过上限 1/4 的单条不缓存
+        cache.put("run-cql:big", "v", bytes(200))
+        assert cache.get("run-cql:big", "v") is None
+
+    def test_key_ignores_param_order(self):
+        assert cache_key("run-cql", {"cql": "q", "params": {"a": 1, "b": 2}}) == \
+            cache_key("run-cql", {"params": {"b": 2, "a": 1}, "cql": "q"})
+        assert cache_key("run-cql", {"cql": "q"}, "json") != cache_key("run-cql", {"cql": "q"}, "msgpack")
+
+
+class TestResultVersion:
+    """测试结果缓存的版本：导入戳优先，没有导入戳时按 STATS_CACHE_TTL_S 分段过期"""
+
+    @pytest.fixture(autouse=True)
+    def state_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "IMPORT_STATE_DIR", str(tmp_path))
+        monkeypatch.setattr(settings, "STATS_CACHE_TTL_S", 60)
+
+    def test_expires_without_import_stamp(self, monkeypatch):
+        now = {"t": 6000.0}
+        monkeypatch.setattr(data_version.time, "time", lambda: now["t"])
+        first = data_version.result_version()
+        now["t"] += 30
+        assert data_version.result_version() == first
+        now["t"] += 60
+        assert data_version.result_version() not in ("", first)
+
+    def test_import_stamp_or_zero_ttl_is_version_only(self, monkeypatch):
+        monkeypatch.setattr(settings, "STATS_CACHE_TTL_S", 0)
+        assert data_version.result_version() == ""
+        monkeypatch.setattr(settings, "STATS_CACHE_TTL_S", 60)
+        stamp = data_version.bump_data_version()
+        assert data_version.result_version() == stamp
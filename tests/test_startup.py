@@ -0,0 +1,72 @@
+"""
+测试启动预热与启动报告 (startup.py / lifespan)
+"""
+import json
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app import startup
+from app.main import app
+
+
+class TestWarmup:
+    """测试预热查询的读取与执行"""
+
+    def test_load_queries_appends_expand_templates(self, tmp_path):
+        path = tmp_path / "warmup.json"
+        path.write_text(json.dumps(["MATCH (n) RETURN n LIMIT 1", {"cql": "MATCH (n {ID: $id}) RETURN n", "params": {"id": 1}}]),
+                        encoding="utf-8")
+        queries = startup.load_warmup_queries(str(path))
+        assert queries[:2] == [("MATCH (n) RETURN n LIMIT 1", {}), ("MATCH (n {ID: $id}) RETURN n", {"id": 1})]
+        assert len(queries) == 4
+        assert "MATCH (n:item {ID: $key})" in queries[2][0]
+        assert "elementId(n) = $id" in queries[3][0]
+
+    def test_bundled_queries_parse(self):
+        assert len(startup.load_warmup_queries()) > 2
+
+    def test_failures_counted_and_budget_respected(self):
+        calls = []
+
+        def run_read(cql, params):
+            calls.append(cql)
+            if cql == "bad":
+                raise RuntimeError("boom")
+
+        result = startup.run_warmup(run_read, [("ok", {}), ("bad", {}), ("ok", {})], budget_ms=10_000)
+        assert result["queries"] == 2 and result["failed"] == 1 and result["skipped"] == 0
+
+        calls.clear()
+        result = startup.run_warmup(run_read, [("ok", {})] * 3, budget_ms=-1)
+        assert calls == [] and result["skipped"] == 3
+
+
+class TestLifespan:
+    """测试启动阶段与启动报告"""
+
+    def test_startup_runs_warmup_and_reports(self):
+        with patch("app.main.neo4j_client.verify") as verify, \
+                patch("app.main.neo4j_client.get_schema", return_value={"labels": [], "relTypes": []}) as get_schema, \
+                patch("app.main.neo4j_client.run_read", return_value=([], [])) as run_read, \
+                patch("app.main.neo4j_client.close") as close:
+            with TestClient(app) as client:
+                body = client.get("/health", params={"verbose": "true"}).json()
+                metrics = client.get("/metrics").text
+        verify.assert_called_once()
+        get_schema.assert_called_once_with(True)
+        assert run_read.call_count == len(startup.load_warmup_queries())
+        close.assert_called_once()
+
+        report = body["startup"]
+        assert set(report["phases"]) >= {"neo4j_connect", "schema", "warmup", "llm_connect"}
+        assert report["warmup"]["failed"] == 0
+        assert report["readyMs"] > 0
+        assert report["firstByteMs"] is not None
+        assert 'neo4jslave_startup_seconds{stage="phase:warmup"}' in metrics
+
+    def test_unreachable_neo4j_does_not_block_startup(self):
+        with patch("app.main.neo4j_client.verify", side_effect=OSError("connection refused")), \
+                patch("app.main.neo4j_client.close"):
+            with TestClient(app) as client:
+                assert client.get("/health").status_code == 200
@@ -0,0 +1,127 @@
+"""
+测试统计快照 (stats.py)
+"""
+import pytest
+
+from app import stats
+from app.stats import collect_stats, degree_buckets, get_stats
+
+
+def fake_runner(calls=None):
+    def run(cql):
+        if calls is not None:
+            calls.append(cql)
+        if "labels(n) AS labels" in cql:
+            return [{"labels": ["item"], "c": 5}, {"labels": ["block", "item"], "c": 2}]
+        if "AS degree" in cql:
+            return [{"degree": 0, "c": 1}, {"degree": 1, "c": 3}, {"degree": 2, "c": 2}, {"degree": 3, "c": 1}]
+        if "percentileDisc" in cql:
+            return [{"avg": 1.5, "max": 3, "p50": 1, "p95": 3}]
+        if "MATCH (n:`item`)" in cql:
+            return [{"c": 7}]
+        if "MATCH (n:`block`)" in cql:
+            return [{"c": 2}]
+        if "[r:`DROPS`]" in cql:
+            return [{"c": 4}]
+        if "MATCH (n)" in cql:
+            return [{"c": 7}]
+        return [{"c": 9}]
+    return run
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    stats._cache.update(version=None, at=0.0, snapshot=None)
+    yield
+    stats._cache.update(version=None, at=0.0, snapshot=None)
+
+
+class TestCollectStats:
+    """测试快照内容"""
+
+    def test_snapshot_fields(self):
+        snap = collect_stats(fake_runner(), ["item", "block"], ["DROPS"], workers=2)
+        assert snap["totals"] == {"nodes": 7, "relationships": 9}
+        assert snap["labels"] == {"item": 7, "block": 2}
+        assert snap["relationshipTypes"] == {"DROPS": 4}
+        assert {"labels": ["block", "item"], "count": 2} in snap["labelCombinations"]
+        assert snap["degree"]["byLabel"]["item"] == {"avg": 1.5, "max": 3, "p50": 1, "p95": 3}
+
+    def test_count_store_queries_unfiltered(self):
+        calls = []
+        collect_stats(fake_runner(calls), ["item"], ["DROPS"], workers=1)
+        counts = [c for c in calls if c.endswith("AS c") and "WITH" not in c]
+        assert counts
+        assert all("WHERE" not in c for c in counts)
+
+    def test_single_worker_runs_in_calling_thread(self):
+        import threading
+        threads = set()
+
+        def run(cql):
+            threads.add(threading.get_ident())
+            return fake_runner()(cql)
+
+        collect_stats(run, ["item", "block"], ["DROPS"], workers=1)
+        assert threads == {threading.get_ident()}
+
+    def test_light_snapshot_skips_degree_scans(self):
+        calls = []
+        snap = collect_stats(fake_runner(calls), ["item"], [], workers=1, degrees=False)
+        assert "degree" not in snap
+        assert not any("COUNT {" in c for c in calls)
+        assert snap["labels"] == {"item": 7}
+
+    def test_degree_buckets(self):
+        rows = [{"degree": 0, "c": 1}, {"degree": 1, "c": 3}, {"degree": 2, "c": 2}, {"degree": 3, "c": 1},
+                {"degree": 9, "c": 4}]
+        assert degree_buckets(rows) == [
+            {"min": 0, "max": 0, "count": 1},
+            {"min": 1, "max": 1, "count": 3},
+            {"min": 2, "max": 3, "count": 3},
+            {"min": 8, "max": 15, "count": 4},
+        ]
+
+
+class TestGetStats:
+    """测试按数据版本缓存"""
+
+    def schema(self):
+        return {"labels": ["item"], "relTypes": ["DROPS"]}
+
+    def test_cached_until_version_changes(self, monkeypatch):
+        calls = []
+        version = {"v": "1"}
+        monkeypatch.setattr(stats, "current_data_version", lambda: version["v"])
+        first = get_stats(fake_runner(calls), self.schema)
+        n = len(calls)
+        assert get_stats(fake_runner(calls), self.schema) is first
+        assert len(calls) == n
+
+        version["v"] = "2"
+        second = get_stats(fake_runner(calls), self.schema)
+        assert second is not first
+        assert second["dataVersion"] == "2"
+        assert len(calls) > n
+
+    def test_refresh_forces_collection(self, monkeypatch):
+        monkeypatch.setattr(stats, "current_data_version", lambda: "1")
+        first = get_stats(fake_runner(), self.schema)
+        assert get_stats(fake_runner(), self.schema, refresh=True) is not first
+
+    def test_ttl_only_without_import_stamp(self, monkeypatch):
+        # 有导入戳时快照保留到下一次导入；没有导入戳时按 STATS_CACHE_TTL_S 过期
+        monkeypatch.setattr(stats.settings, "STATS_CACHE_TTL_S", 60)
+        now = {"t": 1000.0}
+        monkeypatch.setattr(stats.time, "monotonic", lambda: now["t"])
+        monkeypatch.setattr(stats, "current_data_version", lambda: "1")
+        stamped = get_stats(fake_runner(), self.schema)
+        now["t"] += 120
+        assert get_stats(fake_runner(), self.schema) is stamped
+
+        monkeypatch.setattr(stats, "current_data_version", lambda: "")
+        unstamped = get_stats(fake_runner(), self.schema)
+        now["t"] += 30
+        assert get_stats(fake_runner(), self.schema) is unstamped
+        now["t"] += 60
+        assert get_stats(fake_runner(), self.schema) is not unstamped
@@ -0,0 +1,103 @@
+"""
+测试大结果摘要 (summarize.py)
+"""
+from app.summarize import summarize_graph, parse_aggregate_id, aggregate_id
+
+
+def star(n_recipes, hub="i:101"):
+    """木料 ← CONSUMES ← n 个配方 → PRODUCES → 产物"""
+    nodes = [{"id": hub, "name": "木料", "category": "item"}]
+    links = []
+    for i in range(n_recipes):
+        rid, pid = f"r:{i}", f"p:{i}"
+        nodes.append({"id": rid, "name": f"配方{i}", "category": "recipe"})
+        nodes.append({"id": pid, "name": f"产物{i}", "category": "item"})
+        links.append({"source": rid, "target": hub, "category": "CONSUMES", "label": "CONSUMES"})
+        links.append({"source": rid, "target": pid, "category": "PRODUCES", "label": "PRODUCES"})
+    return nodes, links
+
+
+def two_stars():
+    """两个星形之间的唯一连接：i:1 - r:bridge - i:2（连接边排在最后）"""
+    nodes_a, links_a = star(30, hub="i:1")
+    nodes_b, links_b = star(30, hub="i:2")
+    nodes_b = [{**n, "id": n["id"] + "b"} if n["id"] != "i:2" else n for n in nodes_b]
+    links_b = [{**l, "source": l["source"] + "b", "target": l["target"] if l["target"] == "i:2" else l["target"] + "b"}
+               for l in links_b]
+    bridge = [{"id": "r:bridge", "category": "recipe"}]
+    bridge_links = [
+        {"source": "r:bridge", "target": "i:1", "label": "CONSUMES"},
+        {"source": "r:bridge", "target": "i:2", "label": "PRODUCES"},
+    ]
+    return nodes_a + nodes_b + bridge, links_a + links_b + bridge_links
+
+
+class TestSummarizeGraph:
+    """测试摘要触发、聚合与预算"""
+
+    def test_within_budget_unchanged(self):
+        nodes, links = star(5)
+        out_nodes, out_links, summary = summarize_graph(nodes, links, max_nodes=100, max_links=100)
+        assert summary is None
+        assert out_nodes is nodes
+        assert out_links is links
+
+    def test_star_collapsed(self):
+        nodes, links = star(200)
+        out_nodes, out_links, summary = summarize_graph(nodes, links, max_nodes=50, max_links=100)
+        assert summary["originalNodeCount"] == 401
+        assert summary["anchors"] == ["i:101"]
+        assert len(out_nodes) <= 50
+        aggs = [n for n in out_nodes if n.get("value", {}).get("aggregate")]
+        assert len(aggs) == 1
+        agg = aggs[0]
+        assert agg["value"]["count"] == 200
+        assert agg["value"]["memberCount"] == 400
+        assert agg["value"]["relType"] == "CONSUMES"
+        assert agg["value"]["direction"] == "in"
+        # 聚合节点通过一条边连回锚点
+        assert {"source": agg["id"], "target": "i:101"}.items() <= next(
+            l for l in out_links if l["source"] == agg["id"]).items()
+
+    def test_shortest_path_between_anchors_kept(self):
+        nodes, links = two_stars()
+        out_nodes, out_links, summary = summarize_graph(nodes, links, max_nodes=40, max_links=80)
+        ids = {n["id"] for n in out_nodes}
+        assert {"i:1", "i:2", "r:bridge"} <= ids
+        assert sum(1 for l in out_links if l["source"] == "r:bridge") == 2
+
+    def test_anchor_path_links_survive_tight_link_budget(self):
+        # 路径上的边排在最后、且折叠分组数超过边预算时，仍保留路径与每个分组连回锚点的边
+        nodes, links = two_stars()
+        out_nodes, out_links, summary = summarize_graph(nodes, links, max_nodes=40, max_links=3)
+        aggs = [n for n in out_nodes if n.get("value", {}).get("aggregate")]
+        assert sum(1 for l in out_links if l["source"] == "r:bridge") == 2
+        assert len(out_links) == 2 + len(aggs)
+
+    def test_small_groups_kept_in_budget(self):
+        nodes, links = star(60)
+        extra = [{"id": f"g:{i}", "category": "group"} for i in range(3)]
+        extra_links = [{"source": "i:101", "target": f"g:{i}", "label": "IN_GROUP"} for i in range(3)]
+        out_nodes, _, summary = summarize_graph(nodes + extra, links + extra_links, max_nodes=30, max_links=200)
+        ids = {n["id"] for n in out_nodes}
+        assert {"g:0", "g:1", "g:2"} <= ids
+
+    def test_isolated_nodes_aggregated(self):
+        nodes = [{"id": f"i:{i}", "category": "item"} for i in range(100)]
+        out_nodes, out_links, summary = summarize_graph(nodes, [], max_nodes=10, max_links=10)
+        assert len(out_nodes) == 10
+        agg = next(n for n in out_nodes if n.get("value", {}).get("aggregate"))
+        assert agg["value"]["count"] == 91
+
+
+class TestAggregateId:
+    """测试聚合 id 编解码"""
+
+    def test_roundtrip_with_element_id(self):
+        anchor = "4:9b7c1a2e-0000-4d3a-9e7f-123456789abc:42"
+        agg = aggregate_id(anchor, "CONSUMES", "in", "recipe")
+        assert parse_aggregate_id(agg) == {
+            "anchor": anchor, "relType": "CONSUMES", "direction": "in", "category": "recipe"}
+
+    def test_plain_id_is_not_aggregate(self):
+        assert parse_aggregate_id("i:101") is None